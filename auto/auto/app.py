@@ -1,3 +1,5 @@
+import os
+import threading
 from flask import Flask
 from dotenv import load_dotenv
 load_dotenv()
@@ -5,6 +7,13 @@ load_dotenv()
 from blueprints.party_routes import party_bp
 from blueprints.scrape_routes import scrape_bp
 from blueprints.Details import details_bp
+from blueprints.stats_routes import stats_bp
+from blueprints.job_routes import job_bp
+from blueprints.metrics_routes import metrics_bp
+from services.driver_service import browser_pool
+from services.job_service import job_queue
+from services.ocr_service import warm_up_extraction, EXTRACTION_WARM
+from services.extraction_pool import extraction_pool, EXTRACTION_POOL
 
 app = Flask(__name__)
 
@@ -12,6 +21,30 @@ app = Flask(__name__)
 app.register_blueprint(party_bp)
 app.register_blueprint(scrape_bp)
 app.register_blueprint(details_bp)
+app.register_blueprint(stats_bp)
+app.register_blueprint(job_bp)
+app.register_blueprint(metrics_bp)
+
+
+def warm_up(debug=False):
+    """
+    Pre-launch shared resources before serving requests.
+    With debug=True the reloader runs the script twice; only the serving child warms up.
+    """
+    if debug and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        return
+    if os.getenv("BROWSER_POOL_WARM", "1") == "1":
+        browser_pool.warm()
+    # Extraction-serving processes can load TrOCR/OpenAI before the first request
+    if EXTRACTION_WARM:
+        if EXTRACTION_POOL:
+            threading.Thread(target=extraction_pool.warm, name="extraction-pool-warm-up", daemon=True).start()
+        else:
+            warm_up_extraction()
+    # Resume jobs persisted by a previous run
+    job_queue.start()
+
 
 if __name__ == "__main__":
+    warm_up(debug=True)
     app.run(debug=True, port=5001)
@@ -0,0 +1,207 @@
+"""
+Memory of the page rendering pipeline in process_pdf on a synthetic
+100-page scanned PDF (image-only pages, so nothing is served from the text
+layer).
+
+"render all" is the previous pipeline: the whole document is rendered by
+one pdftoppm run, then every page is queued for OCR at once. "streaming"
+is extraction_service.ocr_pages: grayscale windows of RENDER_WINDOW pages
+rendered ahead on a thread, at most PAGES_IN_FLIGHT pages queued. "eager"
+and "lazy" run the whole of process_pdf with lazy OCR off and on; the LLM
+is replaced by a fixed reply that fills every field from the first page,
+so "lazy" shows the best case, where the prompt's pages are all it reads.
+Each scenario runs in a fresh interpreter against a real extraction pool
+and reports wall time, pages OCR'd, the server process's peak RSS and the
+peak size of its temp files.
+
+OCR is simulated with a fixed delay per page unless --real-ocr is given
+(needs Tesseract). Rendering needs poppler (pdftoppm). The OCR cache is
+off in every scenario.
+
+Run from the project root:
+    python -m benchmarks.bench_extraction_memory [--pages 100] [--workers 2]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from services import extraction_service
+from services.extraction_service import RENDER_DPI, new_stats, page_buffer
+from utils.helpers import BASE_DIR
+
+WORK_DIR = os.path.join(BASE_DIR, "benchmark_extraction")
+SCENARIOS = ["baseline", "render all", "streaming", "eager", "lazy"]
+LLM_DELAY = 1.0
+
+
+def page_lines(number, pages):
+    lines = [f"MORTGAGE - PAGE {number} OF {pages}", ""]
+    lines += [f"{n:02d}. The Mortgagor grants to the Mortgagee the premises described in Schedule A."
+              for n in range(1, 40)]
+    return lines
+
+
+def build_scanned_pdf(path, pages):
+    """Letter-size pages that are each one grayscale scan of typed text."""
+    import pymupdf
+
+    out = pymupdf.open()
+    for number in range(1, pages + 1):
+        source = pymupdf.open()
+        page = source.new_page(width=612, height=792)
+        page.insert_text((54, 60), "\n".join(page_lines(number, pages)), fontsize=9)
+        scan = page.get_pixmap(dpi=150, colorspace=pymupdf.csGRAY)
+        source.close()
+        out.new_page(width=612, height=792).insert_image(pymupdf.Rect(0, 0, 612, 792), pixmap=scan)
+    out.save(path, deflate=True)
+    out.close()
+
+
+def simulated_ocr(buffer, size, delay=0.2):
+    # About as much text as Tesseract reads off one synthetic page
+    time.sleep(delay)
+    return "\n".join(page_lines(0, 0)) + "\n", delay
+
+
+def simulated_llm(prompt, stats):
+    time.sleep(LLM_DELAY)
+    stats["llm_seconds"].append(LLM_DELAY)
+    return json.dumps({
+        "DOCUMENT_TYPE": "MORTGAGE",
+        "GRANTOR": "JOHN SMITH",
+        "GRANTEE": "FIRST BANK",
+        "INSTRUMENT_NUMBER": "2025012345",
+        "RECORDING_DATE": "01/15/2025",
+        "CONSIDERATION_AMOUNT": "$250,000.00",
+        "BOOK": "1234",
+        "PAGENO": "56",
+        "LEGAL_DESCRIPTION": "Lot 12 in Block 3 as shown on the Tax Map of the Borough of Paramus.",
+    })
+
+
+def render_all_then_ocr(pdf_path, runner, stats):
+    """process_pdf's page loop before streaming, for comparison."""
+    from pdf2image import convert_from_path
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pages = convert_from_path(pdf_path, dpi=RENDER_DPI, output_folder=tmpdir, paths_only=False)
+        futures = []
+        for page in pages:
+            futures.append(runner.submit(extraction_service.ocr_page, *page_buffer(page)))
+            page.close()
+        texts = {}
+        for number, future in enumerate(futures, 1):
+            texts[number], seconds = runner.result(future)
+            stats["page_seconds"].append(seconds)
+        return texts
+
+
+def _dir_mb(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total / (1024.0 * 1024.0)
+
+
+def probe(scenario, pdf_path, workers, real_ocr):
+    """One scenario in this (fresh) interpreter; prints a JSON line."""
+    from services.extraction_pool import ExtractionPool
+
+    if not real_ocr:
+        extraction_service.ocr_page = simulated_ocr
+    extraction_service._ask_llm = simulated_llm
+    extraction_service.OCR_CACHE = False
+    pool = ExtractionPool(size=workers)
+    pool.warm()
+
+    peak_tmp = [0.0]
+    stop = threading.Event()
+
+    def watch_tmp():
+        while not stop.is_set():
+            peak_tmp[0] = max(peak_tmp[0], _dir_mb(tempfile.gettempdir()))
+            time.sleep(0.05)
+
+    watcher = threading.Thread(target=watch_tmp, daemon=True)
+    watcher.start()
+    stats = new_stats()
+    started = time.time()
+    pages = 0
+    if scenario == "render all":
+        pages = len(render_all_then_ocr(pdf_path, pool, stats))
+    elif scenario == "streaming":
+        pages = len(extraction_service.ocr_pages(pdf_path, None, pool, stats))
+    elif scenario in ("eager", "lazy"):
+        extraction_service.process_pdf(pdf_path, os.path.basename(pdf_path), stats, pool,
+                                       use_cache=False, lazy=scenario == "lazy")
+        pages = stats["sources"]["ocr"]
+    elapsed = time.time() - started
+    stop.set()
+    watcher.join()
+    pool.shutdown()
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "seconds": elapsed,
+        "pages": pages,
+        "max_rss_mb": rss / 1024.0 if sys.platform != "darwin" else rss / (1024.0 * 1024.0),
+        "peak_tmp_mb": peak_tmp[0],
+    }))
+
+
+def measure(scenario, pdf_path, workers, real_ocr):
+    tmp = os.path.join(WORK_DIR, "tmp")
+    os.makedirs(tmp, exist_ok=True)
+    cmd = [sys.executable, "-m", "benchmarks.bench_extraction_memory", "--probe", scenario,
+           "--pdf", pdf_path, "--workers", str(workers)] + (["--real-ocr"] if real_ocr else [])
+    # Private TMPDIR so the temp-file watcher sees only this run's page images
+    out = subprocess.run(cmd, capture_output=True, text=True, env={**os.environ, "TMPDIR": tmp})
+    shutil.rmtree(tmp, ignore_errors=True)
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=2, help="extraction pool size")
+    parser.add_argument("--real-ocr", action="store_true", help="run Tesseract/TrOCR instead of a fixed delay")
+    parser.add_argument("--probe", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe(args.probe, args.pdf, args.workers, args.real_ocr)
+        return
+
+    os.makedirs(WORK_DIR, exist_ok=True)
+    try:
+        pdf_path = os.path.join(WORK_DIR, f"synthetic_{args.pages}.pdf")
+        build_scanned_pdf(pdf_path, args.pages)
+        print(f"{args.pages}-page scanned PDF ({os.path.getsize(pdf_path) / 1024.0:.0f} KB), "
+              f"{args.workers} worker(s), {'real' if args.real_ocr else 'simulated'} OCR")
+        print(f"{'pipeline':12} {'pages':>5} {'seconds':>8} {'max RSS MB':>11} {'peak tmp MB':>12}")
+        for scenario in SCENARIOS:
+            r = measure(scenario, pdf_path, args.workers, args.real_ocr)
+            if "error" in r:
+                print(f"{scenario:12} {r['error']}")
+                continue
+            print(f"{scenario:12} {r['pages']:5d} {r['seconds']:8.1f} {r['max_rss_mb']:11.1f} {r['peak_tmp_mb']:12.1f}")
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Exercise the Selenium-free HTTP engine against the stub site's recorded JSON.
+
+Reports per-search latency and throughput at a few concurrency levels.
+
+Run from the project root:
+    python -m benchmarks.bench_http_search
+"""
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_site import create_app, serve
+from services import manifest_service
+from services.http_search_service import http_search_party
+
+SEARCHES = 24
+CONCURRENCY_LEVELS = [1, 4, 12]
+API_LATENCY_MS = 50
+
+
+def one_search(base_url, work_dir, i):
+    # Own file-number folder per search, or the manifest would skip every download after the first
+    file_dir = os.path.join(work_dir, str(i), "party")
+    os.makedirs(file_dir, exist_ok=True)
+    started = time.time()
+    result = http_search_party("RICCA TERESA", "PARAMUS", "01/01/2025", "12/31/2025", base_url, file_dir, "bergen")
+    assert result["status"] == "PDF_FOUND_SUCCESSFULLY", result
+    return time.time() - started, result["file_count"]
+
+
+def main():
+    server, base_url = serve(create_app(api_latency_ms=API_LATENCY_MS))
+    work_dir = tempfile.mkdtemp(prefix="bench_http_")
+    manifest_service.manifest = manifest_service.DownloadManifest(os.path.join(work_dir, "manifest.db"))
+    try:
+        print(f"{'workers':>8} {'searches/min':>14} {'avg latency s':>14} {'files':>6}")
+        for workers in CONCURRENCY_LEVELS:
+            started = time.time()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                runs = list(pool.map(lambda i: one_search(base_url, work_dir, f"{workers}_{i}"), range(SEARCHES)))
+            elapsed = time.time() - started
+            avg = sum(r[0] for r in runs) / len(runs)
+            files = sum(r[1] for r in runs)
+            print(f"{workers:8d} {SEARCHES / elapsed * 60:14.1f} {avg:14.3f} {files:6d}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
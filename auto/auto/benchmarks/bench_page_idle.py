@@ -0,0 +1,59 @@
+"""
+Before/after benchmark: legacy fixed sleeps vs wait_for_page_idle.
+
+Each scenario mirrors one of the old time.sleep() call sites in
+scraper_service, paired with a simulated server latency on the stub site.
+
+Run from the project root:
+    python -m benchmarks.bench_page_idle
+"""
+import time
+from selenium.webdriver.common.by import By
+
+from benchmarks.stub_site import serve
+from services.driver_service import start_browser
+from services.wait_service import wait_for_page_idle
+
+# (call site, legacy sleep seconds, simulated XHR latency ms)
+SCENARIOS = [
+    ("open_site: tab click", 3, 400),
+    ("perform_search: initial load", 4, 800),
+    ("perform_search: party tab switch", 3, 300),
+    ("fill_search_form: after runSearch", 6, 1500),
+    ("download_all_pdfs: View click", 2, 400),
+    ("process_all_views: after download", 2, 200),
+    ("save_results_as_pdf: Print Results", 3, 600),
+]
+
+
+def run_scenario(driver, base_url, delay_ms, settle):
+    driver.get(f"{base_url}?delay={delay_ms}")
+    wait_for_page_idle(driver)
+    started = time.time()
+    driver.find_element(By.ID, "trigger").click()
+    settle()
+    elapsed = time.time() - started
+    ready = driver.find_element(By.ID, "out").text.endswith("rows")
+    return elapsed, ready
+
+
+def main():
+    server, base_url = serve()
+    driver = start_browser(".")
+    try:
+        total_before = total_after = 0.0
+        print(f"{'call site':40} {'sleep':>8} {'idle':>8} {'ready':>6}")
+        for name, legacy_sleep, delay_ms in SCENARIOS:
+            before, _ = run_scenario(driver, base_url, delay_ms, lambda: time.sleep(legacy_sleep))
+            after, ready = run_scenario(driver, base_url, delay_ms, lambda: wait_for_page_idle(driver))
+            total_before += before
+            total_after += after
+            print(f"{name:40} {before:8.2f} {after:8.2f} {str(ready):>6}")
+        print(f"{'TOTAL':40} {total_before:8.2f} {total_after:8.2f}")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+End-to-end throughput of the Selenium scraper against the local mock
+BrowserView site (benchmarks.mock_site).
+
+Runs Town/Lot/Block (run_scrape) and party (run_search_document) payloads
+through the real runners and browser pool at several request concurrencies
+and PDF window counts, and reports searches/min and documents/min. Nothing
+touches a county site; downloads go under BASE_DIR/benchmark and are
+removed afterwards. Searches skip the search cache and incremental marks,
+and use a temporary download manifest, so every level really drives Chrome.
+
+Needs Chrome and chromedriver; the benchmark stops before timing anything
+if no session can be launched. No reference numbers are recorded yet: the
+mock has only been exercised over HTTP, so the first run with a real
+Chrome also checks the mock itself (a level with errors points at it).
+
+Run from the project root:
+    python -m benchmarks.bench_scraper [--generation-ms 3000] [--searches 4]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_site import MockRecords, create_mock_app, TOWNS
+from benchmarks.stub_site import serve
+from services import manifest_service
+from services.driver_service import browser_pool
+from services.scrape_runner import run_scrape, run_search_document
+from utils.helpers import BASE_DIR
+
+COUNTY = "benchmark"
+# (request concurrency, PDF windows per request)
+LEVELS = [(1, 1), (1, 2), (2, 1), (2, 2), (4, 1)]
+
+
+def scrape_payload(base_url, n, pdf_concurrency):
+    return {
+        "township": TOWNS[n % len(TOWNS)],
+        "lot": str(100 + n),
+        "block": str(10 + n),
+        "file_number": f"BENCH-TLB-{n}",
+        "date": "01/01/1995",
+        "site_url": base_url,
+        "county": COUNTY,
+        "engine": "selenium",
+        "pdf_concurrency": pdf_concurrency,
+        "cache": False,
+        "incremental": False,
+    }
+
+
+def party_payload(base_url, n, pdf_concurrency):
+    return {
+        "party_name": f"BENCHMARK PARTY {n}",
+        "from_date": "01/01/1995",
+        "file_number": f"BENCH-PARTY-{n}",
+        "site_url": base_url,
+        "county": COUNTY,
+        "engine": "selenium",
+        "pdf_concurrency": pdf_concurrency,
+        "cache": False,
+        "incremental": False,
+    }
+
+
+def documents_in(body):
+    if "total_downloaded" in body:
+        return body["total_downloaded"]
+    return body.get("file_count", 0)
+
+
+def run_level(runner, make_payload, base_url, searches, concurrency, pdf_concurrency, offset):
+    browser_pool.size = concurrency
+    payloads = [make_payload(base_url, offset + n, pdf_concurrency) for n in range(searches)]
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(runner, payloads))
+    elapsed = time.time() - started
+
+    errors = [body for body, status in results if status >= 400 or body.get("status") == "ERROR"]
+    docs = sum(documents_in(body) for body, _ in results)
+    return {
+        "seconds": elapsed,
+        "searches_per_min": searches * 60 / elapsed,
+        "docs_per_min": docs * 60 / elapsed,
+        "docs": docs,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--generation-ms", type=int, default=3000,
+                        help="server-side 'PDF / Print All Pages' time per document")
+    parser.add_argument("--latency-ms", type=int, default=100, help="latency of every mock API call")
+    parser.add_argument("--searches", type=int, default=4, help="searches per level and search type")
+    parser.add_argument("--records", type=int, default=4, help="documents per search subject")
+    parser.add_argument("--result-cap", type=int, default=100,
+                        help="rows the mock returns per search; lower it below --records to exercise date sharding")
+    args = parser.parse_args()
+
+    app = create_mock_app(generation_delay_ms=args.generation_ms, api_latency_ms=args.latency_ms,
+                          result_cap=args.result_cap,
+                          records=MockRecords(records_per_subject=args.records, large_document_every=3))
+    server, base_url = serve(app)
+    work_dir = tempfile.mkdtemp(prefix="bench_scraper_")
+    manifest_service.manifest = manifest_service.DownloadManifest(os.path.join(work_dir, "manifest.db"))
+    offset = 0
+    try:
+        try:
+            with browser_pool.lease(work_dir, timeout=120):
+                pass
+        except Exception as e:
+            print(f"Could not start a Chrome session, nothing measured: {e}")
+            return
+        print(f"Mock BrowserView at {base_url} (generation {args.generation_ms}ms, "
+              f"latency {args.latency_ms}ms, {args.records} docs/search)")
+        print(f"{'search':8} {'req':>3} {'pdf':>3} {'seconds':>8} {'searches/min':>12} "
+              f"{'docs/min':>9} {'docs':>5} {'errors':>6}")
+        for label, runner, make_payload in [("lot", run_scrape, scrape_payload),
+                                             ("party", run_search_document, party_payload)]:
+            for concurrency, pdf_concurrency in LEVELS:
+                # Fresh subjects every level so the manifest never short-circuits a download
+                r = run_level(runner, make_payload, base_url, args.searches, concurrency, pdf_concurrency, offset)
+                offset += args.searches
+                print(f"{label:8} {concurrency:3d} {pdf_concurrency:3d} {r['seconds']:8.1f} "
+                      f"{r['searches_per_min']:12.2f} {r['docs_per_min']:9.2f} {r['docs']:5d} {r['errors']:6d}")
+        print(f"Pool: {browser_pool.stats()}")
+    finally:
+        browser_pool.shutdown()
+        server.shutdown()
+        shutil.rmtree(os.path.join(BASE_DIR, COUNTY), ignore_errors=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Startup cost of the app: import time, peak RSS and which heavy modules got
+loaded, measured in a fresh interpreter per scenario.
+
+"scrape-only" imports app.py the way a scraper process does; "warm
+extraction" also loads the TrOCR model and OpenAI client up front
+(EXTRACTION_WARM=1), i.e. what every process paid before the OCR/LLM stack
+became lazy.
+
+Run from the project root:
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ["torch", "transformers", "cv2", "pandas", "openai", "pytesseract", "numpy"]
+
+PROBE = """
+import json, resource, sys, time
+started = time.time()
+import app
+{extra}
+elapsed = time.time() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_mb": rss / 1024.0 if sys.platform != "darwin" else rss / (1024.0 * 1024.0),
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+SCENARIOS = [
+    ("scrape-only", ""),
+    ("warm extraction", "from services.ocr_service import warm_up_extraction; warm_up_extraction(background=False)"),
+]
+
+
+def measure(extra):
+    code = PROBE.format(extra=extra, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         env={**os.environ, "BROWSER_POOL_WARM": "0"})
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'scenario':16} {'import s':>9} {'max RSS MB':>11}  heavy modules loaded")
+    for label, extra in SCENARIOS:
+        r = measure(extra)
+        if "error" in r:
+            print(f"{label:16} {'-':>9} {'-':>11}  {r['error']}")
+            continue
+        print(f"{label:16} {r['seconds']:9.2f} {r['max_rss_mb']:11.1f}  {', '.join(r['loaded']) or '(none)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Before/after benchmark: WebDriver commands spent selecting the township in
+fill_search_form.
+
+"legacy" is the previous Select(...).options loop (value xpath, exact
+text/value pass, partial pass); "cold" is select_township with an empty
+option cache and "warm" is every later search on the same site.
+
+Run from the project root:
+    python -m benchmarks.bench_township
+"""
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import Select, WebDriverWait
+
+from benchmarks.stub_site import serve, township_names
+from services.driver_service import start_browser
+from services.scraper_service import select_township, invalidate_township_options
+from services.wait_service import wait_for_page_idle
+
+TOWNSHIP_COUNT = 70
+# (label, index of the township searched for, how it is spelled in the request)
+TARGETS = [
+    ("first option, exact", 0, None),
+    ("last option, exact", TOWNSHIP_COUNT - 1, None),
+    ("last option, partial", TOWNSHIP_COUNT - 1, lambda name: name.split()[-1]),
+]
+
+
+class CommandCounter:
+    """Counts every WebDriver command sent by a driver."""
+
+    def __init__(self, driver):
+        self.count = 0
+        self._execute = driver.execute
+
+        def execute(command, params=None):
+            self.count += 1
+            return self._execute(command, params)
+
+        driver.execute = execute
+
+
+def legacy_select_township(driver, township):
+    WebDriverWait(driver, 25).until(lambda d: len(Select(d.find_element(
+        By.XPATH, "//select[@ng-model='documentService.SearchCriteria.searchCommonTown']")).options) > 1)
+    town_select = driver.find_element(By.XPATH, "//select[@ng-model='documentService.SearchCriteria.searchCommonTown']")
+    select = Select(town_select)
+    target = township.strip().upper()
+    try:
+        option = town_select.find_element(By.XPATH, f"./option[@value='{target}']")
+        driver.execute_script("arguments[0].selected = true; arguments[0].dispatchEvent(new Event('change', { bubbles: true }));", option)
+        driver.execute_script("arguments[1].dispatchEvent(new Event('change', { bubbles: true }));", option, town_select)
+        return
+    except Exception:
+        pass
+    for option in select.options:
+        val = (option.get_attribute("value") or "").strip().upper()
+        text = option.text.replace("\u00a0", " ").strip().upper()
+        if text == target or val == target:
+            driver.execute_script("arguments[0].selected = true;", option)
+            driver.execute_script("arguments[0].dispatchEvent(new Event('change', { bubbles: true }));", town_select)
+            return
+    for option in select.options:
+        text = option.text.replace("\u00a0", " ").strip().upper()
+        val = (option.get_attribute("value") or "").strip().upper()
+        if target in text or target in val:
+            driver.execute_script("arguments[0].selected = true;", option)
+            driver.execute_script("arguments[0].dispatchEvent(new Event('change', { bubbles: true }));", town_select)
+            return
+    raise Exception(f"Township not found in dropdown: {township}")
+
+
+def measure(driver, counter, url, select):
+    driver.get(url)
+    wait_for_page_idle(driver)
+    counter.count = 0
+    started = time.time()
+    select()
+    return counter.count, time.time() - started
+
+
+def main():
+    server, base_url = serve()
+    driver = start_browser(".")
+    counter = CommandCounter(driver)
+    url = f"{base_url}township?count={TOWNSHIP_COUNT}"
+    names = township_names(TOWNSHIP_COUNT)
+    try:
+        print(f"{'target':24} {'legacy cmds':>11} {'cold cmds':>9} {'warm cmds':>9} "
+              f"{'legacy s':>9} {'cold s':>7} {'warm s':>7}")
+        for label, index, spell in TARGETS:
+            township = spell(names[index]) if spell else names[index]
+            legacy = measure(driver, counter, url, lambda: legacy_select_township(driver, township))
+            invalidate_township_options(url)
+            cold = measure(driver, counter, url, lambda: select_township(driver, township, url))
+            warm = measure(driver, counter, url, lambda: select_township(driver, township, url))
+            print(f"{label:24} {legacy[0]:11d} {cold[0]:9d} {warm[0]:9d} "
+                  f"{legacy[1]:9.2f} {cold[1]:7.2f} {warm[1]:7.2f}")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
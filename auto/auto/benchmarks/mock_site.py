@@ -0,0 +1,364 @@
+"""
+Local mock of a BrowserView county site for end-to-end scraper runs.
+
+Unlike stub_site (which only fakes what the page-idle probe and the JSON API
+need), this serves a page that the unchanged services.scraper_service code
+can drive: Party and Town/Lot/Block tabs, the township <select>, a fake
+Angular scope with documentService.SearchCriteria / runSearch / fetchDocument,
+the result-limit and large-document notices (modal_ok), "PDF / Print All
+Pages" with a server-side generation delay, the blob: View link and the
+Print Results grid window.
+
+Records are generated deterministically per search subject (party name or
+town/lot/block), spread over recording dates so date filters and the result
+cap behave like the real site.
+
+Run standalone for manual poking:
+    python -m benchmarks.mock_site
+"""
+import hashlib
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from flask import Flask, Response, jsonify, request
+
+from benchmarks.stub_site import PLACEHOLDER_PDF, township_names, serve
+
+DOC_TYPES = ["DEED", "MTG", "ASGN", "DISCL", "LIEN", "MEMO", "REL"]
+TOWNS = ["PARAMUS", "HACKENSACK", "TEANECK", "FORT LEE"] + [t.upper() for t in township_names(66)]
+FIRST_RECORD_DATE = datetime(1995, 1, 1)
+LAST_RECORD_DATE = datetime(2025, 12, 31)
+
+PAGE = r"""<!doctype html>
+<html>
+<head>
+<title>Mock BrowserView</title>
+<style>
+  .hidden { display: none; }
+  .modal { position: fixed; top: 30%; left: 30%; background: #fff; border: 1px solid #333; padding: 20px; }
+  .ajax-loader { position: fixed; top: 0; right: 0; }
+</style>
+</head>
+<body ng-app="browserview">
+<div ng-view>
+  <ul class="nav-tabs">
+    <li><a href="#" onclick="showTab('party'); return false;">Party</a></li>
+    <li><a href="#" onclick="showTab('tlb'); return false;">Town/Lot/Block</a></li>
+  </ul>
+
+  <div id="tab-party" class="hidden">
+    <input placeholder="Party Name" ng-model="documentService.SearchCriteria.searchPartyName">
+  </div>
+
+  <div id="tab-tlb" class="hidden">
+    <select ng-model="documentService.SearchCriteria.searchCommonTown"><option value="">-- Select --</option></select>
+    <input placeholder="Lot" ng-model="documentService.SearchCriteria.searchLot">
+    <input placeholder="Block" ng-model="documentService.SearchCriteria.searchBlock">
+    <input name="partyName" ng-model="documentService.SearchCriteria.searchPartyName">
+  </div>
+
+  <div id="common" class="hidden">
+    <input type="checkbox" class="tree-checkbox" onclick="toggleAllTypes(this)"> ALL
+    <input placeholder="Document Type" ng-model="documentService.SearchCriteria.searchDocType">
+    <input name="fromdate" ng-model="documentService.SearchCriteria.fromDate">
+    <input name="todate" ng-model="documentService.SearchCriteria.toDate">
+    <button ng-click="runSearch(true)" onclick="angular._scope.runSearch(true)">Search</button>
+    <button ng-click="exportGridResults()" onclick="angular._scope.exportGridResults()">Print Results</button>
+  </div>
+
+  <div id="results"></div>
+  <div id="details"></div>
+</div>
+
+<div id="modal" class="modal hidden">
+  <p id="modal-text"></p>
+  <button ng-click="modal_ok()" onclick="angular._scope.modal_ok()">OK</button>
+</div>
+<div class="ajax-loader hidden" id="loader">Loading...</div>
+
+<script>
+(function() {
+  var pending = [];
+  var injector = { get: function() { return { pendingRequests: pending }; } };
+  var scope = null;
+
+  function syncModel(el) {
+    var model = el && el.getAttribute && el.getAttribute('ng-model');
+    if (model && model.indexOf('documentService.SearchCriteria.') === 0) {
+      scope.documentService.SearchCriteria[model.split('.').pop()] = el.value;
+    }
+  }
+
+  window.angular = {
+    _pending: pending,
+    _syncModel: syncModel,
+    element: function(el) {
+      return {
+        scope: function() { return scope; },
+        injector: function() { return injector; },
+        triggerHandler: function() { syncModel(el); }
+      };
+    },
+    extend: function(dst, src) { for (var k in src) { dst[k] = src[k]; } return dst; },
+    toJson: function(obj) { return JSON.stringify(obj); },
+    _setScope: function(s) { scope = s; window.angular._scope = s; }
+  };
+  document.addEventListener('input', function(e) { syncModel(e.target); }, true);
+  document.addEventListener('change', function(e) { syncModel(e.target); }, true);
+})();
+
+function $(id) { return document.getElementById(id); }
+
+function request(method, url, body) {
+  var token = {};
+  angular._pending.push(token);
+  $('loader').classList.remove('hidden');
+  var opts = { method: method, headers: { 'Content-Type': 'application/json' } };
+  if (body) { opts.body = JSON.stringify(body); }
+  return fetch(url, opts).then(function(r) {
+    return (r.headers.get('Content-Type') || '').indexOf('json') >= 0 ? r.json() : r.blob();
+  }).finally(function() {
+    angular._pending.splice(angular._pending.indexOf(token), 1);
+    if (!angular._pending.length) { $('loader').classList.add('hidden'); }
+  });
+}
+
+function showTab(name) {
+  $('tab-party').classList.toggle('hidden', name !== 'party');
+  $('tab-tlb').classList.toggle('hidden', name !== 'tlb');
+  $('common').classList.remove('hidden');
+}
+
+function toggleAllTypes(box) {
+  var input = document.querySelector("input[placeholder='Document Type']");
+  input.value = box.checked ? __ALL_TYPES__ : '';
+  angular._syncModel(input);
+}
+
+function showModal(text, onOk) {
+  $('modal-text').innerText = text;
+  $('modal').classList.remove('hidden');
+  angular._scope._modalOk = onOk;
+}
+
+var rows = [];
+var current = null;
+
+angular._setScope({
+  documentService: { SearchCriteria: {} },
+  $apply: function(fn) { if (fn) { fn(); } },
+
+  runSearch: function() {
+    $('details').innerHTML = '';
+    $('results').innerHTML = '';
+    request('POST', 'api/search', this.documentService.SearchCriteria).then(function(data) {
+      rows = data.Rows;
+      renderGrid();
+      if (data.TotalCount > rows.length) {
+        showModal('Notice: only the first ' + rows.length + ' of ' + data.TotalCount + ' results are shown.');
+      }
+    });
+  },
+
+  fetchDocument: function(index) {
+    var row = rows[index];
+    request('GET', 'api/document/' + row.DocumentId).then(function(doc) {
+      current = doc;
+      $('details').innerHTML =
+        '<table>' +
+        '<tr><td>Type:</td><td>' + doc.DocType + '</td></tr>' +
+        '<tr><td>Instrument Number:</td><td>' + doc.InstrumentNumber + '</td></tr>' +
+        '<tr><td>Pages:</td><td>' + doc.PageCount + '</td></tr>' +
+        '</table>' +
+        '<button onclick="printAll()">PDF / Print All Pages</button>' +
+        '<span id="pdf-link"></span>';
+    });
+  },
+
+  modal_ok: function() {
+    $('modal').classList.add('hidden');
+    var next = this._modalOk;
+    this._modalOk = null;
+    if (next) { next(); }
+  },
+
+  exportGridResults: function() {
+    var win = window.open('', '_blank');
+    win.document.write('<html><body><h3>Search Results</h3>' + $('results').innerHTML + '</body></html>');
+    win.document.close();
+    win.print();
+  }
+});
+
+function renderGrid() {
+  if (!rows.length) {
+    $('results').innerHTML = '<table><tr><td>No records found</td></tr></table>';
+    return;
+  }
+  var html = '<table>';
+  rows.forEach(function(r, i) {
+    html += '<tr><td><button ng-click="fetchDocument(doc)" onclick="angular._scope.fetchDocument(' + i + ')">View</button></td>' +
+            '<td>' + r.DocType + '</td><td>' + r.InstrumentNumber + '</td><td>' + r.RecordedDate + '</td>' +
+            '<td>' + r.FirstParty + '</td><td>' + r.SecondParty + '</td></tr>';
+  });
+  $('results').innerHTML = html + '</table>';
+}
+
+function printAll() {
+  var doc = current;
+  function generate() {
+    request('GET', 'api/document/' + doc.DocumentId + '/pdf').then(function(blob) {
+      $('pdf-link').innerHTML = '<a href="' + URL.createObjectURL(blob) + '" download="document.pdf">View</a>';
+    });
+  }
+  if (doc.PageCount > 40) {
+    showModal('Large Document: ' + doc.PageCount + ' pages may take a while to generate.', generate);
+  } else {
+    generate();
+  }
+}
+
+request('GET', 'api/towns').then(function(towns) {
+  var sel = document.querySelector('select');
+  towns.forEach(function(t) {
+    var o = document.createElement('option');
+    o.value = t;
+    o.text = t;
+    sel.appendChild(o);
+  });
+  showTab('party');
+});
+</script>
+</body>
+</html>
+"""
+
+
+# ======================================================
+# RECORDS
+# ======================================================
+def _rng(*parts):
+    seed = hashlib.sha256("|".join(str(p).upper() for p in parts).encode()).hexdigest()
+    return random.Random(int(seed[:16], 16))
+
+
+def _parse_date(value, default):
+    try:
+        return datetime.strptime(value, "%m/%d/%Y")
+    except (TypeError, ValueError):
+        return default
+
+
+class MockRecords:
+    """
+    Deterministic documents per search subject. busy_subjects maps a party
+    name (or "TOWN|LOT|BLOCK") to a record count that exceeds the cap.
+    """
+
+    def __init__(self, records_per_subject=8, busy_subjects=None, large_document_every=0):
+        self.records_per_subject = records_per_subject
+        self.busy_subjects = {k.upper(): v for k, v in (busy_subjects or {}).items()}
+        self.large_document_every = large_document_every
+        self.documents = {}
+
+    def for_subject(self, subject, town=""):
+        count = self.busy_subjects.get(subject.upper(), self.records_per_subject)
+        rng = _rng(subject)
+        span_days = (LAST_RECORD_DATE - FIRST_RECORD_DATE).days
+        rows = []
+        for i in range(count):
+            recorded = FIRST_RECORD_DATE + timedelta(days=rng.randrange(span_days))
+            doc_id = str(rng.randrange(10 ** 6, 10 ** 7))
+            pages = rng.randrange(1, 12)
+            if self.large_document_every and i % self.large_document_every == self.large_document_every - 1:
+                pages = 45
+            row = {
+                "DocumentId": doc_id,
+                "DocType": rng.choice(DOC_TYPES),
+                "InstrumentNumber": f"{recorded.year}{rng.randrange(10 ** 6):06d}",
+                "Book": str(rng.randrange(1000, 9999)),
+                "Page": str(rng.randrange(1, 999)),
+                "RecordedDate": recorded.strftime("%m/%d/%Y"),
+                "FirstParty": "OWNER OF RECORD" if "|" in subject else subject.upper(),
+                "SecondParty": f"PARTY {rng.randrange(1000)}",
+                "Town": town or rng.choice(TOWNS),
+                "PageCount": pages,
+            }
+            self.documents[doc_id] = row
+            rows.append(row)
+        rows.sort(key=lambda r: _parse_date(r["RecordedDate"], FIRST_RECORD_DATE))
+        return rows
+
+    def search(self, criteria):
+        town = (criteria.get("searchCommonTown") or "").upper()
+        lot, block = criteria.get("searchLot"), criteria.get("searchBlock")
+        if lot and block:
+            subject = f"{town}|{lot}|{block}"
+        else:
+            subject = (criteria.get("searchPartyName") or criteria.get("searchTerm") or "").strip()
+        if not subject:
+            return []
+
+        from_date = _parse_date(criteria.get("fromDate"), FIRST_RECORD_DATE)
+        to_date = _parse_date(criteria.get("toDate"), datetime.today())
+        return [
+            r for r in self.for_subject(subject, town)
+            if from_date <= _parse_date(r["RecordedDate"], from_date) <= to_date
+        ]
+
+
+# ======================================================
+# APP
+# ======================================================
+def create_mock_app(generation_delay_ms=3000, api_latency_ms=100, result_cap=100, records=None):
+    """
+    generation_delay_ms is the server-side "PDF / Print All Pages" time (the
+    live sites take ~35s); result_cap is where the Notice modal kicks in.
+    """
+    app = Flask(__name__)
+    records = records or MockRecords()
+    all_types = ",".join(DOC_TYPES)
+
+    def latency():
+        time.sleep(api_latency_ms / 1000.0)
+
+    @app.route("/")
+    def index():
+        return PAGE.replace("__ALL_TYPES__", json.dumps(all_types))
+
+    @app.route("/api/towns")
+    def towns():
+        latency()
+        return jsonify(TOWNS)
+
+    @app.route("/api/search", methods=["POST"])
+    def search():
+        latency()
+        rows = records.search(request.get_json() or {})
+        return jsonify({"TotalCount": len(rows), "Rows": rows[:result_cap]})
+
+    @app.route("/api/document/<doc_id>")
+    def document(doc_id):
+        latency()
+        doc = records.documents.get(doc_id)
+        if not doc:
+            return jsonify({"error": "not found"}), 404
+        return jsonify(doc)
+
+    @app.route("/api/document/<doc_id>/pdf")
+    def document_pdf(doc_id):
+        time.sleep(generation_delay_ms / 1000.0)
+        return Response(PLACEHOLDER_PDF, mimetype="application/pdf")
+
+    return app
+
+
+if __name__ == "__main__":
+    server, base_url = serve(create_mock_app(), port=5055)
+    print(f"Mock BrowserView running at {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
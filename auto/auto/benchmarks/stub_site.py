@@ -0,0 +1,149 @@
+"""
+Minimal local stand-in for a BrowserView site, used by the benchmarks.
+
+The page fakes just enough of Angular for services.wait_service to probe:
+an injector whose $http.pendingRequests grows while a simulated XHR is in
+flight, the 'ajax-loader' spinner, and a DOM update when the XHR lands.
+
+The /api routes serve recorded search JSON and a placeholder PDF so
+services.http_search_service can run end to end without a county site.
+"""
+import json
+import os
+import threading
+import time
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Smallest valid single-page PDF, served for every document
+PLACEHOLDER_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+PAGE = """<!doctype html>
+<html>
+<head><title>Stub BrowserView</title></head>
+<body ng-app="stub">
+<script>
+  (function() {
+    var pending = [];
+    var injector = { get: function(name) { return { pendingRequests: pending }; } };
+    window.angular = {
+      element: function() { return { injector: function() { return injector; } }; },
+      _pending: pending
+    };
+  })();
+
+  function fakeRequest(delayMs) {
+    var req = {};
+    angular._pending.push(req);
+    document.getElementById('loader').style.display = 'block';
+    fetch('/api/slow?delay=' + delayMs)
+      .then(function(r) { return r.json(); })
+      .then(function(data) {
+        angular._pending.splice(angular._pending.indexOf(req), 1);
+        document.getElementById('loader').style.display = 'none';
+        document.getElementById('out').innerText = data.rows + ' rows';
+      });
+  }
+</script>
+<div id="loader" class="ajax-loader" style="display:none">Loading...</div>
+<button id="trigger" onclick="fakeRequest(%(delay)d)">Search</button>
+<div id="out"></div>
+<script>fakeRequest(%(delay)d);</script>
+</body>
+</html>
+"""
+
+
+# Town/Lot/Block form with a township dropdown filled in after a short delay,
+# like BrowserView does once its municipality list XHR returns
+TOWNSHIP_PAGE = """<!doctype html>
+<html>
+<head><title>Stub BrowserView - Town/Lot/Block</title></head>
+<body>
+<select ng-model="documentService.SearchCriteria.searchCommonTown"><option value="">-- Select --</option></select>
+<script>
+  setTimeout(function() {
+    var sel = document.querySelector('select');
+    var towns = %(towns)s;
+    towns.forEach(function(t) {
+      var o = document.createElement('option');
+      o.value = t.toUpperCase();
+      o.text = t;
+      sel.appendChild(o);
+    });
+  }, %(delay)d);
+</script>
+</body>
+</html>
+"""
+
+
+def township_names(count):
+    return [f"Township {i:03d}" for i in range(count)]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def create_app(api_latency_ms=0, failing_documents=()):
+    """failing_documents: document ids whose PDF answers HTTP 500."""
+    app = Flask(__name__)
+    search_response = load_fixture("search_response.json")
+
+    @app.route("/")
+    def index():
+        delay = int(request.args.get("delay", "500"))
+        return PAGE % {"delay": delay}
+
+    @app.route("/township")
+    def township():
+        count = int(request.args.get("count", "70"))
+        delay = int(request.args.get("delay", "200"))
+        return TOWNSHIP_PAGE % {"towns": json.dumps(township_names(count)), "delay": delay}
+
+    @app.route("/api/slow")
+    def slow():
+        delay = int(request.args.get("delay", "500"))
+        time.sleep(delay / 1000.0)
+        return jsonify({"rows": 25})
+
+    @app.route("/api/search", methods=["POST"])
+    def api_search():
+        time.sleep(api_latency_ms / 1000.0)
+        criteria = request.get_json() or {}
+        party = (criteria.get("searchPartyName") or "").upper()
+        rows = search_response["Rows"]
+        if party:
+            rows = [r for r in rows if party in r["FirstParty"] or party in r["SecondParty"]]
+        return jsonify({"TotalCount": len(rows), "Rows": rows})
+
+    @app.route("/api/document/<doc_id>/pdf")
+    def api_document_pdf(doc_id):
+        time.sleep(api_latency_ms / 1000.0)
+        if doc_id in failing_documents:
+            return Response("render failed", status=500)
+        return Response(PLACEHOLDER_PDF, mimetype="application/pdf")
+
+    return app
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve(app=None, port=0):
+    """Start the app on a background thread. Returns (server, base_url)."""
+    server = make_server("127.0.0.1", port, app or create_app(), threaded=True,
+                         request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+from services.job_service import job_queue
+
+job_bp = Blueprint('job_bp', __name__)
+
+@job_bp.route("/jobs", methods=["GET"])
+def list_jobs():
+    status = request.args.get("status")
+    try:
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    return jsonify({"jobs": job_queue.list(status, limit)})
+
+@job_bp.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    return jsonify(job)
+
+@job_bp.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = job_queue.get(job_id, include_result=True)
+    if not job:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    if job["status"] in ("queued", "running"):
+        return jsonify({"status": job["status"].upper(), "progress": job["progress"]}), 202
+    if job["result"] is None:
+        return jsonify({"status": "ERROR", "message": job.get("error", "Job failed")}), 500
+    # Same body and status code the synchronous endpoint would have returned
+    return jsonify(job["result"]), job["http_status"]
@@ -0,0 +1,14 @@
+from flask import Blueprint, jsonify
+from services.driver_service import browser_pool
+from services.job_service import job_queue
+from services.extraction_pool import extraction_pool
+
+stats_bp = Blueprint('stats_bp', __name__)
+
+@stats_bp.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({
+        "browser_pool": browser_pool.stats(),
+        "jobs": job_queue.counts(),
+        "extraction_pool": extraction_pool.stats()
+    })
@@ -1,4 +1,5 @@
-from app import app
+from app import app, warm_up
 
 if __name__ == "__main__":
+    warm_up(debug=True)
     app.run(debug=True, port=5001)
@@ -0,0 +1,71 @@
+import base64
+import os
+import uuid
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Read document blobs out of the page instead of going through Chrome's download manager
+BLOB_FETCH = os.getenv("BLOB_FETCH", "1") == "1"
+BLOB_CHUNK_SIZE = int(os.getenv("BLOB_CHUNK_SIZE", str(4 * 1024 * 1024)))
+
+_LOAD_BLOB_JS = """
+var url = arguments[0], key = arguments[1], done = arguments[arguments.length - 1];
+fetch(url).then(function(r) { return r.blob(); }).then(function(blob) {
+    window.__blobReads = window.__blobReads || {};
+    window.__blobReads[key] = blob;
+    done({size: blob.size, type: blob.type});
+}).catch(function(e) { done({error: String(e)}); });
+"""
+
+_READ_CHUNK_JS = """
+var blob = window.__blobReads[arguments[0]], done = arguments[arguments.length - 1];
+var reader = new FileReader();
+reader.onload = function() { done(reader.result.substring(reader.result.indexOf(',') + 1)); };
+reader.onerror = function() { done({error: String(reader.error)}); };
+reader.readAsDataURL(blob.slice(arguments[1], arguments[2]));
+"""
+
+_RELEASE_BLOB_JS = "if (window.__blobReads) { delete window.__blobReads[arguments[0]]; }"
+
+
+class BlobFetchError(Exception):
+    pass
+
+
+def fetch_blob(driver, blob_url, final_path, chunk_size=None):
+    """
+    Copy a page's blob: URL to final_path, base64 chunk by chunk through
+    execute_async_script. Written to a .part file and moved into place, so
+    the final name never holds a partial document.
+    """
+    chunk_size = chunk_size or BLOB_CHUNK_SIZE
+    key = uuid.uuid4().hex
+    tmp_path = final_path + ".part"
+
+    info = driver.execute_async_script(_LOAD_BLOB_JS, blob_url, key)
+    if not info or "error" in info:
+        raise BlobFetchError(f"Could not load {blob_url}: {info and info.get('error')}")
+
+    try:
+        size = int(info["size"])
+        with open(tmp_path, "wb") as f:
+            for start in range(0, size, chunk_size):
+                chunk = driver.execute_async_script(_READ_CHUNK_JS, key, start, min(start + chunk_size, size))
+                if not isinstance(chunk, str):
+                    raise BlobFetchError(f"Could not read {blob_url}: {chunk and chunk.get('error')}")
+                f.write(base64.b64decode(chunk))
+        if os.path.getsize(tmp_path) != size:
+            raise BlobFetchError(f"Short read from {blob_url}")
+        os.replace(tmp_path, final_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        try:
+            driver.execute_script(_RELEASE_BLOB_JS, key)
+        except Exception:
+            pass
+
+    return final_path
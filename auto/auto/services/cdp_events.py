@@ -0,0 +1,164 @@
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+
+from services.driver_service import DOWNLOAD_EVENTS
+from utils.helpers import wait_for_new_pdf
+
+# ======================================================
+# CONFIG
+# ======================================================
+DOWNLOAD_TIMEOUT = float(os.getenv("DOWNLOAD_TIMEOUT", "60"))
+CDP_POLL = 0.1
+# Downloads nobody waited for are forgotten once this long without an event
+DOWNLOAD_EVENT_TTL = DOWNLOAD_TIMEOUT * 2
+
+
+# ======================================================
+# EVENT PUMP
+# ======================================================
+class CdpEventPump:
+    """
+    Drains a driver's performance log (the DevTools events ChromeDriver
+    records) and keeps download state keyed by download GUID.
+
+    ChromeDriver only forwards Page/Network domain events into that log, so
+    the Page.download* twins of Browser.downloadWillBegin/downloadProgress
+    are what normally arrive; both spellings are handled. A download is
+    dropped once a waiter consumes it or after DOWNLOAD_EVENT_TTL without
+    events, so a long-lived session does not accumulate them.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._lock = threading.Lock()
+        self._downloads = {}
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(method, params) for every event drained from the log."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def poll(self):
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            self._dispatch(message.get("method", ""), message.get("params", {}))
+
+    def _dispatch(self, method, params):
+        now = time.time()
+        with self._lock:
+            if method.endswith(".downloadWillBegin"):
+                self._downloads[params["guid"]] = {
+                    "url": params.get("url"),
+                    "suggested_filename": params.get("suggestedFilename"),
+                    "state": "inProgress",
+                    "file_path": None,
+                    "updated_at": now,
+                }
+            elif method.endswith(".downloadProgress"):
+                download = self._downloads.setdefault(params["guid"], {"state": "inProgress", "file_path": None})
+                download["state"] = params.get("state", download["state"])
+                download["updated_at"] = now
+                if params.get("filePath"):
+                    download["file_path"] = params["filePath"]
+            if method.endswith((".downloadWillBegin", ".downloadProgress")):
+                self._prune(now)
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(method, params)
+            except Exception as e:
+                print(f"CDP event listener failed on {method}: {e}")
+
+    def _prune(self, now):
+        # Caller holds self._lock
+        stale = [guid for guid, download in self._downloads.items()
+                 if now - download["updated_at"] > DOWNLOAD_EVENT_TTL]
+        for guid in stale:
+            del self._downloads[guid]
+
+    def known_downloads(self):
+        self.poll()
+        with self._lock:
+            return set(self._downloads)
+
+    def wait_for_download(self, download_dir, known, timeout=None):
+        """
+        Block until a download that is not in `known` completes and return
+        its exact path. When Chrome reports no filePath the file is named
+        after its GUID under allowAndName (DOWNLOAD_EVENTS), otherwise after
+        its suggestedFilename.
+        """
+        timeout = DOWNLOAD_TIMEOUT if timeout is None else timeout
+        end = time.time() + timeout
+        while time.time() < end:
+            self.poll()
+            with self._lock:
+                for guid, download in self._downloads.items():
+                    if guid in known:
+                        continue
+                    if download["state"] == "completed":
+                        del self._downloads[guid]
+                        return download["file_path"] or os.path.join(download_dir, _saved_name(guid, download))
+                    if download["state"] == "canceled":
+                        del self._downloads[guid]
+                        raise RuntimeError(f"Download canceled: {download.get('url')}")
+            time.sleep(CDP_POLL)
+        raise TimeoutError("PDF download timeout")
+
+
+def _saved_name(guid, download):
+    if DOWNLOAD_EVENTS or not download.get("suggested_filename"):
+        return guid
+    return download["suggested_filename"]
+
+
+_pumps = weakref.WeakKeyDictionary()
+_pumps_lock = threading.Lock()
+
+
+def get_event_pump(driver):
+    with _pumps_lock:
+        pump = _pumps.get(driver)
+        if pump is None:
+            pump = _pumps[driver] = CdpEventPump(driver)
+        return pump
+
+
+# ======================================================
+# DOWNLOADS
+# ======================================================
+def start_download_watch(driver, download_dir):
+    """
+    Snapshot taken just before clicking a download link; pass it to
+    wait_for_download. Falls back to a directory snapshot when download
+    events are disabled.
+    """
+    if DOWNLOAD_EVENTS:
+        return get_event_pump(driver).known_downloads()
+    return set(glob.glob(os.path.join(download_dir, "*.pdf")))
+
+
+def wait_for_download(driver, download_dir, watch, timeout=None):
+    """
+    Return the path of the file downloaded since start_download_watch.
+    """
+    if DOWNLOAD_EVENTS:
+        return get_event_pump(driver).wait_for_download(download_dir, watch, timeout)
+    return wait_for_new_pdf(download_dir, watch, DOWNLOAD_TIMEOUT if timeout is None else timeout)
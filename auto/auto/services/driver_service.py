@@ -1,7 +1,43 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from services.metrics import browser_launch_seconds
+from services.profiler import instrument_driver
+
+# ======================================================
+# CONFIG
+# ======================================================
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+MAX_USES_PER_SESSION = int(os.getenv("BROWSER_MAX_USES", "25"))
+LEASE_TIMEOUT = float(os.getenv("BROWSER_LEASE_TIMEOUT", "600"))
+# Track downloads through DevTools download events instead of polling the folder
+DOWNLOAD_EVENTS = os.getenv("DOWNLOAD_EVENTS", "1") == "1"
+# Read search results from the XHR responses instead of each row's Details view
+NETWORK_CAPTURE = os.getenv("NETWORK_CAPTURE", "1") == "1"
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def get_driver_path():
+    """
+    Resolve the chromedriver binary once per process.
+    ChromeDriverManager().install() hits the network/cache on every call.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
 def start_browser(download_dir):
     options = webdriver.ChromeOptions()
     options.add_argument("--start-maximized")
@@ -14,8 +50,256 @@ def start_browser(download_dir):
         "plugins.always_open_pdf_externally": True
     }
     options.add_experimental_option("prefs", prefs)
+    if DOWNLOAD_EVENTS or NETWORK_CAPTURE:
+        # Exposes DevTools events through driver.get_log("performance")
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": True})
 
-    return webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
+    # Commands are timed into the active run profile (services.profiler)
+    return instrument_driver(webdriver.Chrome(
+        service=Service(get_driver_path()),
         options=options
-    )
+    ))
+
+
+def set_download_dir(driver, download_dir):
+    """
+    Retarget where Chrome saves downloads for an already running session.
+    With DOWNLOAD_EVENTS each file is saved under its download GUID and
+    progress events are emitted, so the exact path is known on completion.
+    """
+    params = {"behavior": "allow", "downloadPath": download_dir}
+    if DOWNLOAD_EVENTS:
+        params = {"behavior": "allowAndName", "downloadPath": download_dir, "eventsEnabled": True}
+    try:
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", params)
+    except Exception:
+        # Older Chrome builds only expose the Page-level command
+        driver.execute_cdp_cmd("Page.setDownloadBehavior", params)
+
+
+# ======================================================
+# SESSION POOL
+# ======================================================
+class PooledSession:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+
+
+class BrowserPool:
+    """
+    Bounded pool of pre-launched Chrome sessions leased one request at a time.
+
+    Sessions are health-checked before every lease, retargeted to the
+    caller's download directory and recycled after MAX_USES_PER_SESSION
+    leases, when the lease ends with a WebDriverException, or when any other
+    exception leaves the session failing its health check. Ordinary errors
+    (an unknown township, bad input) hand the session back for reuse.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES_PER_SESSION):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self._cond = threading.Condition()
+        self._idle = []
+        self._total = 0  # idle + leased + launching
+        self._leased = 0
+        self._stats = {
+            "launches": 0,
+            "launch_seconds_total": 0.0,
+            "leases": 0,
+            "lease_wait_seconds_total": 0.0,
+            "lease_wait_seconds_max": 0.0,
+            "lease_timeouts": 0,
+            "recycled": {"max_uses": 0, "error": 0, "health_check": 0},
+        }
+
+    # ---------------- lifecycle ----------------
+    def _launch(self):
+        started = time.time()
+        driver = start_browser(os.getcwd())
+        elapsed = time.time() - started
+        browser_launch_seconds.observe(elapsed)
+        with self._cond:
+            self._stats["launches"] += 1
+            self._stats["launch_seconds_total"] += elapsed
+        print(f"[BrowserPool] Launched Chrome session in {elapsed:.1f}s")
+        return PooledSession(driver)
+
+    def _discard(self, session, reason):
+        with self._cond:
+            self._stats["recycled"][reason] += 1
+        try:
+            session.driver.quit()
+        except Exception as e:
+            print(f"[BrowserPool] Error quitting recycled session: {e}")
+
+    def _replenish(self):
+        """Launch one session in the background to keep the pool warm."""
+        def worker():
+            try:
+                session = self._launch()
+            except Exception as e:
+                print(f"[BrowserPool] Failed to launch replacement session: {e}")
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                return
+            with self._cond:
+                self._idle.append(session)
+                self._cond.notify()
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def warm(self):
+        """Pre-launch sessions in the background until the pool is full."""
+        with self._cond:
+            missing = self.size - self._total
+            self._total += max(0, missing)
+        for _ in range(max(0, missing)):
+            self._replenish()
+
+    def _is_healthy(self, session):
+        try:
+            handles = session.driver.window_handles
+            if not handles:
+                return False
+            # Drop any popups left behind by the previous lease
+            for handle in handles[1:]:
+                session.driver.switch_to.window(handle)
+                session.driver.close()
+            session.driver.switch_to.window(handles[0])
+            return session.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    # ---------------- leasing ----------------
+    def _acquire(self, timeout):
+        started = time.time()
+        deadline = started + timeout
+        launch = False
+        with self._cond:
+            while not self._idle and self._total >= self.size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._stats["lease_timeouts"] += 1
+                    raise TimeoutError("Timed out waiting for a free browser session")
+                self._cond.wait(remaining)
+            if self._idle:
+                session = self._idle.pop()
+            else:
+                self._total += 1
+                launch = True
+            self._leased += 1
+
+        if launch:
+            try:
+                session = self._launch()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._leased -= 1
+                    self._cond.notify()
+                raise
+
+        waited = time.time() - started
+        with self._cond:
+            self._stats["leases"] += 1
+            self._stats["lease_wait_seconds_total"] += waited
+            self._stats["lease_wait_seconds_max"] = max(self._stats["lease_wait_seconds_max"], waited)
+        return session
+
+    def _release(self, session, failed):
+        recycle_reason = None
+        if failed:
+            recycle_reason = "error"
+        elif session.uses >= self.max_uses:
+            recycle_reason = "max_uses"
+
+        if recycle_reason:
+            self._discard(session, recycle_reason)
+            with self._cond:
+                self._leased -= 1
+            self._replenish()
+            return
+
+        try:
+            session.driver.get("about:blank")
+        except Exception:
+            self._discard(session, "error")
+            with self._cond:
+                self._leased -= 1
+            self._replenish()
+            return
+
+        with self._cond:
+            self._leased -= 1
+            self._idle.append(session)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, download_dir, timeout=None):
+        """
+        Lease a healthy driver whose downloads land in download_dir.
+        The session goes back to the pool when the block exits.
+        """
+        timeout = LEASE_TIMEOUT if timeout is None else timeout
+        while True:
+            session = self._acquire(timeout)
+            if self._is_healthy(session):
+                break
+            print("[BrowserPool] Session failed health check, recycling.")
+            self._discard(session, "health_check")
+            with self._cond:
+                self._leased -= 1
+                self._total -= 1
+                self._cond.notify()
+
+        failed = False
+        try:
+            set_download_dir(session.driver, download_dir)
+            session.uses += 1
+            yield session.driver
+        except WebDriverException:
+            failed = True
+            raise
+        except BaseException:
+            failed = not self._is_healthy(session)
+            raise
+        finally:
+            self._release(session, failed)
+
+    def stats(self):
+        with self._cond:
+            leases = self._stats["leases"]
+            launches = self._stats["launches"]
+            return {
+                "pool_size": self.size,
+                "max_uses_per_session": self.max_uses,
+                "sessions_open": self._total,
+                "sessions_idle": len(self._idle),
+                "sessions_leased": self._leased,
+                "launches": launches,
+                "avg_launch_seconds": round(self._stats["launch_seconds_total"] / launches, 3) if launches else 0.0,
+                "leases": leases,
+                "avg_lease_wait_seconds": round(self._stats["lease_wait_seconds_total"] / leases, 3) if leases else 0.0,
+                "max_lease_wait_seconds": round(self._stats["lease_wait_seconds_max"], 3),
+                "lease_timeouts": self._stats["lease_timeouts"],
+                "recycled": dict(self._stats["recycled"]),
+            }
+
+    def shutdown(self):
+        with self._cond:
+            sessions, self._idle = self._idle, []
+            self._total -= len(sessions)
+        for session in sessions:
+            try:
+                session.driver.quit()
+            except Exception:
+                pass
+
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.shutdown)
@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Run the OCR of /extract_by_file_number pages (Tesseract and TrOCR) in
+# separate worker processes so it never competes with the scrapers for the
+# server's CPU and memory. EXTRACTION_POOL=0 runs it inline as before.
+EXTRACTION_POOL = os.getenv("EXTRACTION_POOL", "1") == "1"
+# 0 = one per CPU, further capped by the memory budget below
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0"))
+# Files of one request rendered and fed to the pool at the same time
+EXTRACTION_FILE_CONCURRENCY = int(os.getenv("EXTRACTION_FILE_CONCURRENCY", "4"))
+# Resident size of a worker with TrOCR loaded, plus page images in flight
+EXTRACTION_WORKER_MEMORY_MB = int(os.getenv("EXTRACTION_WORKER_MEMORY_MB", "1200"))
+# Memory left for the server, the browsers and the OS
+EXTRACTION_MEMORY_RESERVE_MB = int(os.getenv("EXTRACTION_MEMORY_RESERVE_MB", "1024"))
+# Recycle workers now and then; native OCR libraries leak a little per page
+EXTRACTION_MAX_TASKS_PER_WORKER = int(os.getenv("EXTRACTION_MAX_TASKS_PER_WORKER", "200"))
+EXTRACTION_TIMEOUT = int(os.getenv("EXTRACTION_TIMEOUT", "900"))
+
+
+def available_memory_mb():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except Exception:
+        pass
+    return None
+
+
+def pool_size(requested=EXTRACTION_WORKERS):
+    """Workers to start: requested (or one per CPU), bounded by free memory."""
+    size = requested if requested > 0 else (os.cpu_count() or 1)
+    available = available_memory_mb()
+    if available is not None:
+        budget = (available - EXTRACTION_MEMORY_RESERVE_MB) // max(1, EXTRACTION_WORKER_MEMORY_MB)
+        size = min(size, budget)
+    return max(1, size)
+
+
+# ======================================================
+# WORKER SIDE
+# ======================================================
+def _init_worker():
+    # Load the handwriting model once per worker instead of once per document
+    from services.ocr_service import get_trocr
+
+    try:
+        get_trocr()
+    except Exception as e:
+        print(f"Extraction worker {os.getpid()} could not preload TrOCR: {e}")
+
+
+def _ping():
+    return os.getpid()
+
+
+# ======================================================
+# POOL
+# ======================================================
+class ExtractionPool:
+    """
+    Process pool for OCR. process_pdf submits every page of a document as
+    its own task and waits on the futures; the executor's call queue is the
+    local work queue, so the pages of one long deed spread over all workers
+    and pages from concurrent files and requests run in arrival order.
+
+    Only OCR moves here. Rendering already runs in pdftoppm processes and
+    the OpenAI call is a network wait; both leave the request thread's GIL
+    free. Keeping process_pdf itself in that thread is also what lets lazy
+    OCR stop submitting pages once the fields are found, and a whole-document
+    task would pin a long deed to one worker.
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+        self._executor = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.restarts = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.size is None:
+                    self.size = pool_size()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    # spawn: never fork a process that holds Selenium threads and sockets
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    max_tasks_per_child=EXTRACTION_MAX_TASKS_PER_WORKER,
+                )
+                print(f"Started extraction pool with {self.size} worker(s)")
+            return self._executor
+
+    def _restart(self, broken):
+        # Only the first caller to notice replaces it; others reuse the new pool
+        with self._lock:
+            if self._executor is broken:
+                print("Extraction pool broke (a worker died); starting a new one.")
+                self._executor = None
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args):
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._restart(executor)
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+        future.executor = executor
+        future.task = (fn, args)
+        self.submitted += 1
+        return future
+
+    def result(self, future):
+        """
+        Wait for a submitted task. If its worker died, retry it once on a
+        fresh pool so one crashing page does not fail every other file.
+        """
+        try:
+            return future.result(timeout=EXTRACTION_TIMEOUT)
+        except BrokenProcessPool:
+            self._restart(future.executor)
+            fn, args = future.task
+            return self.submit(fn, *args).result(timeout=EXTRACTION_TIMEOUT)
+
+    def warm(self):
+        """Start every worker now so the first request does not wait for TrOCR."""
+        executor = self._get_executor()
+        for future in [executor.submit(_ping) for _ in range(self.size)]:
+            try:
+                future.result(timeout=EXTRACTION_TIMEOUT)
+            except Exception as e:
+                print(f"Extraction pool warm-up failed: {e}")
+                break
+
+    def stats(self):
+        return {
+            "enabled": EXTRACTION_POOL,
+            "size": self.size,
+            "started": self._executor is not None,
+            "submitted": self.submitted,
+            "restarts": self.restarts,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+extraction_pool = ExtractionPool()
@@ -0,0 +1,705 @@
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from services.metrics import ocr_pages_total, ocr_page_seconds, llm_call_seconds, extraction_pages_total
+from services.ocr_service import (
+    printed_ocr_from_array, handwritten_ocr_from_array, get_openai_client,
+    LLM_MODEL, TESSERACT_CONFIG, OCR_SCALE, TROCR_MODEL
+)
+from services.ocr_cache import OCR_CACHE, document_key, lookup_pages, store_pages
+from utils.helpers import file_sha256
+
+# ======================================================
+# CONFIG
+# ======================================================
+RENDER_DPI = 200
+# Pages per pdftoppm run; rendering streams a window at a time instead of the whole file
+RENDER_WINDOW = int(os.getenv("EXTRACTION_RENDER_WINDOW", "4"))
+# Rendered pages per document held in memory or queued for OCR at once
+PAGES_IN_FLIGHT = int(os.getenv("EXTRACTION_PAGES_IN_FLIGHT", "8"))
+# Read a page's embedded text instead of rasterizing it when the text is usable
+TEXT_LAYER = os.getenv("EXTRACTION_TEXT_LAYER", "1") == "1"
+# Same bar as the printed-OCR fallback: less than this is treated as no text
+TEXT_LAYER_MIN_CHARS = int(os.getenv("EXTRACTION_TEXT_LAYER_MIN_CHARS", "50"))
+# Printed OCR shorter than this is retried as handwriting
+HANDWRITTEN_FALLBACK_CHARS = 50
+# Document text sent to the LLM
+PROMPT_TEXT_CHARS = 8000
+# OCR pages only until the prompt is full and the regex fallbacks have what
+# they need; read further only for fields that are still incomplete. The
+# DOCUMENT_TYPE hint is then detected on the pages read for the prompt, so a
+# keyword that only appears later (e.g. a "notice" on the last page of a
+# deed) no longer decides it.
+LAZY_OCR = os.getenv("EXTRACTION_LAZY_OCR", "1") == "1"
+# Pages read past the prompt looking for regex fields the model left empty;
+# many documents never carry a consideration or book/page at all
+LAZY_REGEX_PAGES = int(os.getenv("EXTRACTION_LAZY_REGEX_PAGES", "2"))
+# Everything that changes a page's OCR text; part of the OCR cache key
+OCR_SETTINGS = (f"dpi={RENDER_DPI};render=gray;tesseract={TESSERACT_CONFIG};scale={OCR_SCALE};"
+                f"trocr={TROCR_MODEL};handwritten_below={HANDWRITTEN_FALLBACK_CHARS}")
+
+
+# ======================================================
+# FIELD HELPERS
+# ======================================================
+def regex_extract(text):
+    result = {}
+    
+    # Expanded Instrument Number Patterns
+    instrument_patterns = [
+        r"\bInstrument\s+(?:Number|No\.?|#)\s*[:#-]?\s*([A-Z0-9-]{4,})",
+        r"\bDocument\s+(?:Number|No\.?|#)\s*[:#-]?\s*([A-Z0-9-]{4,})",
+        r"\bDoc\s+(?:Number|No\.?|#)\s*[:#-]?\s*([A-Z0-9-]{4,})",
+        r"\bInst\.?\s*#?\s*([A-Z0-9-]{4,})",
+        r"\bDoc\.?\s*No\.?\s*([A-Z0-9-]{4,})",
+        r"\bRecording\s+Number\s*[:#-]?\s*([A-Z0-9-]{4,})",
+    ]
+    for pattern in instrument_patterns:
+        m = re.search(pattern, text, re.I)
+        if m:
+            candidate = m.group(1).strip()
+            if re.search(r"\d", candidate):
+                result["INSTRUMENT_NUMBER"] = candidate
+            break
+    
+    # Consideration Amount
+    consideration_patterns = [
+        r"(?:Consideration|consideration)[:\s]+\$?\s*([\d,]+\.?\d{0,2})",
+        r"(?:for\s+(?:the\s+)?(?:sum|consideration)\s+of)[:\s]+\$?\s*([\d,]+\.?\d{0,2})",
+        r"(?:sum\s+of)[:\s]+\$?\s*([\d,]+\.?\d{0,2})",
+    ]
+    for pattern in consideration_patterns:
+        m = re.search(pattern, text, re.I)
+        if m:
+            result["CONSIDERATION_AMOUNT"] = "$" + m.group(1)
+            break
+    
+    # Recording Date
+    m = re.search(r"\b\d{1,2}/\d{1,2}/\d{4}\b", text, re.I)
+    if m:
+        result["RECORDING_DATE"] = m.group()
+    
+    # Book and Page together
+    book_page_pattern = r"\bBook\s*[:#]?\s*(\d+)\s*[,\s]*Page\s*[:#]?\s*(\d+)"
+    m = re.search(book_page_pattern, text, re.I)
+    if m:
+        result["BOOK"] = m.group(1)
+        result["PAGENO"] = m.group(2)
+    else:
+        # Try Book alone
+        m = re.search(r"\bBook\s*[:#]?\s*(\d+)", text, re.I)
+        if m:
+            result["BOOK"] = m.group(1)
+            book_pos = m.end()
+            page_search = text[book_pos:book_pos+50]
+            page_match = re.search(r"Page\s*[:#]?\s*(\d+)", page_search, re.I)
+            if page_match:
+                result["PAGENO"] = page_match.group(1)
+
+    return result
+
+def extract_json(text):
+    stack = []
+    start = None
+    for i, c in enumerate(text):
+        if c == "{":
+            if not stack:
+                start = i
+            stack.append(c)
+        elif c == "}":
+            if stack:
+                stack.pop()
+                if not stack:
+                    return text[start:i+1]
+    return None
+
+def detect_document_type(text):
+    lower = text.lower()
+    if "notice" in lower and "settlement" in lower:
+        return "NOTICE AND SETTLEMENT"
+    if "notice" in lower:
+        return "NOTICE"
+    if "settlement" in lower:
+        return "SETTLEMENT"
+    if "judgment" in lower:
+        return "JUDGMENT"
+    if "mortgage" in lower:
+        return "MORTGAGE"
+    if "deed" in lower:
+        return "DEED"
+    return "OTHER"
+
+
+REGEX_FIELDS = ("INSTRUMENT_NUMBER", "CONSIDERATION_AMOUNT", "RECORDING_DATE", "BOOK", "PAGENO")
+# Where a legal description starts, or a reference to one printed elsewhere
+LEGAL_DESCRIPTION_START = re.compile(
+    r"schedule\s+[\"']?a\b|exhibit\s+[\"']?a\b|legal\s+description|beginning\s+at|being\s+known\s+(?:and\s+designated\s+)?as",
+    re.I)
+LEGAL_DESCRIPTION_ELSEWHERE = re.compile(
+    r"\b(?:see|per|in|on|attached|annexed)\b.{0,20}\b(?:schedule|exhibit|rider)\b|\(?continued\b", re.I)
+
+
+def legal_description_incomplete(value, prompt_text, truncated):
+    """
+    Empty, pointing at a schedule/exhibit, or running into the end of the
+    text the model was given.
+    """
+    value = " ".join((value or "").split())
+    if not value or LEGAL_DESCRIPTION_ELSEWHERE.search(value):
+        return True
+    if truncated:
+        tail = value[-40:].lower()
+        return tail in " ".join(prompt_text[-400:].split()).lower()
+    return False
+
+
+# ======================================================
+# STATS
+# ======================================================
+def new_stats():
+    return {"page_seconds": [], "llm_seconds": [], "sources": {"text_layer": 0, "cache": 0, "ocr": 0, "skipped": 0}}
+
+
+def record_extraction_stats(stats):
+    """
+    Feed process_pdf timings into the metrics. Done by the caller so numbers
+    gathered in extraction worker processes reach this process's /metrics.
+    """
+    for seconds in stats.get("page_seconds", []):
+        ocr_page_seconds.observe(seconds)
+    if stats.get("page_seconds"):
+        ocr_pages_total.inc(len(stats["page_seconds"]))
+    for seconds in stats.get("llm_seconds", []):
+        llm_call_seconds.observe(seconds)
+    for source, count in stats.get("sources", {}).items():
+        if count:
+            extraction_pages_total.inc(count, source=source)
+
+
+# ======================================================
+# TEXT LAYER
+# ======================================================
+def usable_text(text, image_coverage=0.0):
+    """
+    Embedded text worth trusting: enough characters, mostly readable (broken
+    font encodings come out as symbol soup), and on a page that is mostly a
+    scan only when it is long enough to be a searchable-PDF text layer rather
+    than a recording stamp.
+    """
+    stripped = "".join(text.split())
+    min_chars = TEXT_LAYER_MIN_CHARS * (4 if image_coverage >= 0.5 else 1)
+    if len(stripped) < min_chars:
+        return False
+    readable = sum(1 for c in stripped if c.isalnum() or c in ".,;:'\"()-/$#&%")
+    return readable / len(stripped) >= 0.8
+
+
+def _image_coverage(page):
+    area = abs(page.rect) or 1
+    covered = 0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        covered += max(0, x1 - x0) * max(0, y1 - y0)
+    return min(1.0, covered / area)
+
+
+def text_layer(pdf_path):
+    """
+    Embedded text per page, "" where a page has to be OCR'd. None when the
+    file cannot be read this way, in which case every page is OCR'd.
+    """
+    try:
+        import pymupdf
+
+        with pymupdf.open(pdf_path) as doc:
+            texts = []
+            for page in doc:
+                text = page.get_text("text", sort=True)
+                texts.append(text if usable_text(text, _image_coverage(page)) else "")
+            return texts
+    except Exception as e:
+        print(f"Could not read text layer of {pdf_path}: {e}")
+        return None
+
+
+def page_count(pdf_path):
+    """Number of pages from PyMuPDF, or pdfinfo when it cannot open the file; None if neither can."""
+    try:
+        import pymupdf
+
+        with pymupdf.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception:
+        pass
+    try:
+        from pdf2image import pdfinfo_from_path
+
+        return pdfinfo_from_path(pdf_path)["Pages"]
+    except Exception as e:
+        print(f"Could not count pages of {pdf_path}: {e}")
+        return None
+
+
+# ======================================================
+# RENDERING
+# ======================================================
+def _page_windows(numbers, size):
+    """Contiguous runs of 1-based page numbers, at most `size` pages each."""
+    windows = []
+    for number in sorted(numbers):
+        if windows and number == windows[-1][1] + 1 and number - windows[-1][0] < size:
+            windows[-1][1] = number
+        else:
+            windows.append([number, number])
+    return windows
+
+
+def render_pages(pdf_path, numbers, tmpdir):
+    """
+    Yield (page number, grayscale image) for the given 1-based pages, one
+    pdftoppm run per RENDER_WINDOW pages. Images are backed by files in
+    tmpdir and only read when used, so memory does not grow with the page
+    count. numbers=None renders the whole document.
+    """
+    from pdf2image import convert_from_path, pdfinfo_from_path
+
+    if numbers is None:
+        numbers = range(1, pdfinfo_from_path(pdf_path)["Pages"] + 1)
+    for first, last in _page_windows(numbers, max(1, RENDER_WINDOW)):
+        images = convert_from_path(pdf_path, dpi=RENDER_DPI, output_folder=tmpdir,
+                                   first_page=first, last_page=last, grayscale=True)
+        for number, image in zip(range(first, last + 1), images):
+            yield number, image
+
+
+def prefetch(items, depth):
+    """
+    Iterate `items` on a background thread, at most `depth` ahead of the
+    consumer, so rendering the next pages overlaps OCR of the current one.
+    Closing the returned generator early stops the producer.
+    """
+    buffer = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in items:
+                while not stop.is_set():
+                    try:
+                        buffer.put(("item", item), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+            buffer.put(("done", done))
+        except Exception as e:
+            buffer.put(("error", e))
+
+    producer = threading.Thread(target=produce, name="page-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, value = buffer.get()
+            if kind == "error":
+                raise value
+            if kind == "done":
+                return
+            yield value
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue, then let it finish its window
+        while producer.is_alive():
+            try:
+                buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        producer.join()
+
+
+def _discard(page):
+    page.close()
+    filename = getattr(page, "filename", None)
+    if filename:
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+
+# ======================================================
+# PAGE OCR
+# ======================================================
+def page_buffer(page):
+    """Grayscale bytes and size of a rendered page, a third of the RGB size to ship to a worker."""
+    if page.mode == "L":
+        return page.tobytes(), page.size
+    gray = page.convert("L")
+    try:
+        return gray.tobytes(), gray.size
+    finally:
+        gray.close()
+
+
+def ocr_page(buffer, size):
+    """OCR one grayscale page buffer. Returns (text, seconds); runs in extraction workers."""
+    import numpy as np
+
+    started = time.time()
+    width, height = size
+    img_array = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width)
+    text = printed_ocr_from_array(img_array)
+    if len(text.strip()) < HANDWRITTEN_FALLBACK_CHARS:
+        text += handwritten_ocr_from_array(img_array)
+    return text, time.time() - started
+
+
+class InlineRunner:
+    """Runs page OCR in the calling thread; same submit/result interface as ExtractionPool."""
+
+    # Nothing runs ahead of the reader, so a lazy read never OCRs a page it does not use
+    lookahead = 1
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def result(self, future):
+        return future.result()
+
+
+inline_runner = InlineRunner()
+
+
+def iter_ocr_pages(pdf_path, numbers, runner, stats):
+    """
+    OCR the given 1-based pages (None = all), yielding (page number, text)
+    in page order. Pages stream through: the next window renders on a thread
+    while earlier pages are OCR'd, at most PAGES_IN_FLIGHT pages (one when
+    OCR runs inline) are queued ahead of the reader, and each page image is
+    dropped as soon as its buffer is sent. Closing the generator early
+    cancels queued pages that have not started.
+    """
+    lookahead = max(1, getattr(runner, "lookahead", PAGES_IN_FLIGHT))
+
+    def collect(number, future):
+        text, seconds = runner.result(future)
+        stats["page_seconds"].append(seconds)
+        stats["sources"]["ocr"] += 1
+        return number, text
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pending = deque()
+        pages = prefetch(render_pages(pdf_path, numbers, tmpdir), RENDER_WINDOW)
+        try:
+            for number, page in pages:
+                try:
+                    pending.append((number, runner.submit(ocr_page, *page_buffer(page))))
+                finally:
+                    _discard(page)
+                while len(pending) >= lookahead:
+                    yield collect(*pending.popleft())
+            while pending:
+                yield collect(*pending.popleft())
+        finally:
+            pages.close()
+            for number, future in pending:
+                future.cancel()
+
+
+def ocr_pages(pdf_path, numbers, runner, stats):
+    """{page number: text} for the given pages (None = all)."""
+    return dict(iter_ocr_pages(pdf_path, numbers, runner, stats))
+
+
+class DocumentText:
+    """
+    A document's page texts read in page order on demand. Pages already
+    known (text layer, OCR cache) cost nothing; the rest are pulled from an
+    iter_ocr_pages stream only as far as the reader gets. ocr_numbers are
+    the pages the stream yields (None = every page); a page that yields no
+    text is skipped rather than ending the document.
+    """
+
+    def __init__(self, known, ocr_stream=None, ocr_numbers=None):
+        self.pages = dict(known)
+        self.fresh = {}
+        self.read_through = 0
+        self.finished = False
+        self._stream = ocr_stream
+        self._stream_at = 0
+        self._pending = None if ocr_numbers is None else set(ocr_numbers)
+
+    def _expects(self, number):
+        # The stream yields in page order, so a page it has passed is not coming
+        return (self._stream is not None and number > self._stream_at
+                and (self._pending is None or number in self._pending))
+
+    def _more_after(self, number):
+        if any(n > number for n in self.pages):
+            return True
+        return self._stream is not None and (self._pending is None or any(n > number for n in self._pending))
+
+    def _next_page(self):
+        number = self.read_through + 1
+        while number not in self.pages:
+            if self._expects(number):
+                try:
+                    got, text = next(self._stream)
+                except StopIteration:
+                    self._stream = None
+                    continue
+                self._stream_at = got
+                self.pages[got] = self.fresh[got] = text
+            elif self._more_after(number):
+                print(f"No text for page {number}, skipping it.")
+                number += 1
+            else:
+                self.finished = True
+                return False
+        self.read_through = number
+        return True
+
+    def text(self):
+        return "".join(self.pages[number] for number in sorted(self.pages) if number <= self.read_through)
+
+    def read_until(self, enough, max_pages=None):
+        """
+        Read pages until enough(text so far) is true or the document ends,
+        or after max_pages more pages when given.
+        """
+        read = 0
+        while not self.finished and not enough(self.text()):
+            if max_pages is not None and read >= max_pages:
+                break
+            if self._next_page():
+                read += 1
+        return self.text()
+
+    def read_all(self):
+        return self.read_until(lambda text: False)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+# ======================================================
+# CORE PROCESSING
+# ======================================================
+def _ask_llm(prompt, stats):
+    """Model reply text, or None (logged) when the call fails."""
+    try:
+        # Standardize on gpt-4o-mini for better reliability
+        started = time.time()
+        try:
+            response = get_openai_client().chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}]
+            )
+        finally:
+            stats["llm_seconds"].append(time.time() - started)
+        return response.choices[0].message.content
+    except Exception as e:
+        print(f"Extraction error: {e}")
+        return None
+
+
+def _complete_legal_description(all_text, prompt_text, description, stats):
+    """
+    Ask again for the legal description alone, on the part of the document
+    where it continues or is printed (e.g. a Schedule A past the prompt).
+    """
+    start = None
+    words = " ".join((description or "").split()).split()[:6]
+    if words and not LEGAL_DESCRIPTION_ELSEWHERE.search(" ".join(words)):
+        m = re.search(r"\s+".join(re.escape(w) for w in words), all_text, re.I)
+        if m:
+            start = m.start()
+    if start is None:
+        m = LEGAL_DESCRIPTION_START.search(all_text, len(prompt_text))
+        if not m:
+            return None
+        start = m.start()
+    if start + PROMPT_TEXT_CHARS <= len(prompt_text):
+        # Nothing the model has not already seen
+        return None
+
+    raw = _ask_llm(f"""
+Return ONLY valid JSON.
+
+Extract the COMPLETE legal description of the property exactly as it appears.
+
+{{
+ "LEGAL_DESCRIPTION": ""
+}}
+
+TEXT:
+{all_text[start:start + PROMPT_TEXT_CHARS]}
+""", stats)
+    clean = extract_json(raw or "")
+    if not clean:
+        return None
+    try:
+        return json.loads(clean).get("LEGAL_DESCRIPTION") or None
+    except ValueError:
+        return None
+
+
+def process_pdf(pdf_path, filename, stats=None, runner=None, use_cache=True, lazy=None):
+    """
+    Extract one PDF's fields with the LLM. Pages with a usable embedded text
+    layer are read directly, pages OCR'd before come from the OCR cache
+    (skipped with use_cache=False, which still refreshes it), and the rest
+    are rendered a window at a time and OCR'd through `runner` (the
+    extraction pool, or inline). Only the OCR goes to `runner`; rendering,
+    the text layer and the LLM call stay in the calling thread (see
+    ExtractionPool). Text is assembled in page order.
+
+    With lazy OCR (LAZY_OCR, or lazy=True) pages are only read until the
+    prompt's PROMPT_TEXT_CHARS are filled; reading resumes afterwards only
+    for regex fields the model left empty (at most LAZY_REGEX_PAGES more
+    pages) and for an incomplete
+    LEGAL_DESCRIPTION, and the DOCUMENT_TYPE hint comes from the pages read
+    for the prompt rather than the whole document. Per-page OCR and LLM timings and the pages served by
+    each path (plus OCR pages skipped) are recorded in `stats` (see
+    new_stats) for the caller.
+    """
+    stats = stats if stats is not None else new_stats()
+    runner = runner or inline_runner
+    lazy = LAZY_OCR if lazy is None else lazy
+    page_texts = {}
+
+    layer = text_layer(pdf_path) if TEXT_LAYER else None
+    if layer is None:
+        # Every page is OCR'd; numbering them still lets the cache serve them
+        count = page_count(pdf_path)
+        ocr_numbers = list(range(1, count + 1)) if count else None
+    else:
+        page_texts = {number: text for number, text in enumerate(layer, 1) if text}
+        ocr_numbers = [number for number in range(1, len(layer) + 1) if number not in page_texts]
+    stats["sources"]["text_layer"] += len(page_texts)
+
+    # Without a page count (the file could not be opened at all) it is OCR'd uncached
+    cache_key = None
+    if ocr_numbers and OCR_CACHE:
+        try:
+            cache_key = document_key(file_sha256(pdf_path), OCR_SETTINGS)
+        except Exception as e:
+            print(f"Could not hash {pdf_path} for the OCR cache: {e}")
+    if cache_key and use_cache:
+        cached = lookup_pages(cache_key, ocr_numbers)
+        page_texts.update(cached)
+        stats["sources"]["cache"] += len(cached)
+        ocr_numbers = [number for number in ocr_numbers if number not in cached]
+
+    ocr_stream = None
+    if ocr_numbers is None or ocr_numbers:
+        ocr_stream = iter_ocr_pages(pdf_path, ocr_numbers, runner, stats)
+    document = DocumentText(page_texts, ocr_stream, ocr_numbers)
+    try:
+        data = _extract_fields(document, filename, lazy, stats)
+    finally:
+        document.close()
+        if ocr_numbers:
+            stats["sources"]["skipped"] = len(ocr_numbers) - len(document.fresh)
+        if cache_key:
+            store_pages(cache_key, document.fresh)
+
+    if data:
+        data["PAGE_SOURCES"] = dict(stats["sources"])
+    return data
+
+
+def _extract_fields(document, filename, lazy, stats):
+    if lazy:
+        all_text = document.read_until(lambda text: len(text) >= PROMPT_TEXT_CHARS)
+    else:
+        # Process all pages to get complete legal description
+        all_text = document.read_all()
+    prompt_text = all_text[:PROMPT_TEXT_CHARS]
+
+    # Lazily this is only the prompt's pages (see LAZY_OCR)
+    doc_type = detect_document_type(all_text)
+
+    # Refined Prompt for better Grantor/Grantee identification
+    prompt = f"""
+Return ONLY valid JSON. 
+
+Identify legal parties strictly. GRANTOR is often 'Party 1', 'From', 'Mortgagor', 'Lienor', or 'Assignor'. 
+GRANTEE is often 'Party 2', 'To', 'Mortgagee', 'Lienee', or 'Assignee'.
+Prioritize accuracy and full legal names. Do not summarize names.
+
+Extract the COMPLETE legal description exactly as it appears.
+
+{{
+ "DOCUMENT_TYPE": "{doc_type}",
+ "GRANTOR": "Full name of the first party/grantor",
+ "GRANTEE": "Full name of the second party/grantee",
+ "INSTRUMENT_NUMBER": "",
+ "RECORDING_DATE": "",
+ "CONSIDERATION_AMOUNT": "",
+ "BOOK": "",
+ "PAGENO": "",
+ "LEGAL_DESCRIPTION": ""
+}}
+
+TEXT:
+{prompt_text}
+"""
+
+    raw = _ask_llm(prompt, stats)
+    if raw is None:
+        return None
+
+    clean = extract_json(raw)
+    if not clean:
+        return None
+
+    data = json.loads(clean)
+
+    if lazy:
+        # Regex only fills what the model left empty; read on a few pages for it
+        missing = {key for key in REGEX_FIELDS if not data.get(key)}
+        if missing:
+            all_text = document.read_until(lambda text: missing <= set(regex_extract(text)),
+                                           max_pages=LAZY_REGEX_PAGES)
+        truncated = len(all_text) > PROMPT_TEXT_CHARS or not document.finished
+        if legal_description_incomplete(data.get("LEGAL_DESCRIPTION"), prompt_text, truncated):
+            all_text = document.read_all()
+            description = _complete_legal_description(all_text, prompt_text, data.get("LEGAL_DESCRIPTION"), stats)
+            if description:
+                data["LEGAL_DESCRIPTION"] = description
+    
+    # Post-process with Regex
+    regex_data = regex_extract(all_text)
+    for key, value in regex_data.items():
+        if not data.get(key) or data.get(key) == "":
+            data[key] = value
+            
+    # Instrument Number Fallback: Check filename
+    if not data.get("INSTRUMENT_NUMBER") or data.get("INSTRUMENT_NUMBER") == "":
+        # Look for a 10-digit number like 2026001821 in filename
+        fn_match = re.search(r"(\d{4,12})", filename)
+        if fn_match:
+            data["INSTRUMENT_NUMBER"] = fn_match.group(1)
+    
+    if data.get("LEGAL_DESCRIPTION"):
+        data["LEGAL_DESCRIPTION"] = " ".join(data["LEGAL_DESCRIPTION"].split())
+    
+    data["SOURCE_FILE"] = filename
+
+    return data
@@ -0,0 +1,436 @@
+import os
+import re
+import threading
+import requests
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin
+from urllib3.util.retry import Retry
+
+from services.metrics import documents_downloaded_total
+from services.manifest_service import find_known_document, record_download
+from services.shard_service import run_sharded, shard_label
+from utils.helpers import ALL_DOC_TYPES, DEFAULT_SITE_URL, get_site_folder, format_document_name
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Counties whose searches go through the JSON API first (comma separated, e.g. "bergen,middlesex").
+# WARNING: the endpoints below are inferred from BrowserView's Angular client
+# and have only been tested against benchmarks.stub_site, never a county site.
+# Record a real search and PDF response into tests first before enabling one.
+HTTP_SEARCH_COUNTIES = {c.strip().lower() for c in os.getenv("HTTP_SEARCH_COUNTIES", "").split(",") if c.strip()}
+if HTTP_SEARCH_COUNTIES:
+    print(f"WARNING: HTTP search engine enabled for {', '.join(sorted(HTTP_SEARCH_COUNTIES))}; "
+          f"its API endpoints are unverified against the live sites.")
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+
+# Endpoints behind BrowserView's Angular documentService, relative to site_url.
+# runSearch(true) posts SearchCriteria to "search"; the View/fetchDocument
+# "PDF / Print All Pages" action renders "pdf".
+DEFAULT_ENDPOINTS = {
+    "search": "api/search",
+    "pdf": "api/document/{doc_id}/pdf",
+}
+# Per-county overrides for sites whose API layout differs
+COUNTY_ENDPOINTS = {
+    "bergen": DEFAULT_ENDPOINTS,
+    "middlesex": DEFAULT_ENDPOINTS,
+}
+
+
+class HttpSearchError(Exception):
+    pass
+
+
+# ======================================================
+# SESSION POOL
+# ======================================================
+_sessions = {}
+_site_locks = {}
+_sessions_lock = threading.Lock()
+ENGINES = ("http", "selenium")
+
+
+def _site_lock(site_url):
+    with _sessions_lock:
+        return _site_locks.setdefault(site_url, threading.Lock())
+
+
+def get_session(site_url):
+    """
+    One pooled requests.Session per site, primed with the SPA's cookies
+    (including Angular's XSRF-TOKEN) by loading the landing page once.
+    The landing page is fetched under that site's lock only, so one slow
+    county never holds up sessions for the others.
+    """
+    with _sessions_lock:
+        session = _sessions.get(site_url)
+    if session is not None:
+        return session
+
+    with _site_lock(site_url):
+        with _sessions_lock:
+            session = _sessions.get(site_url)
+        if session is not None:
+            return session
+
+        session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retries)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({
+            "Accept": "application/json, text/plain, */*",
+            "X-Requested-With": "XMLHttpRequest",
+        })
+
+        try:
+            landing = session.get(site_url, timeout=HTTP_TIMEOUT)
+            landing.raise_for_status()
+        except Exception:
+            session.close()
+            raise
+        xsrf = session.cookies.get("XSRF-TOKEN")
+        if xsrf:
+            session.headers["X-XSRF-TOKEN"] = xsrf
+
+        with _sessions_lock:
+            _sessions[site_url] = session
+        return session
+
+
+def reset_session(site_url):
+    with _sessions_lock:
+        session = _sessions.pop(site_url, None)
+    if session is not None:
+        session.close()
+
+
+def valid_engine(engine):
+    """True for a missing engine or one of ENGINES (any case)."""
+    return engine in (None, "") or (isinstance(engine, str) and engine.strip().lower() in ENGINES)
+
+
+def use_http_engine(site_url=None, county=None, engine=None):
+    """
+    Decide per request whether to try the HTTP engine before Selenium.
+    An explicit engine ("http"/"selenium") in the payload wins over HTTP_SEARCH_COUNTIES.
+    """
+    if isinstance(engine, str) and engine.strip():
+        return engine.strip().lower() == "http"
+    return get_site_folder(site_url, county) in HTTP_SEARCH_COUNTIES
+
+
+def _endpoint(site_url, county, name, **kwargs):
+    folder = get_site_folder(site_url, county)
+    endpoints = COUNTY_ENDPOINTS.get(folder, DEFAULT_ENDPOINTS)
+    return urljoin(site_url, endpoints[name].format(**kwargs))
+
+
+# ======================================================
+# RESULT ROWS
+# ======================================================
+def _first(row, *keys):
+    for key in keys:
+        value = row.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def normalize_row(row):
+    """
+    Map a raw BrowserView result row onto the fields the scrapers use.
+    Key spellings vary between county deployments, so several are accepted.
+    """
+    parties = row.get("Parties") or row.get("parties")
+    if isinstance(parties, list):
+        parties = "; ".join(str(p.get("Name", p)) if isinstance(p, dict) else str(p) for p in parties)
+    return {
+        "doc_id": _first(row, "DocumentId", "documentId", "DocId", "docId", "Id", "id"),
+        "doc_type": _first(row, "DocType", "docType", "DocumentType", "documentType", "Type"),
+        "instrument": _first(row, "InstrumentNumber", "instrumentNumber", "Instrument", "InstNum", "CFN"),
+        "book": _first(row, "Book", "book", "BookNumber"),
+        "page": _first(row, "Page", "page", "PageNumber"),
+        "recorded_date": _first(row, "RecordedDate", "recordedDate", "RecordDate", "DateRecorded"),
+        "first_party": _first(row, "FirstParty", "firstParty", "Party1", "Grantor"),
+        "second_party": _first(row, "SecondParty", "secondParty", "Party2", "Grantee"),
+        "parties": str(parties).strip() if parties else "",
+    }
+
+
+def extract_rows(data):
+    """Raw result rows from a search response, bare or wrapped in a dict (also used on captured XHR bodies)."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for key in ("Rows", "rows", "Results", "results", "Data", "data", "Documents", "documents"):
+            if isinstance(data.get(key), list):
+                return data[key]
+    raise HttpSearchError(f"Unrecognized search response: {str(data)[:200]}")
+
+
+def extract_total(data):
+    """Server-side match count when the response reports one (may exceed the rows returned)."""
+    if isinstance(data, dict):
+        for key in ("TotalCount", "totalCount", "Total", "total", "TotalRecords", "totalRecords", "RecordCount"):
+            if isinstance(data.get(key), int):
+                return data[key]
+    return None
+
+
+# ======================================================
+# SEARCH
+# ======================================================
+def search_page(site_url, criteria, county=None):
+    """
+    POST SearchCriteria the way runSearch(true) does.
+    Returns (normalized rows, server-side total or None).
+    """
+    site_url = site_url or DEFAULT_SITE_URL
+    url = _endpoint(site_url, county, "search")
+    resp = get_session(site_url).post(url, json=criteria, timeout=HTTP_TIMEOUT)
+    if resp.status_code in (401, 403):
+        # Cookies/XSRF token expired; prime a fresh session and retry once
+        reset_session(site_url)
+        resp = get_session(site_url).post(url, json=criteria, timeout=HTTP_TIMEOUT)
+    if resp.status_code != 200:
+        raise HttpSearchError(f"Search failed with HTTP {resp.status_code}")
+    try:
+        data = resp.json()
+    except ValueError:
+        raise HttpSearchError("Search response was not JSON")
+    return [normalize_row(r) for r in extract_rows(data)], extract_total(data)
+
+
+def run_search(site_url, criteria, county=None):
+    """
+    Normalized rows for a search. When the site reports more matches than it
+    returned, the date window is split until every shard is complete and the
+    shards are merged by instrument number.
+    """
+    def search_window(_, from_date, to_date, can_split):
+        rows, total = search_page(site_url, {**criteria, "fromDate": from_date, "toDate": to_date}, county)
+        return rows, total is not None and total > len(rows)
+
+    if not (criteria.get("fromDate") and criteria.get("toDate")):
+        return search_page(site_url, criteria, county)[0]
+
+    shards = run_sharded(search_window, criteria["fromDate"], criteria["toDate"])
+    if len(shards) == 1:
+        return shards[0]["result"]
+    unique_rows = OrderedDict()
+    for shard in shards:
+        for row in shard["result"]:
+            unique_rows.setdefault(row["instrument"] or row["doc_id"], row)
+    print(f"Merged {len(shards)} date shards into {len(unique_rows)} rows.")
+    return list(unique_rows.values())
+
+
+def party_criteria(party_name, township, from_date, to_date):
+    return {
+        "searchTerm": party_name,
+        "searchPartyName": party_name,
+        "searchCommonTown": township.upper() if township else "",
+        "fromDate": from_date,
+        "toDate": to_date,
+        "searchDocType": ALL_DOC_TYPES,
+    }
+
+
+def lot_block_criteria(township, lot, block, party_name, from_date, to_date):
+    return {
+        "searchCommonTown": township.strip().upper(),
+        "searchLot": str(lot),
+        "searchBlock": str(block),
+        "searchPartyName": party_name or "",
+        "fromDate": from_date,
+        "toDate": to_date,
+        "searchDocType": ALL_DOC_TYPES,
+    }
+
+
+# ======================================================
+# DOWNLOADS
+# ======================================================
+def download_document(site_url, row, final_path, county=None):
+    """
+    Stream a document's rendered PDF to a temp file, then move it into place.
+    """
+    session = get_session(site_url)
+    url = _endpoint(site_url, county, "pdf", doc_id=row["doc_id"])
+    tmp_path = final_path + ".part"
+    with session.get(url, stream=True, timeout=HTTP_TIMEOUT) as resp:
+        if resp.status_code != 200:
+            raise HttpSearchError(f"PDF download failed with HTTP {resp.status_code}")
+        with open(tmp_path, "wb") as f:
+            for chunk in resp.iter_content(chunk_size=256 * 1024):
+                f.write(chunk)
+    os.replace(tmp_path, final_path)
+    return final_path
+
+
+def _download_row(site_url, row, index, download_dir, county, skip_existing, failures):
+    if not row["doc_id"]:
+        print(f"Row {index + 1} has no document id, skipping.")
+        return None
+
+    # Already fetched for this file number; listed under the copy linked into download_dir
+    known = find_known_document(download_dir, row["instrument"], row["doc_type"])
+    if known:
+        print(f"Instrument {row['instrument']} is in the download manifest, skipping.")
+        return {
+            "index": index + 1,
+            "Type": row["doc_type"],
+            "Instrument No": row["instrument"],
+            "pdf_file": os.path.basename(known)
+        }
+
+    base_name = format_document_name(row["doc_type"], row["instrument"], index)
+    final_path = os.path.join(download_dir, f"{base_name}.pdf")
+    if os.path.exists(final_path):
+        if skip_existing:
+            print(f"Skipping duplicate file: {final_path}")
+            return None
+        counter = 1
+        while os.path.exists(final_path):
+            final_path = os.path.join(download_dir, f"{base_name}_{counter}.pdf")
+            counter += 1
+
+    try:
+        download_document(site_url, row, final_path, county)
+        record_download(download_dir, row["instrument"], row["doc_type"], final_path)
+        documents_downloaded_total.inc()
+    except Exception as e:
+        print(f"Error downloading record {index}: {e}")
+        failures.append({
+            "index": index + 1,
+            "Type": row["doc_type"],
+            "Instrument No": row["instrument"],
+            "error": str(e),
+        })
+        return None
+
+    return {
+        "index": index + 1,
+        "Type": row["doc_type"],
+        "Instrument No": row["instrument"],
+        "pdf_file": os.path.basename(final_path)
+    }
+
+
+def download_rows(site_url, rows, download_dir, county=None, skip_existing=True, progress=None, failures=None):
+    """
+    Download every row's PDF, named like extract_type_and_instrument.
+    skip_existing mirrors download_all_pdfs; otherwise a counter suffix is added
+    like process_all_views. Rows whose download raised are appended to `failures`.
+    """
+    failures = [] if failures is None else failures
+    results = []
+    if progress:
+        progress(0, len(rows))
+    for index, row in enumerate(rows):
+        result = _download_row(site_url, row, index, download_dir, county, skip_existing, failures)
+        if result:
+            results.append(result)
+        if progress:
+            progress(index + 1, len(rows))
+    return results
+
+
+def write_results_index(rows, download_dir, party_name):
+    """
+    Write the index_*.pdf that save_results_as_pdf would print from the grid.
+    """
+    import pymupdf
+
+    safe_name = re.sub(r'[\\/*?:"<>|]', "", party_name) if party_name else "results"
+    file_path = os.path.join(download_dir, f"index_{safe_name}.pdf")
+
+    lines = [f"Search results: {party_name or 'Town/Lot/Block'} ({len(rows)} records)", ""]
+    for row in rows:
+        lines.append(" | ".join([
+            row["recorded_date"], row["doc_type"], row["instrument"],
+            f"{row['book']}/{row['page']}".strip("/"),
+            row["first_party"] or row["parties"], row["second_party"],
+        ]))
+    if not rows:
+        lines.append("No records found")
+
+    doc = pymupdf.open()
+    per_page = 60
+    for start in range(0, len(lines), per_page):
+        page = doc.new_page(width=595, height=842)  # A4
+        page.insert_text((30, 40), "\n".join(lines[start:start + per_page]), fontsize=8)
+    doc.save(file_path)
+    doc.close()
+    return file_path
+
+
+# ======================================================
+# ENTRY POINTS
+# ======================================================
+def http_search_parties(party_names, township, from_date, to_date, site_url, file_dir, county=None, progress=None,
+                        label_window=False):
+    """
+    Search every party-name variation, write one index per variation, then
+    download the union of the results once per instrument number.
+    label_window puts the date window in the index file names.
+    Documents whose download failed are listed in "failed_downloads".
+    """
+    site_url = site_url or DEFAULT_SITE_URL
+    unique_rows = OrderedDict()
+    variations = []
+    failures = []
+    file_count = 0
+
+    for party_name in party_names:
+        rows = run_search(site_url, party_criteria(party_name, township, from_date, to_date), county)
+        index_name = shard_label(party_name, from_date, to_date) if label_window else party_name
+        if write_results_index(rows, file_dir, index_name):
+            file_count += 1
+        for row in rows:
+            unique_rows.setdefault(row["instrument"] or row["doc_id"], row)
+        variations.append({
+            "party_name": party_name,
+            "status": "PDF_FOUND_SUCCESSFULLY" if rows else "DATA_NOT_FOUND",
+            "records": len(rows),
+        })
+
+    results = download_rows(site_url, list(unique_rows.values()), file_dir, county,
+                            skip_existing=True, progress=progress, failures=failures)
+    file_count += len(results)
+    return {
+        "status": "PDF_FOUND_SUCCESSFULLY" if unique_rows else "DATA_NOT_FOUND",
+        "file_count": file_count,
+        "results": results,
+        "variations": variations,
+        "unique_documents": len(results),
+        "failed_downloads": failures,
+    }
+
+
+def http_search_party(party_name, township, from_date, to_date, site_url, file_dir, county=None, progress=None):
+    return http_search_parties([party_name], township, from_date, to_date, site_url, file_dir, county, progress)
+
+
+def http_scrape_lot_block(township, lot, block, party_name, from_date, to_date, site_url, download_dir, county=None,
+                          progress=None, label_window=False):
+    site_url = site_url or DEFAULT_SITE_URL
+    rows = run_search(site_url, lot_block_criteria(township, lot, block, party_name, from_date, to_date), county)
+
+    failures = []
+    results = download_rows(site_url, rows, download_dir, county, skip_existing=False, progress=progress,
+                            failures=failures)
+    file_count = len(results)
+    index_name = shard_label(party_name or "results", from_date, to_date) if label_window else party_name
+    if write_results_index(rows, download_dir, index_name):
+        file_count += 1
+    return {
+        "status": "PDF_FOUND_SUCCESSFULLY" if rows else "DATA_NOT_FOUND",
+        "file_count": file_count,
+        "results": results,
+        "failed_downloads": failures,
+    }
@@ -0,0 +1,287 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from utils.helpers import BASE_DIR
+
+# ======================================================
+# CONFIG
+# ======================================================
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(BASE_DIR, "jobs.db"))
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", os.getenv("BROWSER_POOL_SIZE", "2")))
+# Running jobs are re-stamped this often by the process that owns them...
+JOB_HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+# ...and taken back by any process once their stamp is older than this
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "120"))
+# First wait after a database error (e.g. "database is locked"); doubles up to JOB_RETRY_MAX_SECONDS
+JOB_RETRY_SECONDS = float(os.getenv("JOB_RETRY_SECONDS", "1"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "30"))
+
+
+# ======================================================
+# JOB QUEUE
+# ======================================================
+class JobQueue:
+    """
+    SQLite-backed job queue drained by a pool of worker threads.
+
+    Several server processes can share one queue: a job is claimed with a
+    conditional update, and the claiming process (its owner) stamps a
+    heartbeat while it runs. Jobs whose owner has died or stopped stamping
+    are re-queued, so queued and interrupted work survives a restart
+    without taking work from a live process.
+    """
+
+    def __init__(self, db_path=JOBS_DB_PATH, workers=SCRAPER_WORKERS):
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._runners = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads = []
+        self._db_lock = threading.Lock()
+        self._ready = False
+
+    # ---------------- storage ----------------
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        # Created on first use so importing the service never touches disk
+        with self._db_lock:
+            if self._ready:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        id TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        progress_done INTEGER NOT NULL DEFAULT 0,
+                        progress_total INTEGER NOT NULL DEFAULT 0,
+                        result TEXT,
+                        http_status INTEGER,
+                        error TEXT,
+                        created_at REAL NOT NULL,
+                        started_at REAL,
+                        finished_at REAL,
+                        owner TEXT,
+                        heartbeat_at REAL
+                    )
+                """)
+                # Databases created before owners and heartbeats existed
+                columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)").fetchall()}
+                for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                    if column not in columns:
+                        conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            self._ready = True
+
+    def _update(self, job_id, **fields):
+        self._init_db()
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    # ---------------- public API ----------------
+    def register(self, kind, runner):
+        """runner(payload, progress) -> (response_body, http_status)"""
+        self._runners[kind] = runner
+
+    def submit(self, kind, payload):
+        if kind not in self._runners:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self._init_db()
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(payload), time.time())
+            )
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id, include_result=False):
+        self._init_db()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": {"done": row["progress_done"], "total": row["progress_total"]},
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["error"]:
+            job["error"] = row["error"]
+        if include_result:
+            job["http_status"] = row["http_status"]
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def list(self, status=None, limit=50):
+        self._init_db()
+        query = "SELECT id FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            ids = [r["id"] for r in conn.execute(query, params).fetchall()]
+        return [self.get(i) for i in ids]
+
+    def counts(self):
+        self._init_db()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {r["status"]: r["n"] for r in rows}
+        counts["workers"] = self.workers
+        return counts
+
+    # ---------------- workers ----------------
+    def start(self):
+        """Start the worker threads once per process and resume jobs whose owner is gone."""
+        with self._lock:
+            if self._threads:
+                return
+            self._init_db()
+            self._requeue_stale()
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"scrape-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            t = threading.Thread(target=self._heartbeat, name="scrape-heartbeat", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _owner_alive(self, owner):
+        """False when the owner is known dead: an earlier process with our pid, or a gone pid on this host."""
+        try:
+            host, pid, token = owner.split(":")
+            pid = int(pid)
+        except (AttributeError, ValueError):
+            return False
+        if host != socket.gethostname():
+            return True  # only its heartbeat can tell
+        if pid == os.getpid():
+            return owner == self.owner
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _requeue_stale(self):
+        stale_before = time.time() - JOB_STALE_SECONDS
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, owner, heartbeat_at FROM jobs WHERE status = 'running'"
+            ).fetchall()
+            for row in rows:
+                if (row["heartbeat_at"] or 0) >= stale_before and self._owner_alive(row["owner"]):
+                    continue
+                # Conditional on the same owner so a job re-claimed meanwhile is left alone
+                requeued = conn.execute(
+                    "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL, heartbeat_at = NULL "
+                    "WHERE id = ? AND status = 'running' AND owner IS ?",
+                    (row["id"], row["owner"])
+                ).rowcount
+                if requeued:
+                    print(f"[JobQueue] Re-queued job {row['id']} from {row['owner'] or 'unknown owner'}")
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                with self._connect() as conn:
+                    conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+                                 (time.time(), self.owner))
+                self._requeue_stale()
+            except Exception as e:
+                print(f"[JobQueue] Heartbeat failed: {e}")
+
+    def _claim(self):
+        with self._lock:
+            with self._connect() as conn:
+                candidates = conn.execute(
+                    "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 5"
+                ).fetchall()
+                for row in candidates:
+                    now = time.time()
+                    # Another process may claim the same row between the SELECT and here
+                    claimed = conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, owner = ?, heartbeat_at = ? "
+                        "WHERE id = ? AND status = 'queued'",
+                        (now, self.owner, now, row["id"])
+                    ).rowcount
+                    if claimed:
+                        return row["id"], row["kind"], json.loads(row["payload"])
+            return None
+
+    def _finish(self, job_id, **fields):
+        """Record a job's outcome, retrying through database errors so it never stays 'running'."""
+        backoff = JOB_RETRY_SECONDS
+        while True:
+            try:
+                self._update(job_id, **fields)
+                return
+            except Exception as e:
+                print(f"[JobQueue] Could not record the outcome of job {job_id}, retrying in {backoff:.0f}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, JOB_RETRY_MAX_SECONDS)
+
+    def _work(self):
+        backoff = JOB_RETRY_SECONDS
+        while True:
+            try:
+                claimed = self._claim()
+            except Exception as e:
+                # e.g. "database is locked"; keep the worker alive and try again later
+                print(f"[JobQueue] Could not claim a job, retrying in {backoff:.0f}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, JOB_RETRY_MAX_SECONDS)
+                continue
+            backoff = JOB_RETRY_SECONDS
+            if not claimed:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=5)
+                continue
+
+            job_id, kind, payload = claimed
+            print(f"[JobQueue] Running {kind} job {job_id}")
+
+            def progress(done, total):
+                try:
+                    self._update(job_id, progress_done=done, progress_total=total)
+                except Exception as e:
+                    print(f"[JobQueue] Could not record progress of job {job_id}: {e}")
+
+            try:
+                body, http_status = self._runners[kind](payload, progress)
+                outcome = {"status": "done" if http_status < 400 else "failed", "result": json.dumps(body),
+                           "http_status": http_status}
+            except Exception as e:
+                outcome = {"status": "failed", "error": str(e)}
+            self._finish(job_id, finished_at=time.time(), **outcome)
+
+
+job_queue = JobQueue()
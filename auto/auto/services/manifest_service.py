@@ -0,0 +1,135 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from utils.helpers import BASE_DIR, file_sha256, format_document_name
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Skip instruments already downloaded for the same file number
+DOWNLOAD_MANIFEST = os.getenv("DOWNLOAD_MANIFEST", "1") == "1"
+MANIFEST_DB_PATH = os.getenv("MANIFEST_DB_PATH", os.path.join(BASE_DIR, "manifest.db"))
+
+
+def place_file(source, download_dir):
+    """
+    Hard-link source into download_dir under the same name (copy across
+    filesystems). An existing file of that name is left alone.
+    """
+    target = os.path.join(download_dir, os.path.basename(source))
+    if os.path.abspath(os.path.dirname(source)) == os.path.abspath(download_dir) or os.path.exists(target):
+        return target
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+    return target
+
+
+# ======================================================
+# MANIFEST
+# ======================================================
+class DownloadManifest:
+    """
+    Every instrument downloaded into any subfolder of a file-number folder
+    (e.g. bergen/643939/), with type, size and sha256. Paths are stored
+    relative to the file-number folder. Kept in SQLite so the server's
+    worker processes all see, and add to, the same manifest.
+    """
+
+    def __init__(self, db_path=MANIFEST_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._lock:
+            if self._ready:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS download_manifest (
+                        folder TEXT NOT NULL,
+                        instrument TEXT NOT NULL,
+                        doc_type TEXT,
+                        path TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        sha256 TEXT NOT NULL,
+                        downloaded_at TEXT NOT NULL,
+                        PRIMARY KEY (folder, instrument)
+                    )
+                """)
+            self._ready = True
+
+    def _add(self, conn, folder, instrument, doc_type, file_path):
+        conn.execute(
+            "INSERT OR REPLACE INTO download_manifest "
+            "(folder, instrument, doc_type, path, size, sha256, downloaded_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (folder, instrument, doc_type, os.path.relpath(file_path, folder), os.path.getsize(file_path),
+             file_sha256(file_path), time.strftime("%Y-%m-%dT%H:%M:%S"))
+        )
+
+    def lookup(self, instrument, doc_type, download_dir):
+        """
+        Return the path of an already downloaded copy of `instrument` inside
+        download_dir, or None. A copy held by a sibling folder (party vs
+        Town_Lot_Block) is linked in; a file with the expected name that
+        predates the manifest is adopted.
+        """
+        if not instrument:
+            return None
+
+        self._init_db()
+        folder = manifest_folder(download_dir)
+        with self._connect() as conn:
+            entry = conn.execute(
+                "SELECT path, size FROM download_manifest WHERE folder = ? AND instrument = ?",
+                (folder, instrument)
+            ).fetchone()
+            if entry:
+                source = os.path.join(folder, entry["path"])
+                if os.path.exists(source) and os.path.getsize(source) == entry["size"]:
+                    return place_file(source, download_dir)
+                conn.execute("DELETE FROM download_manifest WHERE folder = ? AND instrument = ?",
+                             (folder, instrument))
+
+            existing = os.path.join(download_dir, f"{format_document_name(doc_type, instrument)}.pdf")
+            if os.path.exists(existing) and os.path.getsize(existing) > 0:
+                self._add(conn, folder, instrument, doc_type, existing)
+                return existing
+        return None
+
+    def record(self, download_dir, instrument, doc_type, file_path):
+        if not instrument or not os.path.exists(file_path):
+            return
+        self._init_db()
+        with self._connect() as conn:
+            self._add(conn, manifest_folder(download_dir), instrument, doc_type, file_path)
+
+
+manifest = DownloadManifest()
+
+
+def manifest_folder(download_dir):
+    """The file-number folder that download_dir belongs to."""
+    return os.path.abspath(os.path.dirname(os.path.abspath(download_dir)))
+
+
+def find_known_document(download_dir, instrument, doc_type):
+    if not DOWNLOAD_MANIFEST:
+        return None
+    return manifest.lookup(instrument, doc_type, download_dir)
+
+
+def record_download(download_dir, instrument, doc_type, file_path):
+    if DOWNLOAD_MANIFEST:
+        manifest.record(download_dir, instrument, doc_type, file_path)
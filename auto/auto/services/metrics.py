@@ -0,0 +1,299 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Counters and histograms are kept in-process by default, so /metrics only
+# shows the process that answers it. A server running several worker
+# processes sets METRICS_DB_PATH: every process then adds to the same SQLite
+# file and /metrics renders the totals. Remove the file before starting the
+# server to reset the counters.
+METRICS_DB_PATH = os.getenv("METRICS_DB_PATH", "")
+
+# ======================================================
+# PROMETHEUS TEXT METRICS
+# Rendered in the text exposition format by /metrics.
+# ======================================================
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 300)
+
+_registry = []
+_context = threading.local()
+
+
+class SharedMetricStore:
+    """
+    Metric values summed across processes: one row per (metric, labels,
+    field), incremented in place so concurrent writers never lose updates.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        with self._lock:
+            if self._ready:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS metric_values (
+                        name TEXT NOT NULL,
+                        labels TEXT NOT NULL,
+                        field TEXT NOT NULL,
+                        value REAL NOT NULL,
+                        PRIMARY KEY (name, labels, field)
+                    )
+                """)
+            self._ready = True
+
+    def add(self, name, key, amounts):
+        """amounts: {field: increment} for one labelled series, in one transaction."""
+        self._init_db()
+        labels = json.dumps(key)
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO metric_values (name, labels, field, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name, labels, field) DO UPDATE SET value = value + excluded.value",
+                [(name, labels, field, amount) for field, amount in amounts.items()]
+            )
+
+    def read(self, name):
+        """{labels tuple: {field: value}} for one metric."""
+        self._init_db()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT labels, field, value FROM metric_values WHERE name = ?", (name,)).fetchall()
+        series = {}
+        for labels, field, value in rows:
+            series.setdefault(tuple(json.loads(labels)), {})[field] = value
+        return series
+
+
+_store = SharedMetricStore(METRICS_DB_PATH) if METRICS_DB_PATH else None
+
+
+def _whole(value):
+    # SQLite hands every value back as REAL; counts still render as integers
+    return int(value) if float(value).is_integer() else value
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        # Unset labels fall back to the current metric_labels() context
+        defaults = current_labels()
+        return tuple(str(labels.get(n, defaults.get(n, ""))) for n in self.labelnames)
+
+    def _shared_add(self, key, amounts):
+        """Add to the shared store; False when there is none or it failed."""
+        if _store is None:
+            return False
+        try:
+            _store.add(self.name, key, amounts)
+            return True
+        except Exception as e:
+            print(f"Could not record metric {self.name} in {METRICS_DB_PATH}: {e}")
+            return False
+
+    def _collect(self):
+        series = {}
+        if _store is not None:
+            try:
+                series = {k: self._from_fields(v) for k, v in _store.read(self.name).items()}
+            except Exception as e:
+                print(f"Could not read metric {self.name} from {METRICS_DB_PATH}: {e}")
+        # Plus anything this process could not write to the shared store
+        with self._lock:
+            for k, v in self._series.items():
+                series[k] = self._merge(series[k], self._snapshot(v)) if k in series else self._snapshot(v)
+        return list(series.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        series = self._collect()
+        for key, value in sorted(series):
+            lines.extend(self._render_series(key, value))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        if self._shared_add(key, {"value": amount}):
+            return
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def _snapshot(self, value):
+        return value
+
+    def _from_fields(self, fields):
+        return _whole(fields.get("value", 0))
+
+    def _merge(self, a, b):
+        return a + b
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        if self._shared_add(key, {f"bucket:{index}": 1, "sum": value, "count": 1}):
+            return
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.time()
+        try:
+            yield
+        finally:
+            self.observe(time.time() - started, **labels)
+
+    def _snapshot(self, value):
+        return {"counts": list(value["counts"]), "sum": value["sum"], "count": value["count"]}
+
+    def _from_fields(self, fields):
+        return {
+            "counts": [_whole(fields.get(f"bucket:{i}", 0)) for i in range(len(self.buckets) + 1)],
+            "sum": float(fields.get("sum", 0.0)),
+            "count": _whole(fields.get("count", 0)),
+        }
+
+    def _merge(self, a, b):
+        return {
+            "counts": [x + y for x, y in zip(a["counts"], b["counts"])],
+            "sum": a["sum"] + b["sum"],
+            "count": a["count"] + b["count"],
+        }
+
+    def _render_series(self, key, value):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), value["counts"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_value(float(bound))
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(value['sum'])}")
+        lines.append(f"{self.name}_count{labels} {value['count']}")
+        return lines
+
+
+def render_metrics():
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ======================================================
+# LABEL CONTEXT
+# ======================================================
+def current_labels():
+    return getattr(_context, "labels", {})
+
+
+@contextmanager
+def metric_labels(**labels):
+    """
+    Default labels (endpoint, county) for metrics recorded on this thread,
+    so deep call sites such as downloads need not carry them around.
+    """
+    previous = current_labels()
+    _context.labels = {**previous, **labels}
+    try:
+        yield
+    finally:
+        _context.labels = previous
+
+
+# ======================================================
+# METRICS
+# ======================================================
+OUTCOMES = ("PDF_FOUND_SUCCESSFULLY", "DATA_NOT_FOUND", "ERROR")
+
+requests_total = Counter(
+    "scraper_requests_total", "Scrape/search/extraction requests by outcome.",
+    ("endpoint", "county", "outcome"))
+documents_downloaded_total = Counter(
+    "scraper_documents_downloaded_total", "Document PDFs saved to disk.",
+    ("endpoint", "county"))
+pdf_generation_seconds = Histogram(
+    "scraper_pdf_generation_seconds", "Time from 'PDF / Print All Pages' to the blob link appearing.",
+    ("endpoint", "county"))
+browser_launch_seconds = Histogram(
+    "scraper_browser_launch_seconds", "Chrome session launch time.",
+    buckets=(0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60))
+ocr_pages_total = Counter(
+    "extraction_ocr_pages_total", "Pages run through OCR.",
+    ("endpoint", "county"))
+extraction_pages_total = Counter(
+    "extraction_pages_total",
+    "Document pages by where their text came from (text_layer, cache, ocr) or skipped by lazy OCR.",
+    ("endpoint", "county", "source"))
+ocr_page_seconds = Histogram(
+    "extraction_ocr_page_seconds", "OCR time per page.",
+    ("endpoint", "county"), buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60))
+llm_call_seconds = Histogram(
+    "extraction_llm_call_seconds", "Latency of the field-extraction LLM call.",
+    ("endpoint", "county"), buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120))
+
+
+def record_outcome(body, http_status, **labels):
+    """Count one finished request under its response status."""
+    status = (body or {}).get("status")
+    if status not in OUTCOMES:
+        status = "ERROR" if http_status >= 400 else "DATA_NOT_FOUND"
+    requests_total.inc(outcome=status, **labels)
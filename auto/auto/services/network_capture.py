@@ -0,0 +1,190 @@
+import json
+import re
+import threading
+import weakref
+
+from services.cdp_events import get_event_pump
+from services.driver_service import NETWORK_CAPTURE
+from services.http_search_service import normalize_row, extract_rows, extract_total
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Largest XHR body fetched for inspection (bytes of JSON text)
+CAPTURE_MAX_BODY = 20 * 1024 * 1024
+# How many recent result sets to keep per session
+CAPTURE_HISTORY = 5
+
+# innerText of the grid row around every result button, in on-screen order
+_BUTTON_ROWS_JS = """
+var buttons = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var rows = [];
+for (var i = 0; i < buttons.snapshotLength; i++) {
+    var el = buttons.snapshotItem(i);
+    var row = el.closest('tr') || el.parentElement;
+    rows.push(row ? row.innerText : '');
+}
+return rows;
+"""
+
+
+# ======================================================
+# CAPTURE
+# ======================================================
+class ResultCapture:
+    """
+    Listens to the Network domain events in a session's performance log and
+    keeps the JSON bodies of XHR/fetch responses that carry BrowserView
+    result rows (the runSearch response) or single-document metadata
+    (the fetchDocument response).
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._lock = threading.Lock()
+        self._json_requests = {}
+        self.result_sets = []
+        self.documents = {}
+        self.sequence = 0
+
+    def on_event(self, method, params):
+        if method == "Network.responseReceived":
+            response = params.get("response", {})
+            if params.get("type") in ("XHR", "Fetch") and "json" in (response.get("mimeType") or ""):
+                with self._lock:
+                    self._json_requests[params["requestId"]] = response.get("url")
+        elif method == "Network.loadingFinished":
+            with self._lock:
+                url = self._json_requests.pop(params.get("requestId"), None)
+            if url and params.get("encodedDataLength", 0) <= CAPTURE_MAX_BODY:
+                self._read_body(params["requestId"], url)
+        elif method == "Network.loadingFailed":
+            with self._lock:
+                self._json_requests.pop(params.get("requestId"), None)
+
+    def _read_body(self, request_id, url):
+        try:
+            body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            data = json.loads(body.get("body") or "null")
+        except Exception:
+            # Body evicted (page navigated) or not JSON after all
+            return
+
+        try:
+            rows = [normalize_row(r) for r in extract_rows(data)]
+        except Exception:
+            rows = None
+
+        with self._lock:
+            if rows:
+                self.sequence += 1
+                self.result_sets.append({"url": url, "rows": rows, "total": extract_total(data),
+                                         "sequence": self.sequence})
+                del self.result_sets[:-CAPTURE_HISTORY]
+            elif isinstance(data, dict):
+                document = normalize_row(data)
+                if document["instrument"]:
+                    self.documents[document["instrument"]] = document
+
+    def latest_counts(self, since=0):
+        with self._lock:
+            if self.result_sets and self.result_sets[-1]["sequence"] > since:
+                latest = self.result_sets[-1]
+                return latest["total"], len(latest["rows"])
+            return None
+
+    def latest_result_sets(self):
+        with self._lock:
+            sets = [[dict(r) for r in s["rows"]] for s in reversed(self.result_sets)]
+            documents = dict(self.documents)
+        # Fill blanks in the search rows from any per-document metadata seen
+        for rows in sets:
+            for row in rows:
+                extra = documents.get(row["instrument"])
+                if extra:
+                    for key, value in extra.items():
+                        if value and not row.get(key):
+                            row[key] = value
+        return sets
+
+
+_captures = weakref.WeakKeyDictionary()
+_captures_lock = threading.Lock()
+
+
+def get_capture(driver):
+    """Attach a ResultCapture to the driver's event pump once per session."""
+    with _captures_lock:
+        capture = _captures.get(driver)
+        if capture is None:
+            capture = _captures[driver] = ResultCapture(driver)
+            get_event_pump(driver).add_listener(capture.on_event)
+        return capture
+
+
+def start_result_capture(driver):
+    """
+    Call before running a search so its responses are picked up. Returns a
+    marker for captured_result_counts (None when capture is off). Events still
+    sitting in the performance log are drained first so a response to an
+    earlier search cannot land after the marker.
+    """
+    if NETWORK_CAPTURE:
+        capture = get_capture(driver)
+        get_event_pump(driver).poll()
+        return capture.sequence
+    return None
+
+
+def captured_result_counts(driver, since):
+    """
+    (server-side total or None, rows returned) for the search response
+    captured after start_result_capture returned `since`, or None when
+    nothing new was captured.
+    """
+    if not NETWORK_CAPTURE or since is None:
+        return None
+    get_event_pump(driver).poll()
+    return get_capture(driver).latest_counts(since)
+
+
+def _row_matches(row, text):
+    instrument = row["instrument"]
+    return bool(instrument) and re.search(r"(?<![\w-])" + re.escape(instrument) + r"(?![\w-])", text) is not None
+
+
+def captured_result_rows(driver, view_xpath):
+    """
+    Structured rows for the result grid currently on screen, one per button
+    matched by `view_xpath` and in the same order, or None when no captured
+    response lines up with the grid (the caller then reads the Details view).
+    """
+    if not NETWORK_CAPTURE:
+        return None
+
+    capture = get_capture(driver)
+    get_event_pump(driver).poll()
+    result_sets = capture.latest_result_sets()
+    if not result_sets:
+        return None
+
+    try:
+        grid_rows = driver.execute_script(_BUTTON_ROWS_JS, view_xpath) or []
+    except Exception:
+        return None
+    if not grid_rows:
+        return None
+
+    for rows in result_sets:
+        matched = []
+        for text in grid_rows:
+            candidates = [r for r in rows if _row_matches(r, text)]
+            # Same instrument listed under several types: keep the one shown in this row
+            if len(candidates) > 1:
+                candidates = [r for r in candidates if r["doc_type"] and r["doc_type"] in text] or candidates
+            if len({(r["instrument"], r["doc_type"]) for r in candidates}) != 1:
+                break
+            matched.append(candidates[0])
+        if len(matched) == len(grid_rows):
+            return matched
+    return None
@@ -0,0 +1,132 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from utils.helpers import BASE_DIR, file_sha256
+
+# ======================================================
+# CONFIG
+# ======================================================
+OCR_CACHE = os.getenv("OCR_CACHE", "1") == "1"
+OCR_CACHE_DB_PATH = os.getenv("OCR_CACHE_DB_PATH", os.path.join(BASE_DIR, "ocr_cache.db"))
+# Total page text kept; least recently used documents go first beyond this
+OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "256"))
+
+
+def document_key(content_hash, settings):
+    """Key for one document's OCR under one set of OCR settings (dpi, psm, model...)."""
+    return hashlib.sha256(f"{content_hash}|{settings}".encode("utf-8")).hexdigest()
+
+
+# ======================================================
+# CACHE
+# ======================================================
+class OcrCache:
+    """
+    OCR text per page of a PDF, keyed by the file's content hash and the OCR
+    settings, so an unchanged document is never rendered and OCR'd twice.
+    Beyond OCR_CACHE_MAX_MB of text the least recently used pages go.
+    """
+
+    def __init__(self, db_path=OCR_CACHE_DB_PATH, max_bytes=OCR_CACHE_MAX_MB * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max(1, max_bytes)
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._lock:
+            if self._ready:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS ocr_pages (
+                        key TEXT NOT NULL,
+                        page INTEGER NOT NULL,
+                        text TEXT NOT NULL,
+                        bytes INTEGER NOT NULL,
+                        last_used_at REAL NOT NULL,
+                        PRIMARY KEY (key, page)
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_pages_used ON ocr_pages (last_used_at)")
+            self._ready = True
+
+    def get_pages(self, key, pages):
+        """{page number: text} for the requested pages that are cached."""
+        self._init_db()
+        pages = list(pages)
+        found = {}
+        with self._connect() as conn:
+            # Stay under SQLite's bound-parameter limit on very long documents
+            for start in range(0, len(pages), 500):
+                chunk = pages[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT page, text FROM ocr_pages WHERE key = ? AND page IN ({','.join('?' * len(chunk))})",
+                    [key, *chunk]
+                ).fetchall()
+                found.update({row["page"]: row["text"] for row in rows})
+            if found:
+                conn.execute("UPDATE ocr_pages SET last_used_at = ? WHERE key = ?", (time.time(), key))
+        return found
+
+    def put_pages(self, key, texts):
+        """Store {page number: text} and evict down to the size bound."""
+        if not texts:
+            return
+        self._init_db()
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ocr_pages (key, page, text, bytes, last_used_at) VALUES (?, ?, ?, ?, ?)",
+                [(key, page, text, len(text.encode("utf-8")), now) for page, text in texts.items()]
+            )
+            total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM ocr_pages").fetchone()[0]
+            if total > self.max_bytes:
+                conn.execute("""
+                    DELETE FROM ocr_pages WHERE rowid IN (
+                        SELECT rowid FROM (
+                            SELECT rowid, SUM(bytes) OVER (ORDER BY last_used_at DESC, rowid DESC) AS kept
+                            FROM ocr_pages
+                        ) WHERE kept > ?
+                    )
+                """, (self.max_bytes,))
+
+    def clear(self):
+        self._init_db()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM ocr_pages")
+
+
+ocr_cache = OcrCache()
+
+
+# ======================================================
+# HELPERS
+# ======================================================
+def lookup_pages(key, pages):
+    """Cached text for the given pages; {} when disabled or on any cache error."""
+    if not OCR_CACHE:
+        return {}
+    try:
+        return ocr_cache.get_pages(key, pages)
+    except Exception as e:
+        print(f"OCR cache lookup failed: {e}")
+        return {}
+
+
+def store_pages(key, texts):
+    if not OCR_CACHE:
+        return
+    try:
+        ocr_cache.put_pages(key, texts)
+    except Exception as e:
+        print(f"Could not cache OCR text: {e}")
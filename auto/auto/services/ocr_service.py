@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+
+# ======================================================
+# CONFIG
+# ======================================================
+# The OCR/LLM stack (torch, transformers, cv2, OpenAI) is imported on first use,
+# so scraper-only processes never pay for it. Set EXTRACTION_WARM=1 to load it
+# in the background at startup instead.
+EXTRACTION_WARM = os.getenv("EXTRACTION_WARM", "0") == "1"
+TROCR_MODEL = os.getenv("TROCR_MODEL", "microsoft/trocr-base-handwritten")
+LLM_MODEL = os.getenv("EXTRACTION_LLM_MODEL", "gpt-4.1-mini")
+# Optimized for structured headers (PSM 3)
+TESSERACT_CONFIG = "--oem 3 --psm 3"
+OCR_SCALE = 1.3
+
+_trocr = None
+_trocr_lock = threading.Lock()
+_client = None
+_client_lock = threading.Lock()
+
+
+# ======================================================
+# LAZY LOADERS
+# ======================================================
+def get_trocr():
+    """(processor, model) for handwritten OCR, loaded once per process."""
+    global _trocr
+    with _trocr_lock:
+        if _trocr is None:
+            from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+
+            started = time.time()
+            processor = TrOCRProcessor.from_pretrained(TROCR_MODEL)
+            model = VisionEncoderDecoderModel.from_pretrained(TROCR_MODEL)
+            model.eval()
+            _trocr = (processor, model)
+            print(f"Loaded TrOCR model {TROCR_MODEL} in {time.time() - started:.1f}s")
+        return _trocr
+
+
+def get_openai_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+
+            _client = OpenAI()  # Use environment variable
+        return _client
+
+
+def warm_up_extraction(background=True):
+    """
+    Load the TrOCR model and OpenAI client ahead of the first
+    /extract_by_file_number request.
+    """
+    def load():
+        try:
+            get_trocr()
+            get_openai_client()
+        except Exception as e:
+            print(f"Extraction warm-up failed: {e}")
+
+    if background:
+        threading.Thread(target=load, name="extraction-warm-up", daemon=True).start()
+    else:
+        load()
+
+
+# ======================================================
+# OCR
+# ======================================================
+def printed_ocr_from_array(img_array):
+    import cv2
+    import pytesseract
+
+    if len(img_array.shape) == 3:
+        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    else:
+        gray = img_array
+    gray = cv2.resize(gray, None, fx=OCR_SCALE, fy=OCR_SCALE, interpolation=cv2.INTER_CUBIC)
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return pytesseract.image_to_string(thresh, config=TESSERACT_CONFIG)
+
+
+def handwritten_ocr_from_array(img_array):
+    import torch
+    from PIL import Image
+
+    processor, model = get_trocr()
+    image = Image.fromarray(img_array).convert("RGB")
+    pixel_values = processor(image, return_tensors="pt").pixel_values
+    with torch.no_grad():
+        generated_ids = model.generate(pixel_values)
+    return processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
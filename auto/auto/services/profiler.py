@@ -0,0 +1,210 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from utils.helpers import BASE_DIR
+
+# ======================================================
+# CONFIG
+# ======================================================
+TRACE_LOG_PATH = os.getenv("SCRAPER_TRACE_LOG", os.path.join(BASE_DIR, "logs", "scraper_trace.log"))
+TRACE_LOG_MAX_BYTES = int(os.getenv("SCRAPER_TRACE_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+TRACE_LOG_BACKUPS = int(os.getenv("SCRAPER_TRACE_LOG_BACKUPS", "5"))
+
+_trace_logger = None
+_trace_logger_lock = threading.Lock()
+
+
+def _get_trace_logger():
+    global _trace_logger
+    with _trace_logger_lock:
+        if _trace_logger is None:
+            os.makedirs(os.path.dirname(TRACE_LOG_PATH), exist_ok=True)
+            handler = RotatingFileHandler(TRACE_LOG_PATH, maxBytes=TRACE_LOG_MAX_BYTES,
+                                          backupCount=TRACE_LOG_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("scraper.trace")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _trace_logger = logger
+        return _trace_logger
+
+
+# ======================================================
+# RUN PROFILE
+# ======================================================
+class RunProfile:
+    """
+    Every WebDriver/CDP command issued during one scraper run, grouped into
+    nested spans (open_site, perform_search, document 3/pdf, ...), plus the
+    fallback paths that fired along the way.
+    """
+
+    def __init__(self, name, **context):
+        self.name = name
+        self.context = context
+        self.started = time.time()
+        self.command_count = 0
+        self.command_seconds = 0.0
+        self.commands = {}
+        self.spans = []
+        self.fallbacks = []
+        self._stack = []
+
+    def record_command(self, command, seconds):
+        self.command_count += 1
+        self.command_seconds += seconds
+        entry = self.commands.setdefault(command, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def _path(self, name):
+        return "/".join([s["name"] for s in self._stack] + [name])
+
+    def enter(self, name, step=False):
+        self._stack.append({
+            "name": name,
+            "path": self._path(name),
+            "started": time.time(),
+            "commands_at_start": self.command_count,
+            "step": step,
+        })
+
+    def _close_top(self):
+        span = self._stack.pop()
+        self.spans.append({
+            "span": span["path"],
+            "started": round(span["started"] - self.started, 3),
+            "seconds": round(time.time() - span["started"], 3),
+            "commands": self.command_count - span["commands_at_start"],
+        })
+
+    def exit(self):
+        while self._stack and self._stack[-1]["step"]:
+            self._close_top()
+        if self._stack:
+            self._close_top()
+
+    def step(self, name):
+        """Close the previous step at this level and open `name`."""
+        if self._stack and self._stack[-1]["step"]:
+            self._close_top()
+        self.enter(name, step=True)
+
+    def note_fallback(self, name, detail=None):
+        self.fallbacks.append({
+            "fallback": name,
+            "span": self._stack[-1]["path"] if self._stack else None,
+            "detail": detail,
+            "at": round(time.time() - self.started, 3),
+        })
+
+    def finish(self):
+        while self._stack:
+            self._close_top()
+
+    def report(self):
+        total = time.time() - self.started
+        commands = sorted(self.commands.items(), key=lambda kv: kv[1][1], reverse=True)
+        return {
+            "run": self.name,
+            **self.context,
+            "total_seconds": round(total, 3),
+            "webdriver_commands": self.command_count,
+            "webdriver_seconds": round(self.command_seconds, 3),
+            "commands": [{"command": c, "count": n, "seconds": round(s, 3)} for c, (n, s) in commands],
+            "spans": sorted(self.spans, key=lambda s: (s["started"], -s["seconds"])),
+            "fallbacks": self.fallbacks,
+        }
+
+
+_profiles = weakref.WeakKeyDictionary()
+
+
+def instrument_driver(driver):
+    """
+    Wrap driver.execute so every command is timed into the driver's active
+    profile (if any). CDP calls are labelled with their method name.
+    """
+    execute = driver.execute
+
+    def timed_execute(command, params=None):
+        profile = _profiles.get(driver)
+        if profile is None:
+            return execute(command, params)
+        started = time.time()
+        try:
+            return execute(command, params)
+        finally:
+            label = command
+            if command == "executeCdpCommand" and params:
+                label = f"cdp:{params.get('cmd')}"
+            profile.record_command(label, time.time() - started)
+
+    driver.execute = timed_execute
+    return driver
+
+
+@contextmanager
+def profile_run(driver, name, **context):
+    """
+    Profile everything the driver does inside the block and append the
+    report to the trace log. Yields the RunProfile.
+    """
+    profile = RunProfile(name, **context)
+    _profiles[driver] = profile
+    try:
+        yield profile
+    finally:
+        profile.finish()
+        _profiles.pop(driver, None)
+        try:
+            _get_trace_logger().info(json.dumps(profile.report()))
+        except Exception as e:
+            print(f"Could not write scraper trace: {e}")
+
+
+# ======================================================
+# SPANS
+# ======================================================
+@contextmanager
+def span(driver, name):
+    profile = _profiles.get(driver)
+    if profile is None:
+        yield
+        return
+    profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.exit()
+
+
+def traced(name):
+    """Decorator: run a scraper function (driver first) inside a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(driver, *args, **kwargs):
+            with span(driver, name):
+                return func(driver, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def step(driver, name):
+    profile = _profiles.get(driver)
+    if profile is not None:
+        profile.step(name)
+
+
+def note_fallback(driver, name, detail=None):
+    profile = _profiles.get(driver)
+    if profile is not None:
+        profile.note_fallback(name, detail)
@@ -0,0 +1,549 @@
+import functools
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from datetime import datetime
+from selenium.common.exceptions import WebDriverException
+from services.driver_service import browser_pool, set_download_dir
+from services.metrics import metric_labels, record_outcome
+from services.profiler import profile_run
+from services.shard_service import run_sharded, merge_by_instrument, shard_label, SHARD_LEASE_TIMEOUT
+from services.search_cache import cache_key, collect_files, snapshot_pdfs
+from services.search_cache import lookup as cache_lookup, store as cache_store
+from services.watermark_service import (
+    plan_search, record_search, search_subject, merge_found, merge_results, INCREMENTAL_SEARCHES
+)
+from services.http_search_service import (
+    use_http_engine, valid_engine, http_scrape_lot_block, http_search_parties, HttpSearchError
+)
+from services.scraper_service import (
+    open_site, fill_search_form, reset_search_form, process_all_views, perform_search,
+    download_all_pdfs, save_results_as_pdf, check_if_records_exist, SeenInstruments, PDF_CONCURRENCY
+)
+from utils.helpers import (
+    normalize_date, format_owner_name, get_download_dir, create_party_download_folder,
+    get_site_folder, DEFAULT_SITE_URL
+)
+
+# ======================================================
+# RUNNERS
+# Shared by the synchronous routes and the background job workers.
+# Each returns (response_body, http_status). `progress(done, total)` is
+# called as documents finish downloading.
+# ======================================================
+def _metered(endpoint):
+    """Label metrics recorded during the run and count its outcome."""
+    def decorator(runner):
+        @functools.wraps(runner)
+        def wrapper(payload, progress=None):
+            county = get_site_folder(payload.get("site_url"), payload.get("county"))
+            with metric_labels(endpoint=endpoint, county=county):
+                body, status = runner(payload, progress)
+            record_outcome(body, status, endpoint=endpoint, county=county)
+            return body, status
+        return wrapper
+    return decorator
+
+
+def _parse_scrape_payload(payload):
+    """
+    Validate a /scrape payload. Returns (params, None) or (None, (error_body, http_status)).
+    """
+    township = payload.get("township") or payload.get("Township") or payload.get("Townsnhip")
+    lot = payload.get("lot")
+    block = payload.get("block")
+    party_name_raw = payload.get("party_name")
+    party_name = format_owner_name(party_name_raw) if party_name_raw else ""
+    file_number = payload.get("file_number")
+    date = payload.get("date")
+    site_url = payload.get("site_url")
+    county = payload.get("county")
+
+    if not file_number:
+        return None, ({"status": "ERROR", "message": "File number required"}, 400)
+
+    download_dir = get_download_dir(file_number, site_url, county)
+    from_date = normalize_date(date)
+    to_date = datetime.today().strftime("%m/%d/%Y")
+
+    if not township or not lot or not block:
+        return None, ({"status": "ERROR", "message": "township, lot, and block are required"}, 400)
+
+    if not valid_engine(payload.get("engine")):
+        return None, ({"status": "ERROR", "message": "engine must be \"http\" or \"selenium\""}, 400)
+
+    return {
+        "township": township,
+        "lot": lot,
+        "block": block,
+        "party_name": party_name,
+        "file_number": file_number,
+        "site_url": site_url,
+        "county": county,
+        "engine": payload.get("engine"),
+        "pdf_concurrency": int(payload.get("pdf_concurrency") or PDF_CONCURRENCY),
+        "profile": bool(payload.get("profile")),
+        "incremental": bool(payload.get("incremental", INCREMENTAL_SEARCHES)),
+        "use_cache": bool(payload.get("cache", True)),
+        "download_dir": download_dir,
+        "from_date": from_date,
+        "requested_from": from_date,
+        "to_date": to_date,
+    }, None
+
+
+def _scrape_http(params, progress=None):
+    """Try the HTTP engine if selected for this county. Returns None to fall back to Selenium."""
+    if not use_http_engine(params["site_url"], params["county"], params["engine"]):
+        return None
+    try:
+        result = http_scrape_lot_block(params["township"], params["lot"], params["block"], params["party_name"],
+                                       params["from_date"], params["to_date"], params["site_url"],
+                                       params["download_dir"], params["county"], progress=progress,
+                                       label_window=_narrowed(params))
+        if result["failed_downloads"]:
+            # Selenium fetches what HTTP could not; the manifest skips the documents already saved
+            print(f"{len(result['failed_downloads'])} HTTP downloads failed, falling back to Selenium.")
+            return None
+        return {
+            "status": result["status"],
+            "file_count": result["file_count"],
+            "engine": "http"
+        }
+    except Exception as e:
+        print(f"HTTP search engine failed, falling back to Selenium: {e}")
+        return None
+
+
+def _scrape_with_driver(driver, params, progress=None, reuse_page=False):
+    """
+    Run one Town/Lot/Block search on a leased driver.
+    reuse_page resets the form in place instead of reloading the site.
+    """
+    download_dir = params["download_dir"]
+
+    if not (reuse_page and reset_search_form(driver)):
+        open_site(driver, params["site_url"])
+    fill_search_form(driver, params["township"], params["lot"], params["block"], params["party_name"],
+                     params["from_date"], params["to_date"], params["site_url"])
+
+    # 1. Check if records actually exist (helps distinguish DATA_NOT_FOUND)
+    records_found = check_if_records_exist(driver)
+
+    file_count = 0
+
+    # 2. Process individual views FIRST (while results page is intact)
+    if records_found:
+        download_count = process_all_views(driver, download_dir, progress=progress,
+                                           concurrency=params["pdf_concurrency"], site_url=params["site_url"])
+        file_count += download_count
+        status = "PDF_FOUND_SUCCESSFULLY"
+    else:
+        status = "DATA_NOT_FOUND"
+
+    # 3. Save results index PDF last (may navigate away from results page)
+    index_name = params["party_name"]
+    if _narrowed(params):
+        index_name = shard_label(params["party_name"] or "results", params["from_date"], params["to_date"])
+    index_path = save_results_as_pdf(driver, download_dir, index_name)
+    if index_path:
+        file_count += 1
+
+    return {
+        "status": status,
+        "file_count": file_count,
+        "engine": "selenium"
+    }
+
+
+# ======================================================
+# INCREMENTAL (HIGH-WATER MARKS)
+# ======================================================
+def _narrowed(params):
+    return params["from_date"] != params["requested_from"]
+
+
+def _plan_incremental(params):
+    """
+    Move params["from_date"] up to the stored high-water mark when the request
+    is incremental. Returns the previous mark (or None).
+    """
+    params["subject"] = search_subject(params["township"], params["lot"], params["block"], params["party_name"])
+    params["folder"] = get_site_folder(params["site_url"], params["county"])
+    params["from_date"], previous = plan_search(params["folder"], params["file_number"], "lot-block",
+                                                params["subject"], params["download_dir"],
+                                                params["requested_from"], params["incremental"])
+    return previous
+
+
+def _finish_incremental(params, result, previous):
+    """Fold the previous run into a successful result and advance the mark."""
+    if result.get("status") not in ("PDF_FOUND_SUCCESSFULLY", "DATA_NOT_FOUND"):
+        return result
+    file_count = result.get("file_count", 0)
+    if previous:
+        result["status"] = merge_found(result["status"], previous["result"]["status"])
+        result["incremental"] = {
+            "searched_from": params["from_date"],
+            "previous_window": [previous["from_date"], previous["to_date"]],
+            "previous_file_count": previous["result"]["file_count"],
+        }
+        file_count += previous["result"]["file_count"]
+    record_search(params["folder"], params["file_number"], "lot-block", params["subject"], params["download_dir"],
+                  params["requested_from"], params["to_date"],
+                  {"status": result["status"], "file_count": file_count}, previous)
+    return result
+
+
+# ======================================================
+# SEARCH CACHE
+# ======================================================
+def _scrape_cache_key(params):
+    return cache_key(params["site_url"], "lot-block",
+                     [params["township"], params["lot"], params["block"], params["party_name"]],
+                     params["requested_from"], params["to_date"])
+
+
+def _cached_scrape(params):
+    """A cached result for this search linked into the request's folder, or None."""
+    params["pdfs_before"] = snapshot_pdfs(params["download_dir"])
+    if not params["use_cache"]:
+        return None
+    return cache_lookup(_scrape_cache_key(params), params["download_dir"])
+
+
+def _cache_scrape(params, result):
+    files = collect_files(params["download_dir"], params["pdfs_before"])
+    # Documents kept from an earlier run are not attributable to this search; don't cache a partial set
+    if len(files) >= result.get("file_count", 0):
+        cache_store(_scrape_cache_key(params), "lot-block", result, files)
+    return result
+
+
+@_metered("scrape")
+def run_scrape(payload, progress=None):
+    try:
+        params, error = _parse_scrape_payload(payload)
+        if error:
+            return error
+        cached = _cached_scrape(params)
+        if cached:
+            return cached, 200
+        previous = _plan_incremental(params)
+
+        result = _scrape_http(params, progress)
+        if result:
+            return _cache_scrape(params, _finish_incremental(params, result, previous)), 200
+
+        with browser_pool.lease(params["download_dir"]) as driver:
+            with profile_run(driver, "scrape", file_number=params["file_number"]) as profile:
+                result = _scrape_with_driver(driver, params, progress)
+        if params["profile"]:
+            result["profile"] = profile.report()
+        return _cache_scrape(params, _finish_incremental(params, result, previous)), 200
+
+    except Exception as e:
+        return {"status": "ERROR", "message": str(e)}, 500
+
+
+# ======================================================
+# BATCH (TOWN/LOT/BLOCK)
+# ======================================================
+def _run_batch_group(indexed_items, emit):
+    """
+    Run every item for one site on a single leased session, resetting the
+    search form in place between items instead of relaunching and reloading.
+    Every item emits exactly one line, whatever happens.
+    """
+    lease = None  # ExitStack holding the current browser lease
+    driver = None
+    page_ready = False
+    try:
+        for index, item in indexed_items:
+            line = {"index": index, "file_number": item.get("file_number")}
+            county = get_site_folder(item.get("site_url"), item.get("county"))
+
+            def finish(result, http_status=None):
+                if http_status is None:
+                    http_status = 400 if result.get("status") == "ERROR" else 200
+                record_outcome(result, http_status, endpoint="scrape-batch", county=county)
+                emit(result)
+
+            with metric_labels(endpoint="scrape-batch", county=county):
+                on_driver = False
+                try:
+                    params, error = _parse_scrape_payload(item)
+                    if error:
+                        finish({**line, **error[0]}, error[1])
+                        continue
+                    cached = _cached_scrape(params)
+                    if cached:
+                        finish({**line, **cached})
+                        continue
+                    previous = _plan_incremental(params)
+
+                    result = _scrape_http(params)
+                    if result:
+                        finish({**line, **_cache_scrape(params, _finish_incremental(params, result, previous))})
+                        continue
+
+                    if driver is None:
+                        lease = ExitStack()
+                        driver = lease.enter_context(browser_pool.lease(params["download_dir"]))
+                    else:
+                        set_download_dir(driver, params["download_dir"])
+                    on_driver = True
+
+                    with profile_run(driver, "scrape-batch", file_number=params["file_number"]) as profile:
+                        result = _scrape_with_driver(driver, params, reuse_page=page_ready)
+                    page_ready = True
+                    if params["profile"]:
+                        result["profile"] = profile.report()
+                    finish({**line, **_cache_scrape(params, _finish_incremental(params, result, previous))})
+                except Exception as e:
+                    page_ready = False
+                    if on_driver and lease is not None and isinstance(e, WebDriverException):
+                        # End the lease with the error so the pool recycles the session
+                        # instead of handing a broken browser to the next item; after an
+                        # ordinary error the next item just reloads the site
+                        lease.__exit__(type(e), e, e.__traceback__)
+                        lease = driver = None
+                    finish({**line, "status": "ERROR", "message": str(e)}, 500)
+    finally:
+        if lease is not None:
+            lease.close()
+
+
+def _safe_batch_group(indexed_items, emit):
+    """Run a group; if the group itself dies, still emit a line for each item it never finished."""
+    emitted = set()
+
+    def tracked(result):
+        emitted.add(result.get("index"))
+        emit(result)
+
+    try:
+        _run_batch_group(indexed_items, tracked)
+    except Exception as e:
+        print(f"Batch group failed: {e}")
+    for index, item in indexed_items:
+        if index not in emitted:
+            emit({"index": index, "file_number": item.get("file_number"), "status": "ERROR",
+                  "message": "batch group failed before this item finished"})
+
+
+def iter_scrape_batch(items):
+    """
+    Group items by site, run each group on its own session concurrently and
+    yield one result dict per item as soon as it finishes. Items that are
+    not objects are answered at once with an error line.
+    """
+    groups = OrderedDict()
+    invalid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            invalid.append({"index": index, "file_number": None, "status": "ERROR",
+                            "message": "batch item must be an object"})
+            continue
+        key = (get_site_folder(item.get("site_url"), item.get("county")), item.get("site_url") or DEFAULT_SITE_URL)
+        groups.setdefault(key, []).append((index, item))
+
+    for line in invalid:
+        record_outcome(line, 400, endpoint="scrape-batch", county="")
+        yield line
+
+    results = queue.Queue()
+    threads = [
+        threading.Thread(target=_safe_batch_group, args=(group, results.put), daemon=True)
+        for group in groups.values()
+    ]
+    for t in threads:
+        t.start()
+
+    for _ in range(len(items) - len(invalid)):
+        yield results.get()
+
+    for t in threads:
+        t.join()
+
+
+def run_scrape_batch(payload, progress=None):
+    """Job runner for /scrape/batch with {"async": true}: collects every item's result."""
+    items = payload.get("items") or []
+    results = []
+    for result in iter_scrape_batch(items):
+        results.append(result)
+        if progress:
+            progress(len(results), len(items))
+    results.sort(key=lambda r: r["index"])
+    return {"status": "BATCH_COMPLETE", "total": len(items), "results": results}, 200
+
+
+# ======================================================
+# PARTY SEARCH (DATE SHARDS)
+# ======================================================
+def _search_party_sharded(driver, name, township, from_date, to_date, site_url, file_dir, seen_instruments,
+                          pdf_concurrency=1, progress=None, label_windows=False):
+    """
+    Search one party name, splitting the date window whenever the site caps
+    the result set. Each complete shard saves its own index PDF and downloads
+    its documents; extra shards run on further pool sessions when available.
+    label_windows dates every index PDF (so a narrowed search does not replace
+    the full index from an earlier run).
+    Returns run_sharded's shard list with {"records_found", "index_files",
+    "results"} results.
+    """
+    def search_window(shard_driver, shard_from, shard_to, can_split):
+        truncated = perform_search(shard_driver, name, township, shard_from, shard_to, site_url)
+        if truncated and can_split:
+            return None, True
+
+        # 1. Check if records actually exist
+        records_found = check_if_records_exist(shard_driver)
+
+        # 2. Print/Save Results Grid as PDF (the index), one per shard
+        whole_window = (shard_from, shard_to) == (from_date, to_date) and not label_windows
+        label = name if whole_window else shard_label(name, shard_from, shard_to)
+        index_path = save_results_as_pdf(shard_driver, file_dir, label)
+
+        # 3. Process individual downloads, skipping instruments an earlier variation fetched
+        found = []
+        if records_found:
+            found = download_all_pdfs(shard_driver, file_dir, progress=progress,
+                                      seen_instruments=seen_instruments,
+                                      concurrency=pdf_concurrency, site_url=site_url)
+        return {"records_found": records_found, "index_files": 1 if index_path else 0, "results": found}, truncated
+
+    return run_sharded(search_window, from_date, to_date, handle=driver,
+                       open_worker=lambda: browser_pool.lease(file_dir, timeout=SHARD_LEASE_TIMEOUT))
+
+
+@_metered("search-document")
+def run_search_document(payload, progress=None):
+    """
+    Party search. "party_names" may carry several name variations; they run
+    back-to-back on one session and each instrument is downloaded once.
+    """
+    try:
+        party_name = payload.get("party_name")
+        party_names = payload.get("party_names") or ([party_name] if party_name else [])
+        party_names = list(OrderedDict.fromkeys(n.strip() for n in party_names if n and n.strip()))
+        township = payload.get("township")
+        from_date_raw = payload.get("from_date")
+        file_number = payload.get("file_number")
+        site_url = payload.get("site_url")
+        folder_name = payload.get("folder_name")
+        county = payload.get("county")
+        pdf_concurrency = int(payload.get("pdf_concurrency") or PDF_CONCURRENCY)
+
+        if not party_names or not from_date_raw or not file_number:
+            return {
+                "error": "party_name, from_date and file_number required"
+            }, 400
+
+        if not valid_engine(payload.get("engine")):
+            return {"error": "engine must be \"http\" or \"selenium\""}, 400
+
+        from_date = normalize_date(from_date_raw)
+        to_date = datetime.today().strftime("%m/%d/%Y")
+
+        file_dir = create_party_download_folder(file_number, site_url, folder_name, county)
+
+        response = {
+            "party_name": party_names[0],
+            "party_names": party_names,
+            "file_number": file_number,
+            "from_date": from_date,
+            "to_date": to_date,
+        }
+
+        # The same search for another file (or a retry) is served from disk
+        search_key = cache_key(site_url, "party", [";".join(party_names), township], from_date, to_date)
+        if payload.get("cache", True):
+            cached = cache_lookup(search_key, file_dir)
+            if cached:
+                return {**cached, **response}, 200
+        before = snapshot_pdfs(file_dir)
+
+        # Repeat checks on the same file only search recordings since the last run
+        folder = get_site_folder(site_url, county)
+        subject = search_subject(";".join(party_names), township)
+        search_from, previous = plan_search(folder, file_number, "party", subject, file_dir, from_date,
+                                            bool(payload.get("incremental", INCREMENTAL_SEARCHES)))
+        narrowed = search_from != from_date
+
+        def finish(body, results):
+            """Fold in the previous run's documents and advance the high-water mark."""
+            if previous:
+                results = merge_results(previous["result"]["results"], results)
+                body["status"] = merge_found(body["status"], previous["result"]["status"])
+                body["unique_documents"] = len(results)
+                body["incremental"] = {
+                    "searched_from": search_from,
+                    "previous_window": [previous["from_date"], previous["to_date"]],
+                }
+            record_search(folder, file_number, "party", subject, file_dir, from_date, to_date,
+                          {"status": body["status"], "results": results}, previous)
+            files = collect_files(file_dir, before, results)
+            # A re-saved index or a document kept from an earlier run is not in `files`; don't cache a partial set
+            if len(files) >= body.get("total_downloaded", 0):
+                cache_store(search_key, "party", body, files)
+            return body, 200
+
+        if use_http_engine(site_url, county, payload.get("engine")):
+            try:
+                result = http_search_parties(party_names, township, search_from, to_date, site_url, file_dir,
+                                             county, progress=progress, label_window=narrowed)
+                if result["failed_downloads"]:
+                    raise HttpSearchError(f"{len(result['failed_downloads'])} document downloads failed")
+                return finish({
+                    "status": result["status"],
+                    **response,
+                    "total_downloaded": result["file_count"],
+                    "unique_documents": result["unique_documents"],
+                    "variations": result["variations"],
+                    "engine": "http",
+                }, result["results"])
+            except Exception as e:
+                print(f"HTTP search engine failed, falling back to Selenium: {e}")
+
+        file_count = 0
+        results = []
+        variations = []
+        seen_instruments = SeenInstruments()
+
+        # The lease is returned to the pool (releasing file locks) when the block exits
+        with browser_pool.lease(file_dir) as driver, \
+                profile_run(driver, "search-document", file_number=file_number) as profile:
+            for name in party_names:
+                shards = _search_party_sharded(driver, name, township, search_from, to_date, site_url, file_dir,
+                                               seen_instruments, pdf_concurrency, progress, label_windows=narrowed)
+                records_found = any(shard["result"]["records_found"] for shard in shards)
+                found = merge_by_instrument([shard["result"]["results"] for shard in shards])
+                file_count += sum(shard["result"]["index_files"] for shard in shards) + len(found)
+                results.extend(found)
+
+                variations.append({
+                    "party_name": name,
+                    "status": "PDF_FOUND_SUCCESSFULLY" if records_found else "DATA_NOT_FOUND",
+                    "downloaded": len(found),
+                    "date_shards": len(shards),
+                    "truncated": any(shard["truncated"] for shard in shards),
+                })
+
+        found_any = any(v["status"] == "PDF_FOUND_SUCCESSFULLY" for v in variations)
+        body = {
+            "status": "PDF_FOUND_SUCCESSFULLY" if found_any else "DATA_NOT_FOUND",
+            **response,
+            "total_downloaded": file_count,
+            "unique_documents": len(results),
+            "variations": variations,
+            "engine": "selenium",
+        }
+        if payload.get("profile"):
+            body["profile"] = profile.report()
+        return finish(body, results)
+
+    except Exception as e:
+        return {"status": "ERROR", "message": str(e)}, 500
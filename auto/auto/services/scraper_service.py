@@ -1,26 +1,43 @@
 # confirmation
 import time
 import os
-import glob
+import threading
 import re
 import base64
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import Select, WebDriverWait
+from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.alert import Alert
 from selenium.common.exceptions import TimeoutException
 
-from utils.helpers import ALL_DOC_TYPES, wait_for_new_pdf, DEFAULT_SITE_URL
+from utils.helpers import ALL_DOC_TYPES, DEFAULT_SITE_URL, format_document_name
+from services.metrics import documents_downloaded_total, pdf_generation_seconds
+from services.profiler import traced, step, note_fallback
+from services.blob_service import BLOB_FETCH, fetch_blob
+from services.network_capture import start_result_capture, captured_result_rows, captured_result_counts
+from services.manifest_service import find_known_document, record_download
+from services.cdp_events import start_download_watch, wait_for_download
+from services.wait_service import wait_for_page_idle, is_page_idle, PAGE_IDLE_TIMEOUT
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Documents whose PDFs are generated at once in separate windows (1 = sequential)
+PDF_CONCURRENCY = int(os.getenv("PDF_CONCURRENCY", "1"))
+# How long a site's township dropdown options are reused before re-reading them (seconds)
+TOWNSHIP_CACHE_TTL = float(os.getenv("TOWNSHIP_CACHE_TTL", "3600"))
 
 # ======================================================
 # NAVIGATION
 # ======================================================
+@traced("open_site")
 def open_site(driver, site_url=None):
     if not site_url:
         site_url = DEFAULT_SITE_URL
         
     driver.get(site_url)
+    wait_for_page_idle(driver)
     
     # Check if we are already on a search page or need to click the tab
     try:
@@ -29,7 +46,7 @@ def open_site(driver, site_url=None):
         tabs = driver.find_elements(By.XPATH, "//a[contains(text(),'Town/Lot/Block')]")
         if tabs and tabs[0].is_displayed():
             tabs[0].click()
-            time.sleep(3)
+            wait_for_page_idle(driver)
         else:
             print("Town/Lot/Block tab not found or not visible, assuming direct search page or different county layout.")
     except Exception as e:
@@ -38,13 +55,19 @@ def open_site(driver, site_url=None):
 # ======================================================
 # SEARCH LOGIC (PARTY)
 # ======================================================
+@traced("perform_search")
 def perform_search(driver, party_name, township, from_date, to_date, site_url=None):
+    """
+    Run a party search and wait for the grid. Returns True if the site
+    truncated the result set (result-limit notice, or a captured response
+    reporting more matches than rows), so the caller can narrow the dates.
+    """
     if not site_url:
         site_url = DEFAULT_SITE_URL
     print("--- Starting perform_search (Service) ---")
     driver.get(site_url)
     wait = WebDriverWait(driver, 50)
-    time.sleep(4)
+    wait_for_page_idle(driver)
     
     # RETRY LOOP: Find Input (Switch Tab if needed)
     party_input_found = False
@@ -81,15 +104,16 @@ def perform_search(driver, party_name, township, from_date, to_date, site_url=No
             """)
             if not clicked:
                 # Fallback to XPath
+                note_fallback(driver, "party_tab_xpath")
                 driver.find_element(By.XPATH, "//a[contains(text(),'Party')]").click()
         except Exception as e:
             print(f"Tab click warning: {e}")
             
-        time.sleep(3) # Wait for digest cycle
+        wait_for_page_idle(driver) # Wait for digest cycle
 
     if not party_input_found:
         print("CRITICAL: Failed to locate Party Name input after 3 attempts. Aborting search form.")
-        return
+        return False
 
     # FILL FORM - HYBRID APPROACH (Angular + DOM)
     print(f"Filling form for Party: {party_name}")
@@ -138,6 +162,7 @@ def perform_search(driver, party_name, township, from_date, to_date, site_url=No
         # Fallback: DOM Typing if injection didn't explicitly succeed
         if "SUCCESS" not in injection_result:
             print("Applying DOM fallback...")
+            note_fallback(driver, "party_form_dom_typing", injection_result)
             party_input = driver.find_element(By.CSS_SELECTOR, "input[placeholder='Party Name']")
             if party_input.is_displayed():
                 party_input.click()
@@ -153,11 +178,10 @@ def perform_search(driver, party_name, township, from_date, to_date, site_url=No
                 (By.XPATH, "//input[contains(@class,'tree-checkbox')]")
             ))
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", all_checkbox)
-            time.sleep(0.5)
             if not all_checkbox.is_selected():
                 print("Clicking 'ALL' checkbox...")
                 driver.execute_script("arguments[0].click();", all_checkbox)
-                time.sleep(1) # Wait for auto-fill to happen
+                wait_for_page_idle(driver) # Wait for auto-fill to happen
             else:
                 print("'ALL' checkbox is already selected.")
                 
@@ -182,9 +206,10 @@ def perform_search(driver, party_name, township, from_date, to_date, site_url=No
 
     except Exception as e:
         print(f"Error during form filling: {repr(e)}")
-        return # Stop if filling failed
+        return False # Stop if filling failed
 
     # 3. Search
+    capture_mark = start_result_capture(driver)
     print("Executing Search via Angular...")
     try:
         # 1. Force Angular Search (Bypasses button click issues)
@@ -225,13 +250,15 @@ def perform_search(driver, party_name, township, from_date, to_date, site_url=No
         pass
 
     # Check for "Notice" modal regarding result limits
+    limit_notice = False
     try:
         modal_ok = WebDriverWait(driver, 5).until(
             EC.element_to_be_clickable((By.XPATH, "//button[@ng-click='modal_ok()']"))
         )
         print("Notice modal detected. Clicking OK...")
+        limit_notice = True
         driver.execute_script("arguments[0].click();", modal_ok)
-        time.sleep(2)
+        wait_for_page_idle(driver)
     except Exception:
         pass
     
@@ -273,7 +300,18 @@ def perform_search(driver, party_name, township, from_date, to_date, site_url=No
     except TimeoutException:
         print("Search timed out or no results/message found.")
 
+    # Truncated when the site says so, or when its response reports more
+    # matches than rows it sent; the grid's button count says nothing either way
+    counts = captured_result_counts(driver, capture_mark)
+    total, returned = counts if counts else (None, None)
+    truncated = limit_notice or (total is not None and total > returned)
+    if truncated:
+        print(f"Result set truncated: returned {returned if returned is not None else 'some'} of "
+              f"{total if total is not None else 'more'} records.")
+    return truncated
+
 
+@traced("check_if_records_exist")
 def check_if_records_exist(driver):
     """
     Returns True if records were found (buttons exist), 
@@ -294,71 +332,133 @@ def check_if_records_exist(driver):
 # SEARCH LOGIC (TOWN/LOT/BLOCK)
 # ======================================================
 
-def fill_search_form(driver, township, lot, block, party_name, from_date, to_date):
+# Township <select> options per site: {site_url: {"options": [(value, text)], "expires": ts}}
+_township_options = {}
+_township_lock = threading.Lock()
+
+# Waits (async) for the township dropdown to populate, then returns [[value, text], ...]
+_TOWN_OPTIONS_JS = """
+var done = arguments[arguments.length - 1], end = Date.now() + arguments[0] * 1000;
+(function poll() {
+    var sel = document.querySelector("select[ng-model='documentService.SearchCriteria.searchCommonTown']");
+    if (sel && sel.options.length > 1) {
+        done(Array.prototype.map.call(sel.options, function(o) {
+            return [o.value || '', (o.text || '').replace(/\\u00a0/g, ' ')];
+        }));
+    } else if (Date.now() > end) {
+        done(null);
+    } else {
+        setTimeout(poll, 100);
+    }
+})();
+"""
+
+# Waits (async) for the dropdown, selects the option with value arguments[0] and fires change.
+# Returns false if no such option exists.
+_TOWN_SELECT_JS = """
+var value = arguments[0], done = arguments[arguments.length - 1], end = Date.now() + arguments[1] * 1000;
+(function poll() {
+    var sel = document.querySelector("select[ng-model='documentService.SearchCriteria.searchCommonTown']");
+    if (sel && sel.options.length > 1) {
+        for (var i = 0; i < sel.options.length; i++) {
+            if (sel.options[i].value === value) {
+                sel.options[i].selected = true;
+                sel.options[i].dispatchEvent(new Event('change', { bubbles: true }));
+                sel.dispatchEvent(new Event('change', { bubbles: true }));
+                return done(true);
+            }
+        }
+        done(false);
+    } else if (Date.now() > end) {
+        done(false);
+    } else {
+        setTimeout(poll, 100);
+    }
+})();
+"""
+
+
+def match_township(options, township):
+    """
+    Pick the option value for `township`: exact value, then exact text, then
+    partial match. Returns (value, how) or (None, None).
+    """
+    target = township.strip().upper()
+    normalized = [(v, (v or "").strip().upper(), (t or "").strip().upper()) for v, t in options]
+    for value, val, _ in normalized:
+        if val == target:
+            return value, "value"
+    for value, val, text in normalized:
+        if text == target:
+            return value, "text"
+    for value, val, text in normalized:
+        if target in text or target in val:
+            return value, "partial"
+    return None, None
+
+
+def get_township_options(driver, site_url=None, refresh=False):
+    """
+    The township dropdown's [(value, text)] for a site, read in one script
+    call and cached for TOWNSHIP_CACHE_TTL seconds.
+    """
+    key = site_url or DEFAULT_SITE_URL
+    with _township_lock:
+        cached = _township_options.get(key)
+        if cached and not refresh and cached["expires"] > time.time():
+            return cached["options"]
+
+    options = driver.execute_async_script(_TOWN_OPTIONS_JS, 25)
+    if not options:
+        print("Warning: Township dropdown options might not have loaded.")
+        return []
+    options = [tuple(o) for o in options]
+    with _township_lock:
+        _township_options[key] = {"options": options, "expires": time.time() + TOWNSHIP_CACHE_TTL}
+    return options
+
+
+def invalidate_township_options(site_url=None):
+    with _township_lock:
+        _township_options.pop(site_url or DEFAULT_SITE_URL, None)
+
+
+@traced("select_township")
+def select_township(driver, township, site_url=None):
+    """
+    Select `township` in the Town/Lot/Block dropdown. With a warm cache this
+    is a single script call; a stale cache is refreshed once before failing.
+    """
+    for refresh in (False, True):
+        options = get_township_options(driver, site_url, refresh=refresh)
+        value, how = match_township(options, township)
+        if value is not None and driver.execute_async_script(_TOWN_SELECT_JS, value, 25):
+            if how == "partial":
+                print(f"Partial township match: '{value}' for '{township}'")
+                note_fallback(driver, "partial_township_match", f"{township} -> {value}")
+            return value
+        invalidate_township_options(site_url)
+        if not refresh:
+            note_fallback(driver, "township_cache_refresh", township)
+
+    # Log available options for debugging
+    available = [f"{t.strip()}({v})" for v, t in options[:10]]
+    raise Exception(f"Township not found in dropdown: {township}. Available (first 10): {available}")
+
+
+@traced("fill_search_form")
+def fill_search_form(driver, township, lot, block, party_name, from_date, to_date, site_url=None):
     wait = WebDriverWait(driver, 25)
 
     print("Navigating to Town/Lot/Block tab...")
     try:
         tab = wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(text(),'Town/Lot/Block')]")))
         driver.execute_script("arguments[0].click();", tab)
-        time.sleep(1)
+        wait_for_page_idle(driver)
     except Exception as e:
         print(f"Warning: Could not click Town/Lot/Block tab: {e}")
 
-    # Wait for options to populate
-    def options_populated(d):
-        sel = d.find_element(By.XPATH, "//select[@ng-model='documentService.SearchCriteria.searchCommonTown']")
-        return len(Select(sel).options) > 1
-
-    try:
-        wait.until(options_populated)
-    except:
-        print("Warning: Township dropdown options might not have loaded.")
-
-    town_select = driver.find_element(By.XPATH, "//select[@ng-model='documentService.SearchCriteria.searchCommonTown']")
-    select = Select(town_select)
-
-    matched = False
-    target = township.strip().upper()
-    
-    # Attempt 1: Select by value directly (often more reliable in Angular)
-    try:
-        option_by_val = town_select.find_element(By.XPATH, f"./option[@value='{target}']")
-        driver.execute_script("arguments[0].selected = true; arguments[0].dispatchEvent(new Event('change', { bubbles: true }));", option_by_val)
-        driver.execute_script("arguments[1].dispatchEvent(new Event('change', { bubbles: true }));", option_by_val, town_select)
-        matched = True
-        # print(f"Selected '{target}' by value.")
-    except:
-        pass
-
-    if not matched:
-        # Attempt 2: Iterate through options (Selenium Select)
-        for option in select.options:
-            val = (option.get_attribute("value") or "").strip().upper()
-            text = option.text.replace("\u00a0", " ").strip().upper()
-            
-            if text == target or val == target:
-                driver.execute_script("arguments[0].selected = true;", option)
-                driver.execute_script("arguments[0].dispatchEvent(new Event('change', { bubbles: true }));", town_select)
-                matched = True
-                break
-    
-    if not matched:
-        # Fallback 3: Partial match
-        for option in select.options:
-             text = option.text.replace("\u00a0", " ").strip().upper()
-             val = (option.get_attribute("value") or "").strip().upper()
-             if target in text or target in val:
-                 # print(f"Partial match found: '{text}'/v:'{val}' for target '{target}'")
-                 driver.execute_script("arguments[0].selected = true;", option)
-                 driver.execute_script("arguments[0].dispatchEvent(new Event('change', { bubbles: true }));", town_select)
-                 matched = True
-                 break
-
-    if not matched:
-        # Log available options for debugging
-        available = [f"{o.text.strip()}({o.get_attribute('value')})" for o in select.options[:10]]
-        raise Exception(f"Township not found in dropdown: {township}. Available (first 10): {available}")
+    select_township(driver, township, site_url)
 
 
     # --- LOT & BLOCK ---
@@ -417,6 +517,7 @@ def fill_search_form(driver, township, lot, block, party_name, from_date, to_dat
         print(f"Date range error: {e}")
 
     # --- SEARCH ---
+    start_result_capture(driver)
     print("Executing Search...")
     try:
         search_btn = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[@ng-click='runSearch(true)']")))
@@ -425,9 +526,49 @@ def fill_search_form(driver, township, lot, block, party_name, from_date, to_dat
     except Exception as e:
         print(f"Search button click failed: {e}")
         # Fallback search trigger
+        note_fallback(driver, "lot_block_search_scope_call", str(e))
         driver.execute_script("var btn = document.querySelector('button[ng-click=\"runSearch(true)\"]'); if(btn){ angular.element(btn).scope().runSearch(true); }")
 
-    time.sleep(6)
+    wait_for_page_idle(driver)
+
+
+@traced("reset_search_form")
+def reset_search_form(driver):
+    """
+    Bring an already loaded site back to an empty Town/Lot/Block form without
+    reloading the SPA, so a batch can run the next search on the same page.
+    Returns False if the form could not be reached (caller should open_site again).
+    """
+    try:
+        driver.execute_script("""
+            // Dismiss any notice/document modal left open by the previous item
+            document.querySelectorAll("button[ng-click='modal_ok()'], .modal button.close").forEach(function(b) {
+                if (b.offsetWidth > 0) { b.click(); }
+            });
+
+            // Clear the fields fill_search_form types into
+            var selectors = ['input[placeholder="Lot"]', 'input[placeholder="Block"]', 'input[name="partyName"]'];
+            selectors.forEach(function(sel) {
+                var el = document.querySelector(sel);
+                if (el) {
+                    el.value = '';
+                    try { angular.element(el).triggerHandler('input'); } catch(e) {}
+                }
+            });
+        """)
+
+        tab = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//a[contains(text(),'Town/Lot/Block')]"))
+        )
+        driver.execute_script("arguments[0].click();", tab)
+        wait_for_page_idle(driver)
+
+        return bool(driver.find_elements(
+            By.XPATH, "//select[@ng-model='documentService.SearchCriteria.searchCommonTown']"
+        ))
+    except Exception as e:
+        print(f"Could not reset search form in place: {e}")
+        return False
 
 
 # ======================================================
@@ -456,21 +597,82 @@ def extract_type_and_instrument(driver, index=None):
     except:
         instrument = ""
 
-    # If both are valid, return the formatted name
-    if doc_type and instrument:
-        return f"{doc_type}_{instrument}".replace("/", "_").replace(" ", "_")
-    
-    # Check if we have at least one
-    if doc_type or instrument:
-         combined = f"{doc_type}{instrument}".strip().replace("/", "_").replace(" ", "_")
-         if combined:
-             return combined
+    return format_document_name(doc_type, instrument, index)
+
+def read_document_fields(driver):
+    """
+    (doc_type, instrument) of the document currently open in the viewer.
+    """
+    doc_type = driver.execute_script(
+        "return document.evaluate(\"//td[text()='Type:']/following-sibling::td\", document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue?.innerText || ''"
+    ).strip()
+    instrument = driver.execute_script(
+        "return document.evaluate(\"//td[contains(text(),'Instrument')]/following-sibling::td\", document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue?.innerText || ''"
+    ).strip()
+    return doc_type, instrument
+
 
-    # Fallback if both are empty/missing
-    idx_str = f"_{index}" if index is not None else ""
-    return f"Document{idx_str}_{int(time.time())}"
+@traced("download")
+def save_document(driver, view_link, download_dir, final_path):
+    """
+    Save the generated document behind a blob: "View" link to final_path.
+    Reads the blob from the page when BLOB_FETCH is on (no download manager,
+    no rename); otherwise, or if that fails, clicks the link and renames the
+    downloaded file.
+    """
+    if BLOB_FETCH:
+        try:
+            fetch_blob(driver, view_link.get_attribute("href"), final_path)
+            documents_downloaded_total.inc()
+            return final_path
+        except Exception as e:
+            print(f"Blob fetch failed, falling back to browser download: {e}")
+            note_fallback(driver, "blob_fetch_to_browser_download", str(e))
+
+    download_watch = start_download_watch(driver, download_dir)
+    view_link.click()
+    pdf_path = wait_for_download(driver, download_dir, download_watch)
+    os.rename(pdf_path, final_path)
+    documents_downloaded_total.inc()
+    return final_path
+
+
+class SeenInstruments:
+    """
+    Instrument numbers already taken in one search session. Shard threads
+    share it, so checking and adding happen under one lock.
+    """
 
-def download_all_pdfs(driver, download_dir):
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def claim(self, instrument):
+        """True if the caller is the first to take this instrument."""
+        with self._lock:
+            if instrument in self._seen:
+                return False
+            self._seen.add(instrument)
+            return True
+
+    def release(self, instrument):
+        """Give back a claim whose download failed, so a later search can retry it."""
+        with self._lock:
+            self._seen.discard(instrument)
+
+    def __contains__(self, instrument):
+        with self._lock:
+            return instrument in self._seen
+
+
+@traced("download_all_pdfs")
+def download_all_pdfs(driver, download_dir, progress=None, seen_instruments=None, concurrency=1, site_url=None):
+    """
+    Download every result on the current results page.
+    seen_instruments (a SeenInstruments shared across searches) skips
+    instruments that an earlier search in the same session already downloaded.
+    concurrency > 1 generates PDFs in parallel windows (download_results_concurrently).
+    """
     wait = WebDriverWait(driver, 10) 
     results = []
     
@@ -487,9 +689,24 @@ def download_all_pdfs(driver, download_dir):
         print("No results found in download_all_pdfs")
         return []
 
+    if concurrency > 1:
+        return download_results_concurrently(driver, download_dir, site_url, concurrency,
+                                             progress=progress, seen_instruments=seen_instruments)
+
     print(f"Found {len(view_buttons)} documents to download.")
+    total = len(view_buttons)
+
+    # Result rows captured from the search XHR; the Details view is then only opened for a PDF
+    captured_rows = captured_result_rows(driver, PARTY_VIEW_XPATH)
+    if captured_rows:
+        print("Naming documents from the captured search response.")
+    else:
+        note_fallback(driver, "details_view_naming")
+    if progress:
+        progress(0, total)
 
     for index in range(len(view_buttons)):
+        claimed = None
         try:
             # Re-find elements to avoid stale element exception
             view_buttons = driver.find_elements(
@@ -500,41 +717,68 @@ def download_all_pdfs(driver, download_dir):
                 break
 
             print(f"Processing document {index + 1}...")
-            driver.execute_script("arguments[0].click();", view_buttons[index])
-            time.sleep(2)
+            step(driver, f"document {index + 1}: view")
+            row = captured_rows[index] if captured_rows else None
+            if row:
+                doc_type_text, instrument_text = row["doc_type"], row["instrument"]
+                filename = format_document_name(doc_type_text, instrument_text, index)
+            else:
+                driver.execute_script("arguments[0].click();", view_buttons[index])
+                wait_for_page_idle(driver)
 
-            # Using shared extraction logic to match /scrape endpoint ("rename as scrape")
-            # This extracts from the Details view which we just opened
-            filename = extract_type_and_instrument(driver, index)
+                # Using shared extraction logic to match /scrape endpoint ("rename as scrape")
+                # This extracts from the Details view which we just opened
+                filename = extract_type_and_instrument(driver, index)
+
+                # Extract doc_type and instrument separately for JSON response and dedupe
+                # (We could parse filename, but getting from DOM is safer for the response fields)
+                try:
+                    doc_type_text, instrument_text = read_document_fields(driver)
+                except:
+                    doc_type_text = "Unknown"
+                    instrument_text = "Unknown"
 
             base_name = filename
             extension = ".pdf"
             final_path = os.path.join(download_dir, f"{base_name}{extension}")
 
+            known_instrument = instrument_text and instrument_text != "Unknown"
+            # Claimed until it is on disk; another shard then skips it instead of downloading it too
+            if seen_instruments is not None and known_instrument:
+                if not seen_instruments.claim(instrument_text):
+                    print(f"Instrument {instrument_text} already downloaded in this session, skipping.")
+                    continue
+                claimed = instrument_text
+
             # Check for duplicates before downloading
             if os.path.exists(final_path):
                  print(f"Skipping duplicate file: {final_path}")
+                 claimed = None
                  continue
 
-            # Extract doc_type and instrument separately for JSON response only
-            # (We could parse filename, but getting from DOM is safer for the response fields)
-            try:
-                doc_type_text = driver.execute_script(
-                     "return document.evaluate(\"//td[text()='Type:']/following-sibling::td\", document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue?.innerText || ''"
-                ).strip()
-                instrument_text = driver.execute_script(
-                     "return document.evaluate(\"//td[contains(text(),'Instrument')]/following-sibling::td\", document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue?.innerText || ''"
-                ).strip()
-            except:
-                doc_type_text = "Unknown"
-                instrument_text = "Unknown"
-
-            existing_files = set(glob.glob(os.path.join(download_dir, "*.pdf")))
-
+            # Already fetched for this file number (possibly into a sibling folder, now linked in)
+            known = known_instrument and find_known_document(download_dir, instrument_text, doc_type_text)
+            if known:
+                print(f"Instrument {instrument_text} is in the download manifest, skipping.")
+                results.append({
+                    "index": index + 1,
+                    "Type": doc_type_text,
+                    "Instrument No": instrument_text,
+                    "pdf_file": os.path.basename(known)
+                })
+                claimed = None
+                continue
+
+            if row:
+                driver.execute_script("arguments[0].click();", view_buttons[index])
+                wait_for_page_idle(driver)
+
+            step(driver, f"document {index + 1}: pdf")
             pdf_btn = wait.until(
                 EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'PDF / Print All Pages')]"))
             )
             pdf_btn.click()
+            generation_started = time.time()
             print("Clicked 'PDF / Print All Pages', waiting for generation...")
 
             # Check for "Large Document" Notice modal (e.g. >40 pages)
@@ -544,7 +788,7 @@ def download_all_pdfs(driver, download_dir):
                 )
                 print("Large Document modal detected. Clicking OK...")
                 driver.execute_script("arguments[0].click();", large_doc_ok)
-                time.sleep(2)
+                wait_for_page_idle(driver)
             except Exception:
                 pass
 
@@ -553,23 +797,18 @@ def download_all_pdfs(driver, download_dir):
             view_link = wait_long.until(
                 EC.element_to_be_clickable((By.XPATH, "//a[starts-with(@href,'blob:')]"))
             )
-            view_link.click()
+            pdf_generation_seconds.observe(time.time() - generation_started)
 
-            pdf_path = wait_for_new_pdf(download_dir, existing_files)
-
-            # Rename using the consistent filename format
-            # base_name = filename # Already defined above
-            # extension = ".pdf" # Already defined above
-            counter = 1
-            # final_path = os.path.join(download_dir, f"{base_name}{extension}") # Already defined above
-            
             # Handle duplicates if file exists (this is for files that might have been downloaded
             # by another process or if the initial check was insufficient, e.g., race condition)
+            counter = 1
             while os.path.exists(final_path):
                  final_path = os.path.join(download_dir, f"{base_name}_{counter}{extension}")
                  counter += 1
-            
-            os.rename(pdf_path, final_path)
+
+            save_document(driver, view_link, download_dir, final_path)
+            if known_instrument:
+                record_download(download_dir, instrument_text, doc_type_text, final_path)
             print(f"Downloaded and renamed: {os.path.basename(final_path)}")
 
             results.append({
@@ -578,6 +817,7 @@ def download_all_pdfs(driver, download_dir):
                 "Instrument No": instrument_text,
                 "pdf_file": os.path.basename(final_path)
             })
+            claimed = None
             
             # Close details/modal if needed or just go back? 
             # The loop re-clicks view buttons which are on the main list. 
@@ -592,10 +832,16 @@ def download_all_pdfs(driver, download_dir):
         except Exception as e:
             print(f"Error processing record {index}: {e}")
             continue
+        finally:
+            if claimed:
+                seen_instruments.release(claimed)
+            if progress:
+                progress(index + 1, total)
 
     return results
 
-def process_all_views(driver, download_dir):
+@traced("process_all_views")
+def process_all_views(driver, download_dir, progress=None, concurrency=1, site_url=None):
     wait = WebDriverWait(driver, 30)
     file_count = 0
 
@@ -618,13 +864,49 @@ def process_all_views(driver, download_dir):
     if not view_buttons:
         return 0
 
+    if concurrency > 1:
+        # Existing files still get a counter suffix, as in the sequential loop below
+        results = download_results_concurrently(driver, download_dir, site_url, concurrency,
+                                                 view_xpath=LOT_VIEW_XPATH, blob_xpath=LOT_BLOB_XPATH,
+                                                 skip_existing=False, progress=progress)
+        return len(results)
+
+    total = len(view_buttons)
+    if progress:
+        progress(0, total)
+
+    captured_rows = captured_result_rows(driver, LOT_VIEW_XPATH)
+    if not captured_rows:
+        note_fallback(driver, "details_view_naming")
+
     for index in range(len(view_buttons)):
         view_buttons = driver.find_elements(By.XPATH, "//button[normalize-space()='View']")
+        step(driver, f"document {index + 1}: view")
+        row = captured_rows[index] if captured_rows else None
+        if row and find_known_document(download_dir, row["instrument"], row["doc_type"]):
+            print(f"Instrument {row['instrument']} is in the download manifest, skipping.")
+            file_count += 1
+            if progress:
+                progress(index + 1, total)
+            continue
+
         driver.execute_script("arguments[0].click();", view_buttons[index])
+        wait_for_page_idle(driver)
 
         # Extract filename and resolve duplicates with counter suffix
         try:
-            filename = extract_type_and_instrument(driver, index)
+            if row:
+                doc_type_text, instrument_text = row["doc_type"], row["instrument"]
+                filename = format_document_name(doc_type_text, instrument_text, index)
+            else:
+                doc_type_text, instrument_text = read_document_fields(driver)
+                if find_known_document(download_dir, instrument_text, doc_type_text):
+                    print(f"Instrument {instrument_text} is in the download manifest, skipping.")
+                    file_count += 1
+                    if progress:
+                        progress(index + 1, total)
+                    continue
+                filename = extract_type_and_instrument(driver, index)
             base_name = filename
             extension = ".pdf"
             final_path = os.path.join(download_dir, f"{base_name}{extension}")
@@ -638,9 +920,11 @@ def process_all_views(driver, download_dir):
             print(f"Error determining filename: {e}")
             continue
 
+        step(driver, f"document {index + 1}: pdf")
         wait.until(EC.element_to_be_clickable(
             (By.XPATH, "//button[contains(text(),'PDF / Print All Pages')]")
         )).click()
+        generation_started = time.time()
 
         # Check for "Large Document" Notice modal (e.g. >40 pages)
         try:
@@ -649,26 +933,308 @@ def process_all_views(driver, download_dir):
             )
             print("Large Document modal detected. Clicking OK...")
             driver.execute_script("arguments[0].click();", large_doc_ok)
-            time.sleep(2)
+            wait_for_page_idle(driver)
         except Exception:
             pass
 
-        existing_files = set(glob.glob(os.path.join(download_dir, "*.pdf")))
-
         # User reported ~35s delay, setting timeout to 60s to be safe
         wait_long = WebDriverWait(driver, 60)
-        wait_long.until(EC.element_to_be_clickable(
+        view_link = wait_long.until(EC.element_to_be_clickable(
             (By.XPATH, "//a[starts-with(@href,'blob:') and text()='View']")
-        )).click()
-
-        pdf_path = wait_for_new_pdf(download_dir, existing_files)
-
-        os.rename(pdf_path, final_path)
+        ))
+        pdf_generation_seconds.observe(time.time() - generation_started)
+        save_document(driver, view_link, download_dir, final_path)
+        record_download(download_dir, instrument_text, doc_type_text, final_path)
         file_count += 1
-        time.sleep(2)
+        if progress:
+            progress(index + 1, total)
+        wait_for_page_idle(driver)
 
     return file_count
 
+# ======================================================
+# CONCURRENT DOWNLOADS (MULTI-WINDOW)
+# ======================================================
+# Resolves the scope that owns documentService on any BrowserView page
+_DOCUMENT_SCOPE_JS = """
+    function documentScope() {
+        var candidates = [
+            document.querySelector("button[ng-click*='runSearch']"),
+            document.querySelector('div[ng-view]'),
+            document.body
+        ];
+        for (var i = 0; i < candidates.length; i++) {
+            if (!candidates[i]) continue;
+            var scope = angular.element(candidates[i]).scope();
+            if (scope && scope.documentService) return scope;
+        }
+        return null;
+    }
+"""
+
+PARTY_VIEW_XPATH = "//button[contains(@ng-click,'fetchDocument')]"
+PARTY_BLOB_XPATH = "//a[starts-with(@href,'blob:')]"
+LOT_VIEW_XPATH = "//button[normalize-space()='View']"
+LOT_BLOB_XPATH = "//a[starts-with(@href,'blob:') and text()='View']"
+PDF_GENERATION_TIMEOUT = 60
+# Seconds between polls when no window finished or started anything
+PDF_POLL_INTERVAL = 0.5
+# Overall limit for one concurrent download run; 0 derives it from the document count
+PDF_BATCH_TIMEOUT = float(os.getenv("PDF_BATCH_TIMEOUT", "0"))
+
+
+def _replicate_search(driver, site_url, criteria_json, view_xpath, expected_count):
+    """
+    Open a new window on the same session and re-run the main window's search
+    there by copying documentService.SearchCriteria. Returns the handle or None.
+    """
+    driver.switch_to.new_window("window")
+    handle = driver.current_window_handle
+    try:
+        driver.get(site_url)
+        wait_for_page_idle(driver)
+        driver.execute_script(_DOCUMENT_SCOPE_JS + """
+            var scope = documentScope();
+            var criteria = JSON.parse(arguments[0]);
+            scope.$apply(function() {
+                angular.extend(scope.documentService.SearchCriteria, criteria);
+                var btn = document.querySelector("button[ng-click*='runSearch']");
+                var searchScope = btn ? angular.element(btn).scope() : scope;
+                searchScope.runSearch(true);
+            });
+        """, criteria_json)
+
+        # Result-limit notice, same as perform_search
+        for ok in driver.find_elements(By.XPATH, "//button[@ng-click='modal_ok()']"):
+            if ok.is_displayed():
+                driver.execute_script("arguments[0].click();", ok)
+
+        WebDriverWait(driver, 50).until(lambda d: len(d.find_elements(By.XPATH, view_xpath)) >= expected_count)
+        wait_for_page_idle(driver)
+        return handle
+    except Exception as e:
+        print(f"Could not replicate search in worker window: {e}")
+        driver.close()
+        return None
+
+
+def _start_generation(driver, index, view_xpath, download_dir, skip_existing, seen_instruments, reserved, row=None):
+    """
+    Open result `index` in the current window and click "PDF / Print All Pages".
+    row (from the captured search response) names the document without
+    opening its Details view first.
+    Returns a pending job, a finished {"known": True} job when the manifest
+    already has the document, or None if the document was skipped.
+    """
+    view_buttons = driver.find_elements(By.XPATH, view_xpath)
+    if index >= len(view_buttons):
+        return None
+    if row:
+        doc_type_text, instrument_text = row["doc_type"], row["instrument"]
+        filename = format_document_name(doc_type_text, instrument_text, index)
+    else:
+        driver.execute_script("arguments[0].click();", view_buttons[index])
+        wait_for_page_idle(driver)
+        filename = extract_type_and_instrument(driver, index)
+        doc_type_text, instrument_text = read_document_fields(driver)
+
+    # Claim it now so another window or shard does not generate the same document
+    if seen_instruments is not None and instrument_text and not seen_instruments.claim(instrument_text):
+        print(f"Instrument {instrument_text} already downloaded in this session, skipping.")
+        return None
+
+    known = find_known_document(download_dir, instrument_text, doc_type_text)
+    if known:
+        print(f"Instrument {instrument_text} is in the download manifest, skipping.")
+        return {"index": index, "final_path": known, "doc_type": doc_type_text,
+                "instrument": instrument_text, "known": True}
+
+    final_path = os.path.join(download_dir, f"{filename}.pdf")
+    if os.path.exists(final_path) or final_path in reserved:
+        if skip_existing:
+            print(f"Skipping duplicate file: {final_path}")
+            return None
+        counter = 1
+        while os.path.exists(final_path) or final_path in reserved:
+            final_path = os.path.join(download_dir, f"{filename}_{counter}.pdf")
+            counter += 1
+
+    try:
+        if row:
+            driver.execute_script("arguments[0].click();", view_buttons[index])
+            wait_for_page_idle(driver)
+        WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'PDF / Print All Pages')]"))
+        ).click()
+        wait_for_page_idle(driver)
+    except Exception:
+        _release_instrument(seen_instruments, instrument_text)
+        raise
+    reserved.add(final_path)
+
+    # "Large Document" notice (e.g. >40 pages)
+    for ok in driver.find_elements(By.XPATH, "//button[@ng-click='modal_ok()']"):
+        if ok.is_displayed():
+            print("Large Document modal detected. Clicking OK...")
+            driver.execute_script("arguments[0].click();", ok)
+
+    print(f"Generation started for document {index + 1} in window {driver.current_window_handle[-6:]}")
+    return {
+        "index": index,
+        "final_path": final_path,
+        "doc_type": doc_type_text,
+        "instrument": instrument_text,
+        "started": time.time(),
+    }
+
+
+def _release_instrument(seen_instruments, instrument_text):
+    if seen_instruments is not None and instrument_text:
+        seen_instruments.release(instrument_text)
+
+
+@traced("download_results_concurrently")
+def download_results_concurrently(driver, download_dir, site_url, concurrency, view_xpath=PARTY_VIEW_XPATH,
+                                  blob_xpath=PARTY_BLOB_XPATH, skip_existing=True, progress=None,
+                                  seen_instruments=None):
+    """
+    Generate several documents' PDFs at once from separate windows of the same
+    session. Each window holds a copy of the search results; windows are polled
+    round-robin and whichever finishes generating is downloaded and handed the
+    next result. Files are named exactly like the sequential path.
+    """
+    site_url = site_url or DEFAULT_SITE_URL
+    main_window = driver.current_window_handle
+    total = len(driver.find_elements(By.XPATH, view_xpath))
+    if not total:
+        return []
+
+    # Result rows captured from the main window's search XHR (the other windows
+    # list the same results in the same order); Details is then only opened for a PDF
+    captured_rows = captured_result_rows(driver, view_xpath)
+    if not captured_rows:
+        note_fallback(driver, "details_view_naming")
+
+    criteria_json = driver.execute_script(_DOCUMENT_SCOPE_JS + """
+        var scope = documentScope();
+        return scope ? angular.toJson(scope.documentService.SearchCriteria) : null;
+    """)
+
+    handles = [main_window]
+    if criteria_json:
+        for _ in range(min(concurrency, total) - 1):
+            handle = _replicate_search(driver, site_url, criteria_json, view_xpath, total)
+            if handle:
+                handles.append(handle)
+    print(f"Generating {total} documents across {len(handles)} windows.")
+
+    slots = {handle: None for handle in handles}
+    reserved = set()
+    results = []
+    next_index = 0
+    done = 0
+    # By default every document gets PDF_GENERATION_TIMEOUT, one window's share at a time, plus a round of slack
+    rounds = -(-total // len(handles)) + 1
+    deadline = time.time() + (PDF_BATCH_TIMEOUT or rounds * (PDF_GENERATION_TIMEOUT + 30))
+    if progress:
+        progress(0, total)
+
+    try:
+        while next_index < total or any(slots.values()):
+            if time.time() > deadline:
+                pending = [job for job in slots.values() if job]
+                print(f"Concurrent downloads passed their deadline; giving up on {len(pending)} generating "
+                      f"and {total - next_index} unstarted documents.")
+                for job in pending:
+                    _release_instrument(seen_instruments, job["instrument"])
+                done = total
+                if progress:
+                    progress(done, total)
+                break
+
+            progressed = False
+            for handle in handles:
+                job = slots[handle]
+                if job is None and next_index >= total:
+                    continue  # idle window, nothing left to hand it
+                driver.switch_to.window(handle)
+
+                if job is None:
+                    progressed = True
+                    index = next_index
+                    next_index += 1
+                    try:
+                        row = captured_rows[index] if captured_rows and index < len(captured_rows) else None
+                        slots[handle] = _start_generation(driver, index, view_xpath, download_dir,
+                                                          skip_existing, seen_instruments, reserved, row)
+                    except Exception as e:
+                        print(f"Error starting record {index}: {e}")
+                    job = slots[handle]
+                    if job and job.get("known"):
+                        results.append({
+                            "index": job["index"] + 1,
+                            "Type": job["doc_type"],
+                            "Instrument No": job["instrument"],
+                            "pdf_file": os.path.basename(job["final_path"])
+                        })
+                        slots[handle] = None
+                    if slots[handle] is None:
+                        done += 1
+                        if progress:
+                            progress(done, total)
+                    continue
+
+                links = [l for l in driver.find_elements(By.XPATH, blob_xpath) if l.is_displayed()]
+                if not links:
+                    if time.time() - job["started"] > PDF_GENERATION_TIMEOUT:
+                        progressed = True
+                        print(f"PDF generation timed out for record {job['index']}")
+                        _release_instrument(seen_instruments, job["instrument"])
+                        reserved.discard(job["final_path"])
+                        slots[handle] = None
+                        done += 1
+                        if progress:
+                            progress(done, total)
+                    continue
+
+                progressed = True
+                pdf_generation_seconds.observe(time.time() - job["started"])
+                try:
+                    save_document(driver, links[0], download_dir, job["final_path"])
+                    record_download(download_dir, job["instrument"], job["doc_type"], job["final_path"])
+                    print(f"Downloaded and renamed: {os.path.basename(job['final_path'])}")
+                    results.append({
+                        "index": job["index"] + 1,
+                        "Type": job["doc_type"],
+                        "Instrument No": job["instrument"],
+                        "pdf_file": os.path.basename(job["final_path"])
+                    })
+                except Exception as e:
+                    print(f"Error downloading record {job['index']}: {e}")
+                    _release_instrument(seen_instruments, job["instrument"])
+                    reserved.discard(job["final_path"])
+                slots[handle] = None
+                done += 1
+                if progress:
+                    progress(done, total)
+
+            # Nothing finished or started this pass: every busy window is still generating
+            if not progressed:
+                time.sleep(PDF_POLL_INTERVAL)
+    finally:
+        for handle in handles[1:]:
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
+        driver.switch_to.window(main_window)
+
+    results.sort(key=lambda r: r["index"])
+    return results
+
+
+@traced("save_results_as_pdf")
 def save_results_as_pdf(driver, download_dir, party_name):
     print("--- process start save_results_as_pdf ---")
     try:
@@ -731,13 +1297,13 @@ def save_results_as_pdf(driver, download_dir, party_name):
             
             # Ensure in view
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", print_btn)
-            time.sleep(1)
             
             print("Found Print Results button. Attempting JS Click...")
             driver.execute_script("arguments[0].click();", print_btn)
             
         except Exception as e:
             print(f"Primary Print Results click failed: {e}")
+            note_fallback(driver, "generic_print_results_click", str(e))
             # Try to find any element with text 'Print Results' (button, a, span)
             try:
                  print("Trying generic text match via JS...")
@@ -752,7 +1318,13 @@ def save_results_as_pdf(driver, download_dir, party_name):
             # Let's proceed to try printing anyway.
 
         # 3. Check for new window
-        time.sleep(3) # Wait for window open or DOM update
+        # Wait for window open or DOM update, whichever settles first
+        try:
+            WebDriverWait(driver, PAGE_IDLE_TIMEOUT, poll_frequency=0.2).until(
+                lambda d: (set(d.window_handles) - existing_windows) or is_page_idle(d)
+            )
+        except TimeoutException:
+            pass
         new_windows = set(driver.window_handles) - existing_windows
         
         if new_windows:
@@ -0,0 +1,173 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from services.manifest_service import place_file, record_download
+from utils.helpers import BASE_DIR
+
+# ======================================================
+# CONFIG
+# ======================================================
+SEARCH_CACHE = os.getenv("SEARCH_CACHE", "1") == "1"
+SEARCH_CACHE_DB_PATH = os.getenv("SEARCH_CACHE_DB_PATH", os.path.join(BASE_DIR, "search_cache.db"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(6 * 3600)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+
+# Response keys that describe the request or the run rather than the search result
+_VOLATILE_KEYS = ("index", "file_number", "profile", "incremental", "cache")
+
+
+def cache_key(site_url, kind, criteria, from_date, to_date):
+    """Stable key for (site, search type, normalized criteria, date window)."""
+    normalized = [str(c or "").strip().upper() for c in criteria]
+    raw = json.dumps([(site_url or "").rstrip("/").lower(), kind, normalized, from_date, to_date])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ======================================================
+# CACHE
+# ======================================================
+class SearchCache:
+    """
+    Finished search results shared across requests: the response body plus
+    the documents it left on disk. Entries expire after SEARCH_CACHE_TTL
+    seconds; beyond SEARCH_CACHE_MAX_ENTRIES the least recently used go.
+    """
+
+    def __init__(self, db_path=SEARCH_CACHE_DB_PATH, ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._lock:
+            if self._ready:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS search_cache (
+                        key TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        body TEXT NOT NULL,
+                        files TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_used_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_used ON search_cache (last_used_at)")
+            self._ready = True
+
+    def get(self, key):
+        self._init_db()
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM search_cache WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            if row["created_at"] + self.ttl < now:
+                conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE search_cache SET last_used_at = ? WHERE key = ?", (now, key))
+        return {
+            "body": json.loads(row["body"]),
+            "files": json.loads(row["files"]),
+            "age_seconds": round(now - row["created_at"], 1),
+        }
+
+    def put(self, key, kind, body, files):
+        self._init_db()
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, kind, body, files, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(body), json.dumps(files), now, now)
+            )
+            conn.execute("DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM search_cache WHERE key NOT IN "
+                "(SELECT key FROM search_cache ORDER BY last_used_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def invalidate(self, key):
+        self._init_db()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+
+
+search_cache = SearchCache()
+
+
+# ======================================================
+# HELPERS
+# ======================================================
+def snapshot_pdfs(download_dir):
+    return set(glob.glob(os.path.join(download_dir, "*.pdf")))
+
+
+def collect_files(download_dir, before, results=None):
+    """
+    Files a search produced: PDFs that appeared in download_dir since the
+    `before` snapshot plus every document named in `results` (which may
+    have been linked in or skipped as already present).
+    """
+    files = {}
+    for path in snapshot_pdfs(download_dir) - before:
+        files[path] = {"path": path}
+    for result in results or []:
+        path = os.path.join(download_dir, result.get("pdf_file") or "")
+        if result.get("pdf_file") and os.path.exists(path):
+            files[path] = {"path": path, "instrument": result.get("Instrument No"), "doc_type": result.get("Type")}
+    return sorted(files.values(), key=lambda f: f["path"])
+
+
+def lookup(key, download_dir):
+    """
+    Serve a cached search into download_dir. Returns the cached response body
+    (with a "cache" block) or None on a miss or when a cached file is gone.
+    """
+    if not SEARCH_CACHE:
+        return None
+    try:
+        entry = search_cache.get(key)
+        if not entry:
+            return None
+        if not all(os.path.exists(f["path"]) for f in entry["files"]):
+            print("Cached search refers to files that no longer exist; searching again.")
+            search_cache.invalidate(key)
+            return None
+
+        os.makedirs(download_dir, exist_ok=True)
+        for f in entry["files"]:
+            target = place_file(f["path"], download_dir)
+            if f.get("instrument"):
+                record_download(download_dir, f["instrument"], f.get("doc_type"), target)
+        print(f"Search served from cache ({len(entry['files'])} files, {entry['age_seconds']}s old).")
+        return {**entry["body"], "cache": {"hit": True, "age_seconds": entry["age_seconds"],
+                                           "files_linked": len(entry["files"])}}
+    except Exception as e:
+        print(f"Search cache lookup failed: {e}")
+        return None
+
+
+def store(key, kind, body, files):
+    """Cache a finished search whose outcome is final (found / not found)."""
+    if not SEARCH_CACHE or body.get("status") not in ("PDF_FOUND_SUCCESSFULLY", "DATA_NOT_FOUND"):
+        return
+    try:
+        search_cache.put(key, kind, {k: v for k, v in body.items() if k not in _VOLATILE_KEYS}, files)
+    except Exception as e:
+        print(f"Could not cache search result: {e}")
@@ -0,0 +1,174 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from services.metrics import current_labels, metric_labels
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Split searches whose result set hit the site's cap into smaller date windows
+SHARD_SEARCHES = os.getenv("SHARD_SEARCHES", "1") == "1"
+# Windows are never split below this many days
+SHARD_MIN_DAYS = int(os.getenv("SHARD_MIN_DAYS", "1"))
+# Hard stop on the number of searches one sharded request may run
+SHARD_MAX_SEARCHES = int(os.getenv("SHARD_MAX_SEARCHES", "64"))
+# Shards searched at once (the caller's session plus helpers)
+SHARD_CONCURRENCY = int(os.getenv("SHARD_CONCURRENCY", "2"))
+# How long a shard helper waits for a free browser session before leaving the work to others
+SHARD_LEASE_TIMEOUT = float(os.getenv("SHARD_LEASE_TIMEOUT", "5"))
+
+DATE_FORMAT = "%m/%d/%Y"
+
+
+# ======================================================
+# DATE WINDOWS
+# ======================================================
+def split_date_window(from_date, to_date, min_days=SHARD_MIN_DAYS):
+    """
+    Halve an inclusive MM/DD/YYYY window. Returns [(from, mid), (mid + 1, to)],
+    or None if either half would be shorter than min_days (or the dates
+    are not in that format).
+    """
+    try:
+        start = datetime.strptime(from_date, DATE_FORMAT)
+        end = datetime.strptime(to_date, DATE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    days = (end - start).days + 1
+    if days < 2 * max(1, min_days):
+        return None
+    mid = start + timedelta(days=days // 2 - 1)
+    return [
+        (from_date, mid.strftime(DATE_FORMAT)),
+        ((mid + timedelta(days=1)).strftime(DATE_FORMAT), to_date),
+    ]
+
+
+def shard_label(name, from_date, to_date):
+    """Name used for a shard's index PDF, e.g. 'SMITH JOHN 01012000-06302010'."""
+    return f"{name} {from_date.replace('/', '')}-{to_date.replace('/', '')}".strip()
+
+
+def merge_by_instrument(result_lists, key="Instrument No"):
+    """
+    Concatenate per-shard result dicts, keeping the first entry per instrument
+    (entries without one are all kept) and renumbering "index".
+    """
+    merged = OrderedDict()
+    for results in result_lists:
+        for result in results:
+            instrument = result.get(key)
+            merged.setdefault(instrument or id(result), result)
+    out = []
+    for index, result in enumerate(merged.values(), start=1):
+        out.append({**result, "index": index} if "index" in result else result)
+    return out
+
+
+def _sort_key(date):
+    try:
+        return datetime.strptime(date, DATE_FORMAT)
+    except (TypeError, ValueError):
+        return datetime.min
+
+
+# ======================================================
+# SHARDED SEARCH
+# ======================================================
+def run_sharded(search_window, from_date, to_date, handle=None, open_worker=None,
+                concurrency=SHARD_CONCURRENCY):
+    """
+    Run search_window(handle, from_date, to_date, can_split) -> (result, truncated)
+    over the window, splitting every truncated window in half until each shard
+    comes back complete. When can_split is False the search must return its
+    (possibly truncated) result as final.
+
+    The calling thread searches with `handle`. Once more than one window is
+    waiting, up to concurrency - 1 helper threads start; each enters
+    open_worker() (a context manager yielding its own handle, e.g. a browser
+    pool lease, or `handle` itself when None) and quietly gives up if that
+    fails. A window whose helper fails is put back for another worker.
+
+    Returns [{"from_date", "to_date", "result", "truncated"}] for the final
+    shards, ordered by date.
+    """
+    pending = deque([(from_date, to_date)])
+    shards = []
+    state = {"in_flight": 0, "searches": 0, "helpers": 0, "failed": False}
+    cond = threading.Condition()
+    labels = current_labels()
+    open_worker = open_worker or (lambda: nullcontext(handle))
+
+    def take():
+        with cond:
+            while not pending and state["in_flight"] and not state["failed"]:
+                cond.wait()
+            if not pending or state["failed"]:
+                return None
+            state["in_flight"] += 1
+            state["searches"] += 1
+            window = pending.popleft()
+            # Splitting adds two searches; stop once the budget would be exceeded
+            budget_left = state["searches"] + len(pending) + 2 <= SHARD_MAX_SEARCHES
+            return window, budget_left
+
+    def start_helpers():
+        # Called with cond held
+        while len(pending) > 1 and state["helpers"] < concurrency - 1:
+            state["helpers"] += 1
+            threading.Thread(target=helper, daemon=True).start()
+
+    def work(worker_handle, is_helper=False):
+        while True:
+            item = take()
+            if item is None:
+                return
+            (start, end), budget_left = item
+            halves = split_date_window(start, end) if SHARD_SEARCHES and budget_left else None
+            try:
+                result, truncated = search_window(worker_handle, start, end, bool(halves))
+            except Exception:
+                with cond:
+                    state["in_flight"] -= 1
+                    if is_helper:
+                        pending.appendleft((start, end))
+                    else:
+                        state["failed"] = True
+                    cond.notify_all()
+                raise
+
+            with cond:
+                state["in_flight"] -= 1
+                if truncated and halves:
+                    print(f"Result cap hit for {start} - {end}; splitting into {halves}")
+                    pending.extend(halves)
+                    start_helpers()
+                else:
+                    if truncated:
+                        print(f"Result cap hit for {start} - {end} but the window cannot be split further.")
+                    shards.append({"from_date": start, "to_date": end, "result": result, "truncated": truncated})
+                cond.notify_all()
+
+    def helper():
+        try:
+            with metric_labels(**labels), open_worker() as worker_handle:
+                work(worker_handle, is_helper=True)
+        except Exception as e:
+            print(f"Shard helper stopped: {e}")
+        finally:
+            with cond:
+                state["helpers"] -= 1
+                cond.notify_all()
+
+    try:
+        work(handle)
+    finally:
+        # Let helpers hand their sessions back before returning
+        with cond:
+            while state["helpers"]:
+                cond.wait()
+
+    return sorted(shards, key=lambda s: _sort_key(s["from_date"]))
@@ -0,0 +1,82 @@
+import os
+import time
+
+from services.profiler import note_fallback
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Upper bound for any single readiness wait (seconds)
+PAGE_IDLE_TIMEOUT = float(os.getenv("PAGE_IDLE_TIMEOUT", "30"))
+# How long the DOM must stay unchanged before the page counts as settled (ms)
+PAGE_IDLE_QUIET_MS = int(os.getenv("PAGE_IDLE_QUIET_MS", "400"))
+PAGE_IDLE_POLL = 0.2
+
+# Installs a MutationObserver once per document, then reports Angular's
+# pending $http requests, the BrowserView 'ajax-loader' spinner and how long
+# the DOM has been quiet.
+_IDLE_PROBE_JS = """
+var quietMs = arguments[0];
+if (!window.__idleObserver) {
+    window.__lastMutation = Date.now();
+    window.__idleObserver = new MutationObserver(function() { window.__lastMutation = Date.now(); });
+    window.__idleObserver.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+}
+
+var pending = 0;
+try {
+    if (window.angular) {
+        var root = document.querySelector('[ng-app]') || document.querySelector('[data-ng-app]') || document.body;
+        var injector = angular.element(root).injector();
+        if (injector) { pending = injector.get('$http').pendingRequests.length; }
+    }
+} catch (e) {}
+
+var spinner = false;
+var loaders = document.getElementsByClassName('ajax-loader');
+for (var i = 0; i < loaders.length; i++) {
+    if (loaders[i].offsetWidth > 0 || loaders[i].offsetHeight > 0) { spinner = true; break; }
+}
+
+return {
+    ready: document.readyState === 'complete',
+    pending: pending,
+    spinner: spinner,
+    quiet: (Date.now() - window.__lastMutation) >= quietMs
+};
+"""
+
+
+def is_page_idle(driver, quiet_ms=None):
+    """
+    True once the document is loaded, no $http requests are in flight,
+    the spinner is hidden and the DOM has not mutated for quiet_ms.
+    """
+    quiet_ms = PAGE_IDLE_QUIET_MS if quiet_ms is None else quiet_ms
+    try:
+        state = driver.execute_script(_IDLE_PROBE_JS, quiet_ms)
+    except Exception:
+        # Page is mid-navigation or an alert is open; treat as busy
+        return False
+    if not state:
+        return False
+    return state["ready"] and state["pending"] == 0 and not state["spinner"] and state["quiet"]
+
+
+def wait_for_page_idle(driver, timeout=None, quiet_ms=None):
+    """
+    Block until the page is idle or `timeout` seconds pass.
+    Returns True if the page settled, False if the upper bound was hit.
+    Never raises, so it can replace a fixed time.sleep() one-for-one.
+    """
+    timeout = PAGE_IDLE_TIMEOUT if timeout is None else timeout
+    end = time.time() + timeout
+    while time.time() < end:
+        if is_page_idle(driver, quiet_ms):
+            return True
+        time.sleep(PAGE_IDLE_POLL)
+    print(f"Page idle wait hit upper bound ({timeout}s), continuing.")
+    note_fallback(driver, "page_idle_timeout", f"{timeout}s")
+    return False
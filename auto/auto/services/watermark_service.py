@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from services.shard_service import DATE_FORMAT, merge_by_instrument
+from utils.helpers import BASE_DIR
+
+# ======================================================
+# CONFIG
+# ======================================================
+WATERMARK_DB_PATH = os.getenv("WATERMARK_DB_PATH", os.path.join(BASE_DIR, "watermarks.db"))
+# Default for requests that do not pass "incremental"
+INCREMENTAL_SEARCHES = os.getenv("INCREMENTAL_SEARCHES", "0") == "1"
+# Re-search this many days before the stored end date; recordings are indexed late
+INCREMENTAL_OVERLAP_DAYS = int(os.getenv("INCREMENTAL_OVERLAP_DAYS", "7"))
+
+
+def _parse(date):
+    return datetime.strptime(date, DATE_FORMAT)
+
+
+# ======================================================
+# HIGH-WATER MARKS
+# ======================================================
+class WatermarkStore:
+    """
+    Last successful search window per (county, file_number, kind, subject),
+    with the folder it downloaded into and the results it returned, so a
+    repeat request only has to search for recordings made since.
+    """
+
+    def __init__(self, db_path=WATERMARK_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        # Created on first use so importing the service never touches disk
+        with self._lock:
+            if self._ready:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS search_watermarks (
+                        county TEXT NOT NULL,
+                        file_number TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        subject TEXT NOT NULL,
+                        download_dir TEXT NOT NULL,
+                        from_date TEXT NOT NULL,
+                        to_date TEXT NOT NULL,
+                        result TEXT NOT NULL,
+                        updated_at REAL NOT NULL,
+                        PRIMARY KEY (county, file_number, kind, subject)
+                    )
+                """)
+            self._ready = True
+
+    def get(self, county, file_number, kind, subject):
+        self._init_db()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM search_watermarks WHERE county = ? AND file_number = ? AND kind = ? AND subject = ?",
+                (county, str(file_number), kind, subject)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "download_dir": row["download_dir"],
+            "from_date": row["from_date"],
+            "to_date": row["to_date"],
+            "result": json.loads(row["result"]),
+            "updated_at": row["updated_at"],
+        }
+
+    def put(self, county, file_number, kind, subject, download_dir, from_date, to_date, result):
+        self._init_db()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_watermarks "
+                "(county, file_number, kind, subject, download_dir, from_date, to_date, result, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (county, str(file_number), kind, subject, download_dir, from_date, to_date,
+                 json.dumps(result), time.time())
+            )
+
+
+watermarks = WatermarkStore()
+
+
+def search_subject(*parts):
+    """Normalized key for what was searched, e.g. ('PARAMUS', '12', '3', '')."""
+    return "|".join(str(p or "").strip().upper() for p in parts)
+
+
+def plan_search(county, file_number, kind, subject, download_dir, from_date, incremental):
+    """
+    Decide where a search should start. Returns (search_from, previous) where
+    previous is the stored mark to merge with, or None for a full search.
+    A mark is only used when it covers the requested start and its files are
+    in the same folder.
+    """
+    if not incremental:
+        return from_date, None
+    try:
+        mark = watermarks.get(county, file_number, kind, subject)
+        if not mark or mark["download_dir"] != download_dir:
+            return from_date, None
+        if _parse(mark["from_date"]) > _parse(from_date):
+            # Asked for older recordings than were ever searched
+            return from_date, None
+        resume = _parse(mark["to_date"]) - timedelta(days=INCREMENTAL_OVERLAP_DAYS)
+        if resume <= _parse(from_date):
+            return from_date, mark
+        print(f"Incremental search for {subject}: resuming at {resume.strftime(DATE_FORMAT)} "
+              f"(previously searched {mark['from_date']} - {mark['to_date']})")
+        return resume.strftime(DATE_FORMAT), mark
+    except Exception as e:
+        print(f"Watermark lookup failed, running a full search: {e}")
+        return from_date, None
+
+
+def record_search(county, file_number, kind, subject, download_dir, from_date, to_date, result, previous=None):
+    """
+    Store the window now covered (extending the previous mark's start) after
+    a successful search.
+    """
+    try:
+        if previous:
+            from_date = min(from_date, previous["from_date"], key=_parse)
+        watermarks.put(county, file_number, kind, subject, download_dir, from_date, to_date, result)
+    except Exception as e:
+        print(f"Could not store search watermark: {e}")
+
+
+def merge_found(status, previous_status):
+    """A narrowed search finding nothing new still has the earlier documents."""
+    if "PDF_FOUND_SUCCESSFULLY" in (status, previous_status):
+        return "PDF_FOUND_SUCCESSFULLY"
+    return status
+
+
+def merge_results(previous_results, results):
+    return merge_by_instrument([previous_results or [], results or []])
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app's packages (services, utils, ...) from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    """Point the SQLite-backed stores at a temp dir instead of the server's databases."""
+    from services import manifest_service, ocr_cache, search_cache, watermark_service
+
+    monkeypatch.setattr(manifest_service, "manifest", manifest_service.DownloadManifest(str(tmp_path / "manifest.db")))
+    monkeypatch.setattr(ocr_cache, "ocr_cache", ocr_cache.OcrCache(str(tmp_path / "ocr_cache.db")))
+    monkeypatch.setattr(search_cache, "search_cache", search_cache.SearchCache(str(tmp_path / "search_cache.db")))
+    monkeypatch.setattr(watermark_service, "watermarks", watermark_service.WatermarkStore(str(tmp_path / "watermarks.db")))
+    return tmp_path
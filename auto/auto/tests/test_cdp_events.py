@@ -0,0 +1,46 @@
+import json
+import os
+
+import pytest
+
+from services import cdp_events
+from services.cdp_events import CdpEventPump
+
+
+class FakeLogDriver:
+    def __init__(self, *events):
+        self.entries = [{"message": json.dumps({"message": {"method": m, "params": p}})} for m, p in events]
+
+    def get_log(self, kind):
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def completed_download(guid, **extra):
+    return FakeLogDriver(
+        ("Page.downloadWillBegin", {"guid": guid, "url": "blob:x", "suggestedFilename": "DEED_123.pdf"}),
+        ("Page.downloadProgress", {"guid": guid, "state": "completed", **extra}),
+    )
+
+
+@pytest.mark.parametrize("events_on, expected", [(True, "g-1"), (False, "DEED_123.pdf")])
+def test_path_without_file_path_follows_download_behavior(monkeypatch, events_on, expected):
+    monkeypatch.setattr(cdp_events, "DOWNLOAD_EVENTS", events_on)
+    pump = CdpEventPump(completed_download("g-1"))
+    assert pump.wait_for_download("/downloads", set(), timeout=1) == os.path.join("/downloads", expected)
+
+
+def test_reported_file_path_wins():
+    pump = CdpEventPump(completed_download("g-2", filePath="/elsewhere/g-2"))
+    assert pump.wait_for_download("/downloads", set(), timeout=1) == "/elsewhere/g-2"
+
+
+def test_known_downloads_are_skipped_and_consumed_ones_dropped(monkeypatch):
+    monkeypatch.setattr(cdp_events, "DOWNLOAD_EVENTS", True)
+    pump = CdpEventPump(completed_download("old"))
+    known = pump.known_downloads()
+    with pytest.raises(TimeoutError):
+        pump.wait_for_download("/downloads", known, timeout=0.2)
+    pump.driver = completed_download("new")
+    assert pump.wait_for_download("/downloads", known, timeout=1) == os.path.join("/downloads", "new")
+    assert "new" not in pump.known_downloads()
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from services import scraper_service
+from services.scraper_service import PARTY_BLOB_XPATH, PARTY_VIEW_XPATH, download_results_concurrently
+
+
+class FakeWindows:
+    """A driver whose windows each generate one PDF, ready `ready_after` seconds after it was started."""
+
+    def __init__(self, total, ready_after):
+        self.total = total
+        self.ready_after = ready_after
+        self.current = "main"
+        self.current_window_handle = "main"
+        self.switch_to = self
+        self.started = {}
+        self.switches = 0
+
+    def window(self, handle):
+        self.switches += 1
+        self.current = self.current_window_handle = handle
+
+    def close(self):
+        pass
+
+    def execute_script(self, script, *args):
+        return "{}"
+
+    def find_elements(self, by, xpath):
+        if xpath == PARTY_VIEW_XPATH:
+            return [object()] * self.total
+        if xpath == PARTY_BLOB_XPATH:
+            started = self.started.get(self.current)
+            if started is not None and time.time() - started[1] >= self.ready_after(started[0]):
+                return [type("Link", (), {"is_displayed": lambda self: True})()]
+        return []
+
+
+@pytest.fixture
+def windows(monkeypatch):
+    def make(total, ready_after, window_count=3):
+        driver = FakeWindows(total, ready_after)
+        extra = iter(f"w{i}" for i in range(1, window_count))
+        monkeypatch.setattr(scraper_service, "_replicate_search", lambda *a: next(extra))
+        monkeypatch.setattr(scraper_service, "captured_result_rows", lambda *a: None)
+        monkeypatch.setattr(scraper_service, "note_fallback", lambda *a: None)
+        monkeypatch.setattr(scraper_service, "record_download", lambda *a: None)
+        monkeypatch.setattr(scraper_service, "save_document", lambda *a: None)
+
+        def start(driver_, index, *args):
+            driver.started[driver.current] = (index, time.time())
+            return {"index": index, "final_path": f"/tmp/doc_{index}.pdf", "doc_type": "DEED",
+                    "instrument": str(index), "started": time.time()}
+
+        monkeypatch.setattr(scraper_service, "_start_generation", start)
+        return driver
+    return make
+
+
+def test_idle_windows_are_not_polled_while_the_last_document_generates(windows, monkeypatch):
+    monkeypatch.setattr(scraper_service, "PDF_POLL_INTERVAL", 0.05)
+    # Documents 0 and 1 are ready at once, document 2 takes a second
+    driver = windows(3, lambda index: 1.0 if index == 2 else 0)
+    results = download_results_concurrently(driver, "/tmp", "https://example.test/", 3)
+    assert [r["index"] for r in results] == [1, 2, 3]
+    # One switch per poll of the busy window, ~20 polls in a second; not thousands
+    assert driver.switches < 60
+
+
+def test_overall_deadline_stops_a_generation_that_never_finishes(windows, monkeypatch):
+    monkeypatch.setattr(scraper_service, "PDF_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(scraper_service, "PDF_BATCH_TIMEOUT", 0.3)
+    progress = []
+    driver = windows(2, lambda index: 3600 if index == 1 else 0, window_count=2)
+    started = time.time()
+    results = download_results_concurrently(driver, "/tmp", "https://example.test/", 2,
+                                            progress=lambda done, total: progress.append((done, total)))
+    assert time.time() - started < 2
+    assert [r["index"] for r in results] == [1]
+    assert progress[-1] == (2, 2)
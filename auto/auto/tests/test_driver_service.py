@@ -0,0 +1,60 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from services import driver_service
+from services.driver_service import BrowserPool, PooledSession
+
+
+class FakeDriver:
+    def __init__(self):
+        self.window_handles = ["main"]
+        self.switch_to = self
+        self.quit_called = False
+
+    def window(self, handle):
+        pass
+
+    def execute_script(self, script):
+        return 1
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(driver_service, "set_download_dir", lambda driver, path: None)
+    pool = BrowserPool(size=1)
+    monkeypatch.setattr(pool, "_launch", lambda: PooledSession(FakeDriver()))
+    monkeypatch.setattr(pool, "_replenish", lambda: None)
+    return pool
+
+
+def test_ordinary_error_returns_session_to_pool(pool):
+    with pytest.raises(ValueError):
+        with pool.lease("/tmp") as driver:
+            raise ValueError("Township not found")
+    assert not driver.quit_called
+    assert pool.stats()["sessions_idle"] == 1
+    assert pool.stats()["recycled"]["error"] == 0
+
+
+def test_webdriver_error_recycles_session(pool):
+    with pytest.raises(WebDriverException):
+        with pool.lease("/tmp") as driver:
+            raise WebDriverException("chrome not reachable")
+    assert driver.quit_called
+    assert pool.stats()["recycled"]["error"] == 1
+    assert pool.stats()["sessions_idle"] == 0
+
+
+def test_unhealthy_session_after_error_is_recycled(pool):
+    with pytest.raises(ValueError):
+        with pool.lease("/tmp") as driver:
+            driver.window_handles = []
+            raise ValueError("boom")
+    assert driver.quit_called
+    assert pool.stats()["recycled"]["error"] == 1
@@ -0,0 +1,69 @@
+import json
+
+from services import extraction_service
+from services.extraction_service import DocumentText, usable_text
+
+
+def ocr_stream(texts, pulled):
+    """Fake iter_ocr_pages: yields (number, text) in order and records what was pulled."""
+    for number, text in texts:
+        pulled.append(number)
+        yield number, text
+
+
+def test_pages_without_text_are_skipped_not_the_end():
+    pulled = []
+    # Page 3 never comes out of OCR; page 2 is known from the text layer
+    stream = ocr_stream([(1, "one "), (4, "four "), (5, "five ")], pulled)
+    document = DocumentText({2: "two "}, stream, [1, 3, 4, 5])
+    assert document.read_all() == "one two four five "
+    assert document.finished
+    assert document.fresh == {1: "one ", 4: "four ", 5: "five "}
+
+
+def test_reading_stops_as_soon_as_there_is_enough():
+    pulled = []
+    stream = ocr_stream([(n, f"page{n} ") for n in range(1, 11)], pulled)
+    document = DocumentText({}, stream, list(range(1, 11)))
+    assert document.read_until(lambda text: "page3" in text) == "page1 page2 page3 "
+    assert pulled == [1, 2, 3]
+    assert not document.finished
+    document.close()
+
+
+def test_max_pages_bounds_a_search_that_never_succeeds():
+    pulled = []
+    stream = ocr_stream([(n, f"page{n} ") for n in range(1, 11)], pulled)
+    document = DocumentText({}, stream, list(range(1, 11)))
+    document.read_until(lambda text: "page1" in text)
+    document.read_until(lambda text: False, max_pages=2)
+    assert pulled == [1, 2, 3]
+
+
+def test_lazy_extraction_reads_only_a_few_pages_for_missing_regex_fields(monkeypatch):
+    monkeypatch.setattr(extraction_service, "PROMPT_TEXT_CHARS", 20)
+    monkeypatch.setattr(extraction_service, "LAZY_REGEX_PAGES", 2)
+    reply = {"DOCUMENT_TYPE": "MORTGAGE", "GRANTOR": "A", "GRANTEE": "B", "INSTRUMENT_NUMBER": "2025000001",
+             "RECORDING_DATE": "01/02/2025", "CONSIDERATION_AMOUNT": "", "BOOK": "", "PAGENO": "",
+             "LEGAL_DESCRIPTION": "Lot 4 in Block 12 on the tax map of the Borough of Tenafly."}
+    monkeypatch.setattr(extraction_service, "_ask_llm", lambda prompt, stats: json.dumps(reply))
+    pulled = []
+    # A 40-page mortgage rider with no consideration or book/page anywhere
+    stream = ocr_stream([(n, f"rider text on page {n}. ") for n in range(1, 41)], pulled)
+    document = DocumentText({}, stream, list(range(1, 41)))
+    data = extraction_service._extract_fields(document, "MORTGAGE_2025000001.pdf", True,
+                                              extraction_service.new_stats())
+    document.close()
+    assert data["GRANTOR"] == "A"
+    assert pulled == [1, 2, 3]
+
+
+def test_usable_text():
+    deed = "THIS DEED is made on March 3, 2025 between John Smith, Grantor, and Jane Doe, Grantee. " * 2
+    assert usable_text(deed)
+    assert not usable_text("RECORDED 03/04/2025")
+    # Broken font encodings come out as symbols
+    assert not usable_text("\u25a0\u25a1\u25aa\u25ab" * 30)
+    # On a page that is mostly a scan a stamp-sized layer is not trusted, a full one is
+    assert not usable_text(deed, image_coverage=0.9)
+    assert usable_text(deed * 3, image_coverage=0.9)
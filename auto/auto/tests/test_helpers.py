@@ -0,0 +1,17 @@
+import re
+
+from utils.helpers import file_sha256, format_document_name
+
+
+def test_format_document_name():
+    assert format_document_name("DEED", "2025000001") == "DEED_2025000001"
+    assert format_document_name(" MTG ASSIGN ", "B/P 12") == "MTG_ASSIGN_B_P_12"
+    assert format_document_name("", "2025000001") == "2025000001"
+    assert format_document_name("DEED", None) == "DEED"
+    assert re.fullmatch(r"Document_3_\d+", format_document_name(None, " ", index=3))
+
+
+def test_file_sha256(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"abc")
+    assert file_sha256(str(path)) == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from benchmarks.stub_site import create_app, load_fixture, serve
+from services import http_search_service, scrape_runner
+from services.http_search_service import (
+    extract_rows, extract_total, http_scrape_lot_block, http_search_parties, normalize_row
+)
+
+
+@pytest.fixture
+def site():
+    servers = []
+
+    def start(**kwargs):
+        server, base_url = serve(create_app(**kwargs))
+        servers.append(server)
+        return base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_recorded_search_response_normalizes():
+    data = load_fixture("search_response.json")
+    rows = [normalize_row(r) for r in extract_rows(data)]
+    assert extract_total(data) == len(rows) == 4
+    assert rows[0] == {
+        "doc_id": "1187345",
+        "doc_type": "DEED",
+        "instrument": "2025072510",
+        "book": "5123",
+        "page": "1187",
+        "recorded_date": "07/25/2025",
+        "first_party": "RICCA TERESA",
+        "second_party": "643939 HOLDINGS LLC",
+        "parties": "",
+    }
+
+
+def test_party_search_downloads_every_row(site, stores):
+    file_dir = stores / "643939" / "party"
+    file_dir.mkdir(parents=True)
+    result = http_search_parties(["RICCA TERESA"], "PARAMUS", "01/01/2025", "12/31/2025", site(), str(file_dir),
+                                 "bergen")
+    assert result["status"] == "PDF_FOUND_SUCCESSFULLY"
+    assert result["failed_downloads"] == []
+    assert result["unique_documents"] == len(result["results"]) == 4
+    for r in result["results"]:
+        assert os.path.exists(file_dir / r["pdf_file"])
+
+
+def test_failed_downloads_are_reported(site, stores):
+    file_dir = stores / "643939" / "party"
+    file_dir.mkdir(parents=True)
+    result = http_search_parties(["RICCA TERESA"], "PARAMUS", "01/01/2025", "12/31/2025",
+                                 site(failing_documents={"1187345"}), str(file_dir), "bergen")
+    assert [f["Instrument No"] for f in result["failed_downloads"]] == ["2025072510"]
+    assert "2025072510" not in [r["Instrument No"] for r in result["results"]]
+    assert len(result["results"]) == 3
+
+
+def test_runner_falls_back_to_selenium_when_downloads_fail(monkeypatch):
+    monkeypatch.setattr(scrape_runner, "http_scrape_lot_block", lambda *a, **k: {
+        "status": "PDF_FOUND_SUCCESSFULLY", "file_count": 2, "results": [],
+        "failed_downloads": [{"index": 1, "Instrument No": "X", "error": "HTTP 500"}],
+    })
+    params = {"site_url": "https://example.test/", "county": "bergen", "engine": "http", "township": "PARAMUS",
+              "lot": "1", "block": "2", "party_name": "", "from_date": "01/01/2025", "requested_from": "01/01/2025",
+              "to_date": "12/31/2025", "download_dir": "/tmp/unused"}
+    assert scrape_runner._scrape_http(params) is None
+
+
+def test_lot_block_search_without_failures(site, stores):
+    download_dir = stores / "643939" / "Town_Lot_Block"
+    download_dir.mkdir(parents=True)
+    result = http_scrape_lot_block("PARAMUS", "1", "2", "", "01/01/2025", "12/31/2025", site(), str(download_dir),
+                                   "bergen")
+    assert result["failed_downloads"] == []
+    assert result["file_count"] == len(result["results"]) + 1  # plus the index
+
+
+def test_http_engine_is_opt_in():
+    assert not http_search_service.use_http_engine("https://example.test/", "bergen", None) \
+        or "bergen" in http_search_service.HTTP_SEARCH_COUNTIES
+    assert http_search_service.use_http_engine(None, None, "HTTP")
+    assert not http_search_service.use_http_engine(None, None, "selenium")
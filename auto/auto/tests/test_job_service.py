@@ -0,0 +1,101 @@
+import os
+import socket
+import sqlite3
+import time
+
+import pytest
+from flask import Flask
+
+from services import job_service
+from services.job_service import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_service, "JOB_RETRY_SECONDS", 0.01)
+    q = JobQueue(db_path=str(tmp_path / "jobs.db"), workers=1)
+    q.register("echo", lambda payload, progress: ({"status": "PDF_FOUND_SUCCESSFULLY", **payload}, 200))
+    return q
+
+
+def insert_job(q, job_id, status="queued", owner=None, heartbeat_at=None):
+    q._init_db()
+    with q._connect() as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, payload, status, created_at, owner, heartbeat_at) "
+            "VALUES (?, 'echo', '{}', ?, ?, ?, ?)",
+            (job_id, status, time.time(), owner, heartbeat_at)
+        )
+
+
+def wait_for(q, job_id, status, timeout=5):
+    end = time.time() + timeout
+    while time.time() < end:
+        if q.get(job_id)["status"] == status:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_claim_takes_each_job_once(queue, tmp_path):
+    insert_job(queue, "a")
+    other = JobQueue(db_path=str(tmp_path / "jobs.db"))
+    assert queue._claim()[0] == "a"
+    assert other._claim() is None
+    assert queue.get("a")["status"] == "running"
+
+
+def test_requeue_only_jobs_of_dead_or_silent_owners(queue):
+    now = time.time()
+    live = f"{socket.gethostname()}:{os.getppid()}:abcd1234"
+    insert_job(queue, "live", "running", live, now)
+    insert_job(queue, "remote", "running", "elsewhere:1:abcd1234", now)
+    insert_job(queue, "silent", "running", "elsewhere:1:abcd1234", now - job_service.JOB_STALE_SECONDS - 1)
+    insert_job(queue, "restarted", "running", f"{socket.gethostname()}:{os.getpid()}:oldtoken", now)
+    queue._requeue_stale()
+    statuses = {j: queue.get(j)["status"] for j in ("live", "remote", "silent", "restarted")}
+    assert statuses == {"live": "running", "remote": "running", "silent": "queued", "restarted": "queued"}
+
+
+def test_worker_survives_a_locked_database(queue, monkeypatch):
+    real_claim = queue._claim
+    calls = []
+
+    def flaky_claim():
+        calls.append(1)
+        if len(calls) <= 2:
+            raise sqlite3.OperationalError("database is locked")
+        return real_claim()
+
+    monkeypatch.setattr(queue, "_claim", flaky_claim)
+    job_id = queue.submit("echo", {"file_number": "1"})
+    assert wait_for(queue, job_id, "done")
+    assert queue.get(job_id, include_result=True)["result"]["file_number"] == "1"
+
+
+def test_job_outcome_is_recorded_after_a_transient_error(queue, monkeypatch):
+    real_update = queue._update
+    failures = []
+
+    def flaky_update(job_id, **fields):
+        if "finished_at" in fields and not failures:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        real_update(job_id, **fields)
+
+    monkeypatch.setattr(queue, "_update", flaky_update)
+    job_id = queue.submit("echo", {})
+    assert wait_for(queue, job_id, "done")
+    assert failures
+
+
+def test_list_rejects_a_bad_limit(monkeypatch, queue):
+    from blueprints import job_routes
+
+    monkeypatch.setattr(job_routes, "job_queue", queue)
+    app = Flask(__name__)
+    app.register_blueprint(job_routes.job_bp)
+    client = app.test_client()
+    assert client.get("/jobs?limit=abc").status_code == 400
+    assert client.get("/jobs?limit=0").status_code == 400
+    assert client.get("/jobs?limit=5").status_code == 200
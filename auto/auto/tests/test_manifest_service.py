@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from services.manifest_service import DownloadManifest
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return DownloadManifest(str(tmp_path / "manifest.db"))
+
+
+def make_folder(root, name):
+    path = root / "643939" / name
+    path.mkdir(parents=True)
+    return str(path)
+
+
+def write_pdf(folder, name, data=b"%PDF-1.4 deed"):
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_copy_in_a_sibling_folder_is_linked_in(tmp_path, manifest):
+    party = make_folder(tmp_path, "SMITH JOHN")
+    town = make_folder(tmp_path, "Town_Lot_Block")
+    manifest.record(party, "2025000001", "DEED", write_pdf(party, "DEED_2025000001.pdf"))
+    found = manifest.lookup("2025000001", "DEED", town)
+    assert found == os.path.join(town, "DEED_2025000001.pdf")
+    with open(found, "rb") as f:
+        assert f.read() == b"%PDF-1.4 deed"
+
+
+def test_a_changed_copy_is_forgotten(tmp_path, manifest):
+    party = make_folder(tmp_path, "SMITH JOHN")
+    path = write_pdf(party, "DEED_2025000001.pdf")
+    manifest.record(party, "2025000001", "DEED", path)
+    write_pdf(party, "DEED_2025000001.pdf", b"truncated")
+    # The file under the expected name is adopted again with its new size
+    assert manifest.lookup("2025000001", "DEED", party) == path
+    os.remove(path)
+    assert manifest.lookup("2025000001", "DEED", party) is None
+
+
+def test_other_file_numbers_and_unknown_instruments_miss(tmp_path, manifest):
+    party = make_folder(tmp_path, "SMITH JOHN")
+    manifest.record(party, "2025000001", "DEED", write_pdf(party, "DEED_2025000001.pdf"))
+    other = str(tmp_path / "700001" / "SMITH JOHN")
+    os.makedirs(other)
+    assert manifest.lookup("2025000001", "DEED", other) is None
+    assert manifest.lookup("2025000002", "DEED", party) is None
+    assert manifest.lookup("", "DEED", party) is None
@@ -0,0 +1,48 @@
+import pytest
+
+from services import metrics
+from services.metrics import Counter, Histogram, SharedMetricStore, metric_labels
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Metrics created in a test stay out of the server's /metrics."""
+    monkeypatch.setattr(metrics, "_registry", [])
+    monkeypatch.setattr(metrics, "_store", None)
+
+
+def test_counter_renders_labels_from_the_call_and_the_context(registry):
+    counter = Counter("test_searches_total", "Searches run", ("endpoint", "county"))
+    counter.inc(endpoint="/search", county="bergen")
+    with metric_labels(endpoint="/search", county='say "hi"'):
+        counter.inc(2)
+    assert metrics.render_metrics() == (
+        "# HELP test_searches_total Searches run\n"
+        "# TYPE test_searches_total counter\n"
+        'test_searches_total{endpoint="/search",county="bergen"} 1\n'
+        'test_searches_total{endpoint="/search",county="say \\"hi\\""} 2\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = Histogram("test_seconds", "Time taken", buckets=(1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+    assert histogram.render() == [
+        "# HELP test_seconds Time taken",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{le="1.0"} 2',
+        'test_seconds_bucket{le="5.0"} 3',
+        'test_seconds_bucket{le="+Inf"} 4',
+        "test_seconds_sum 14.5",
+        "test_seconds_count 4",
+    ]
+
+
+def test_shared_store_sums_every_process(registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "_store", SharedMetricStore(str(tmp_path / "metrics.db")))
+    counter = Counter("test_downloads_total", "Downloads")
+    counter.inc()
+    # Another worker process adding to the same file
+    SharedMetricStore(str(tmp_path / "metrics.db")).add("test_downloads_total", [], {"value": 4})
+    assert counter.render()[-1] == "test_downloads_total 5"
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from services import network_capture
+from services.network_capture import captured_result_counts, start_result_capture
+
+
+class FakeNetworkDriver:
+    """Performance log holding one finished search response and the body CDP would return for it."""
+
+    def __init__(self):
+        self.entries = []
+        self.bodies = {}
+
+    def respond(self, request_id, data):
+        self.bodies[request_id] = json.dumps(data)
+        for method, params in (
+            ("Network.responseReceived", {"requestId": request_id, "type": "XHR",
+                                          "response": {"url": "https://example.test/api/search",
+                                                       "mimeType": "application/json"}}),
+            ("Network.loadingFinished", {"requestId": request_id, "encodedDataLength": 100}),
+        ):
+            self.entries.append({"message": json.dumps({"message": {"method": method, "params": params}})})
+
+    def get_log(self, kind):
+        entries, self.entries = self.entries, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        return {"body": self.bodies[params["requestId"]]}
+
+
+@pytest.fixture(autouse=True)
+def capture_on(monkeypatch):
+    monkeypatch.setattr(network_capture, "NETWORK_CAPTURE", True)
+
+
+def search_response(total):
+    return {"TotalCount": total, "Rows": [{"InstrumentNumber": "2025000001", "DocumentType": "DEED"}]}
+
+
+def test_response_still_in_the_log_does_not_count_for_the_next_search():
+    driver = FakeNetworkDriver()
+    driver.respond("earlier", search_response(900))
+    mark = start_result_capture(driver)
+    assert captured_result_counts(driver, mark) is None
+
+
+def test_response_after_the_mark_is_reported():
+    driver = FakeNetworkDriver()
+    mark = start_result_capture(driver)
+    driver.respond("current", search_response(12))
+    assert captured_result_counts(driver, mark) == (12, 1)
@@ -0,0 +1,72 @@
+import itertools
+
+import pymupdf
+import pytest
+
+from services import extraction_service, ocr_cache
+from services.ocr_cache import OcrCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time() so least-recently-used order is deterministic."""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(ocr_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_eviction_keeps_the_most_recently_used_pages_within_the_budget(tmp_path, clock):
+    cache = OcrCache(str(tmp_path / "ocr.db"), max_bytes=10)
+    cache.put_pages("a", {1: "aaaa", 2: "bbbb"})
+    cache.put_pages("b", {1: "cccc"})
+    # 12 bytes > 10: the newest document stays, then "a" from its highest rowid down
+    assert cache.get_pages("b", [1]) == {1: "cccc"}
+    assert cache.get_pages("a", [1, 2]) == {2: "bbbb"}
+
+
+def test_a_lookup_refreshes_a_document(tmp_path, clock):
+    cache = OcrCache(str(tmp_path / "ocr.db"), max_bytes=8)
+    cache.put_pages("a", {1: "aaaa"})
+    cache.put_pages("b", {1: "bbbb"})
+    assert cache.get_pages("a", [1]) == {1: "aaaa"}
+    cache.put_pages("c", {1: "cccc"})
+    assert cache.get_pages("b", [1]) == {}
+    assert cache.get_pages("a", [1]) == {1: "aaaa"}
+    assert cache.get_pages("c", [1]) == {1: "cccc"}
+
+
+def test_a_document_larger_than_the_budget_is_not_kept_whole(tmp_path, clock):
+    cache = OcrCache(str(tmp_path / "ocr.db"), max_bytes=5)
+    cache.put_pages("a", {1: "aaa", 2: "bbb", 3: "ccc"})
+    assert len(cache.get_pages("a", [1, 2, 3])) == 1
+
+
+def make_pdf(path, pages):
+    doc = pymupdf.open()
+    for _ in range(pages):
+        doc.new_page()
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_cache_is_used_with_the_text_layer_off(stores, monkeypatch):
+    monkeypatch.setattr(extraction_service, "TEXT_LAYER", False)
+    monkeypatch.setattr(extraction_service, "OCR_CACHE", True)
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE", True)
+    ocr_calls = []
+
+    def fake_ocr(pdf_path, numbers, runner, stats):
+        ocr_calls.append(numbers)
+        for number in numbers:
+            yield number, f"page {number} "
+
+    monkeypatch.setattr(extraction_service, "iter_ocr_pages", fake_ocr)
+    monkeypatch.setattr(extraction_service, "_extract_fields",
+                        lambda document, filename, lazy, stats: {"TEXT": document.read_all()})
+    pdf = make_pdf(stores / "deed.pdf", 3)
+
+    first = extraction_service.process_pdf(pdf, "deed.pdf", lazy=False)
+    second = extraction_service.process_pdf(pdf, "deed.pdf", lazy=False)
+    assert first["TEXT"] == second["TEXT"] == "page 1 page 2 page 3 "
+    assert ocr_calls == [[1, 2, 3]]
+    assert second["PAGE_SOURCES"]["cache"] == 3
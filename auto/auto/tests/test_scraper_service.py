@@ -0,0 +1,40 @@
+import threading
+
+from services.scraper_service import SeenInstruments, match_township
+
+OPTIONS = [("", "-- Select --"), ("02", "ALLENDALE"), ("45", "RIDGEFIELD PARK"), ("44", "RIDGEFIELD"),
+           ("TEN", "TENAFLY")]
+
+
+def test_match_township_prefers_value_then_text_then_partial():
+    assert match_township(OPTIONS, "ten") == ("TEN", "value")
+    assert match_township(OPTIONS, " Ridgefield ") == ("44", "text")
+    assert match_township(OPTIONS, "ALLEN") == ("02", "partial")
+    assert match_township(OPTIONS, "MAHWAH") == (None, None)
+
+
+def test_seen_instruments_claim_once_and_release_for_retry():
+    seen = SeenInstruments()
+    assert seen.claim("2025000001")
+    assert not seen.claim("2025000001")
+    assert "2025000001" in seen
+    seen.release("2025000001")
+    assert "2025000001" not in seen
+    assert seen.claim("2025000001")
+
+
+def test_seen_instruments_has_one_winner_across_threads():
+    seen = SeenInstruments()
+    wins = []
+    barrier = threading.Barrier(8)
+
+    def claim():
+        barrier.wait()
+        wins.append(seen.claim("2025000001"))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert wins.count(True) == 1
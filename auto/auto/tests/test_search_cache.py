@@ -0,0 +1,41 @@
+import itertools
+
+import pytest
+
+from services import search_cache
+from services.search_cache import SearchCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 1000.0}
+    ticks = itertools.count()
+    # Every call moves on a millisecond so use order is strict; tests jump ahead with now["t"]
+    monkeypatch.setattr(search_cache.time, "time", lambda: now["t"] + next(ticks) / 1000)
+    return now
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = SearchCache(str(tmp_path / "search.db"), ttl=60, max_entries=10)
+    cache.put("k", "party", {"status": "DATA_NOT_FOUND"}, [])
+    clock["t"] += 30
+    assert cache.get("k")["body"] == {"status": "DATA_NOT_FOUND"}
+    clock["t"] += 31
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_entries_go_beyond_max_entries(tmp_path, clock):
+    cache = SearchCache(str(tmp_path / "search.db"), ttl=3600, max_entries=2)
+    cache.put("a", "party", {}, [])
+    cache.put("b", "party", {}, [])
+    assert cache.get("a") is not None
+    cache.put("c", "party", {}, [])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_cache_key_normalizes_criteria():
+    assert cache_key("https://site/", "party", [" smith ", None], "01/01/2020", "12/31/2020") == \
+        cache_key("HTTPS://SITE", "party", ["SMITH", ""], "01/01/2020", "12/31/2020")
+    assert cache_key("https://site", "party", ["SMITH"], "01/01/2020", "12/31/2020") != \
+        cache_key("https://site", "party", ["SMITH"], "01/01/2020", "12/31/2021")
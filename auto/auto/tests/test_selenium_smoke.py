@@ -0,0 +1,69 @@
+"""
+Headless Chrome against the local mock BrowserView site (benchmarks.mock_site)
+through the real runners: perform_search, download_all_pdfs and
+save_results_as_pdf. Skipped when no Chrome session can be started.
+"""
+import glob
+import os
+import shutil
+
+import pytest
+
+from benchmarks.mock_site import MockRecords, create_mock_app
+from benchmarks.stub_site import serve
+from services.driver_service import browser_pool
+from services.scrape_runner import run_scrape, run_search_document
+from utils.helpers import BASE_DIR
+
+COUNTY = "smoke"
+RECORDS = 3
+
+
+@pytest.fixture
+def mock_site(stores):
+    app = create_mock_app(generation_delay_ms=200, api_latency_ms=10, result_cap=RECORDS - 1,
+                          records=MockRecords(records_per_subject=RECORDS))
+    server, base_url = serve(app)
+    browser_pool.size = 1
+    try:
+        try:
+            with browser_pool.lease(str(stores), timeout=60):
+                pass
+        except Exception as e:
+            pytest.skip(f"Could not start a Chrome session: {e}")
+        yield base_url
+    finally:
+        browser_pool.shutdown()
+        server.shutdown()
+        shutil.rmtree(os.path.join(BASE_DIR, COUNTY), ignore_errors=True)
+
+
+def pdfs(file_number):
+    return sorted(os.path.basename(p) for p in glob.glob(os.path.join(BASE_DIR, COUNTY, file_number, "**", "*.pdf"),
+                                                         recursive=True))
+
+
+def test_party_search_downloads_every_document_and_the_index(mock_site):
+    # result_cap is below the record count, so the Notice modal fires and the window is sharded
+    body, status = run_search_document({
+        "party_name": "SMOKE TEST PARTY", "from_date": "01/01/1995", "file_number": "SMOKE-PARTY",
+        "site_url": mock_site, "county": COUNTY, "engine": "selenium", "pdf_concurrency": 2,
+        "cache": False, "incremental": False,
+    })
+    assert status == 200, body
+    assert body["status"] == "PDF_FOUND_SUCCESSFULLY"
+    assert body["total_downloaded"] == RECORDS
+    files = pdfs("SMOKE-PARTY")
+    assert len([f for f in files if not f.startswith("index_")]) == RECORDS
+    assert any(f.startswith("index_") for f in files)
+
+
+def test_lot_block_search_downloads_every_document(mock_site):
+    body, status = run_scrape({
+        "township": "PARAMUS", "lot": "101", "block": "11", "file_number": "SMOKE-TLB",
+        "date": "01/01/1995", "site_url": mock_site, "county": COUNTY, "engine": "selenium",
+        "pdf_concurrency": 1, "cache": False, "incremental": False,
+    })
+    assert status == 200, body
+    assert body["status"] == "PDF_FOUND_SUCCESSFULLY"
+    assert len([f for f in pdfs("SMOKE-TLB") if not f.startswith("index_")]) == RECORDS
@@ -0,0 +1,86 @@
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from services.shard_service import DATE_FORMAT, merge_by_instrument, run_sharded, split_date_window
+
+
+def test_split_halves_an_inclusive_window_on_day_boundaries():
+    assert split_date_window("01/01/2024", "01/02/2024", min_days=1) == [
+        ("01/01/2024", "01/01/2024"), ("01/02/2024", "01/02/2024")]
+    # Odd length: the later half gets the extra day; the halves cross the leap day and month end
+    assert split_date_window("02/28/2024", "03/01/2024", min_days=1) == [
+        ("02/28/2024", "02/28/2024"), ("02/29/2024", "03/01/2024")]
+    assert split_date_window("12/31/2023", "01/01/2024", min_days=1) == [
+        ("12/31/2023", "12/31/2023"), ("01/01/2024", "01/01/2024")]
+
+
+def test_split_refuses_windows_below_the_minimum():
+    assert split_date_window("01/01/2024", "01/01/2024", min_days=1) is None
+    assert split_date_window("01/01/2024", "01/03/2024", min_days=2) is None
+    assert split_date_window("2024-01-01", "2024-01-31") is None
+    assert split_date_window(None, "01/31/2024") is None
+
+
+def test_merge_dedupes_across_shards_and_renumbers():
+    first = [{"index": 1, "Instrument No": "A"}, {"index": 2, "Instrument No": "B"}]
+    second = [{"index": 1, "Instrument No": "B", "from": "second"}, {"index": 2, "Instrument No": ""},
+              {"index": 3, "Instrument No": ""}, {"index": 4, "Instrument No": "C"}]
+    merged = merge_by_instrument([first, second])
+    assert [(r["index"], r["Instrument No"]) for r in merged] == [(1, "A"), (2, "B"), (3, ""), (4, ""), (5, "C")]
+    assert "from" not in merged[1]
+
+
+def fake_site(records, cap):
+    """search_window over (date, instrument) records that returns at most `cap` per search."""
+    calls = []
+
+    def search(handle, start, end, can_split):
+        calls.append((start, end, can_split))
+        lo, hi = datetime.strptime(start, DATE_FORMAT), datetime.strptime(end, DATE_FORMAT)
+        hits = [instrument for date, instrument in records if lo <= date <= hi]
+        return hits[:cap], len(hits) > cap
+    return search, calls
+
+
+def day(n):
+    return datetime(2024, 1, 1) + timedelta(days=n)
+
+
+def test_run_sharded_splits_until_every_shard_fits():
+    records = [(day(n), f"I{n}") for n in range(8)]
+    search, calls = fake_site(records, cap=3)
+    shards = run_sharded(search, "01/01/2024", "01/08/2024", concurrency=1)
+    assert all(not s["truncated"] for s in shards)
+    assert merge_by_instrument([[{"Instrument No": i} for i in s["result"]] for s in shards]) == \
+        [{"Instrument No": f"I{n}"} for n in range(8)]
+    # Shards tile the window without gaps or overlap
+    assert shards[0]["from_date"] == "01/01/2024" and shards[-1]["to_date"] == "01/08/2024"
+    for left, right in zip(shards, shards[1:]):
+        assert datetime.strptime(right["from_date"], DATE_FORMAT) == \
+            datetime.strptime(left["to_date"], DATE_FORMAT) + timedelta(days=1)
+    assert calls[0] == ("01/01/2024", "01/08/2024", True)
+
+
+def test_a_single_day_that_still_overflows_is_kept_as_truncated():
+    records = [(day(0), "A1"), (day(0), "A2"), (day(0), "A3"), (day(1), "B1")]
+    search, calls = fake_site(records, cap=2)
+    shards = run_sharded(search, "01/01/2024", "01/02/2024", concurrency=1)
+    assert [(s["from_date"], s["truncated"], s["result"]) for s in shards] == [
+        ("01/01/2024", True, ["A1", "A2"]), ("01/02/2024", False, ["B1"])]
+    # The one-day window was searched knowing it could not be split again
+    assert ("01/01/2024", "01/01/2024", False) in calls
+
+
+def test_helpers_search_with_their_own_handles():
+    records = [(day(n), f"I{n}") for n in range(16)]
+    search, calls = fake_site(records, cap=2)
+    handles = []
+
+    def searching(handle, start, end, can_split):
+        handles.append(handle)
+        return search(handle, start, end, can_split)
+
+    shards = run_sharded(searching, "01/01/2024", "01/16/2024", handle="main",
+                         open_worker=lambda: nullcontext("helper"), concurrency=3)
+    assert sorted(i for s in shards for i in s["result"]) == sorted(f"I{n}" for n in range(16))
+    assert set(handles) <= {"main", "helper"} and "main" in handles
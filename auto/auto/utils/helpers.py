@@ -1,5 +1,6 @@
 import os
 import glob
+import hashlib
 import time
 import re
 from datetime import datetime
@@ -87,6 +88,27 @@ def format_owner_name(name: str) -> str:
 
     return name
 
+def format_document_name(doc_type, instrument, index=None):
+    """
+    Build the '{TYPE}_{INSTRUMENT}' base filename used for downloaded documents.
+    """
+    doc_type = (doc_type or "").strip()
+    instrument = (instrument or "").strip()
+
+    # If both are valid, return the formatted name
+    if doc_type and instrument:
+        return f"{doc_type}_{instrument}".replace("/", "_").replace(" ", "_")
+
+    # Check if we have at least one
+    if doc_type or instrument:
+        combined = f"{doc_type}{instrument}".strip().replace("/", "_").replace(" ", "_")
+        if combined:
+            return combined
+
+    # Fallback if both are empty/missing
+    idx_str = f"_{index}" if index is not None else ""
+    return f"Document{idx_str}_{int(time.time())}"
+
 def get_download_dir(file_number, site_url=None, county=None):
     base_dir = get_base_download_dir(site_url, county)
     static_folder = "Town_Lot_Block"
@@ -131,3 +153,11 @@ def wait_for_new_pdf(download_dir, existing_files, timeout=60):
                 return pdf
         time.sleep(1)
     raise TimeoutError("PDF download timeout")
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()